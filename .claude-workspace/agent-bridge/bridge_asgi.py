@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Agent Bridge Server, asyncio engine - the HTTP API of bridge_server.py as an ASGI app.
+
+One event loop serves every connection, so there is no thread per request:
+long-polls and Server-Sent Events streams are coroutines waiting on an
+asyncio.Event that the recipient's queue sets when a message arrives, and
+an idle agent costs one suspended coroutine. State lives in the same
+per-agent MessageBroker as the Flask server (see broker.py). Broker calls
+that can write to the durable log (send, fetch, ack, registry changes,
+history) run in worker threads through asyncio.to_thread, so appends and
+meta.json saves never stall the loop; queue watchers wake coroutines with
+call_soon_threadsafe. No broker lock is held across an await.
+
+Endpoints, request bodies and responses match bridge_server.py.
+
+Run with: python bridge_asgi.py
+      or: uvicorn bridge_asgi:app --host 127.0.0.1 --port 5555
+Requires uvicorn (pip install uvicorn).
+"""
+
+import sys
+import json
+import asyncio
+from urllib.parse import parse_qs
+
+from broker import MessageBroker, ENDPOINTS, get_timestamp, format_event, cursor_args, ack_id
+from message_log import MessageLog
+from config import (
+    BRIDGE_HOST, BRIDGE_PORT, LONG_POLL_MAX_WAIT, SSE_KEEPALIVE,
+    LOG_DIR, LOG_SEGMENT_BYTES, LOG_RETENTION_BYTES, LOG_RETENTION_SECONDS,
+    LOG_FSYNC_INTERVAL, LOG_FSYNC_BATCH
+)
+
+# Per-agent message queues, restored from and persisted to the message log
+broker = MessageBroker(log=MessageLog(LOG_DIR, LOG_SEGMENT_BYTES, LOG_RETENTION_BYTES, LOG_RETENTION_SECONDS,
+                                      LOG_FSYNC_INTERVAL, LOG_FSYNC_BATCH))
+
+
+class HTTPError(Exception):
+    """A request error, answered with {"error": message} and the given status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_json(receive):
+    """The request body parsed as JSON, or None if it is empty or not JSON."""
+    body = b''
+    while True:
+        event = await receive()
+        body += event.get('body', b'')
+        if not event.get('more_body'):
+            break
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def query_args(scope):
+    """Query parameters, first value of each."""
+    return {key: values[0] for key, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+
+
+def header(scope, name):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def threadsafe_setter(event):
+    """Queue watcher that sets an asyncio.Event; puts happen in worker threads."""
+    loop = asyncio.get_running_loop()
+    return lambda: loop.call_soon_threadsafe(event.set)
+
+
+async def wait_until(queue, ready, timeout):
+    """Wait up to timeout seconds for ready() to become true, re-checking after each put."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    woken = asyncio.Event()
+    wake = threadsafe_setter(woken)
+    queue.watch(wake)
+    try:
+        while not ready():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            woken.clear()
+            try:
+                await asyncio.wait_for(woken.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+    finally:
+        queue.unwatch(wake)
+
+
+async def send_message(scope, receive, send):
+    data = await read_json(receive)
+    if not data:
+        raise HTTPError(400, "No JSON body provided")
+
+    message = await asyncio.to_thread(broker.send, data.get('from'), data.get('to'), data.get('content'))
+    await send_json(send, {
+        "status": "success",
+        "message_id": message["id"],
+        "timestamp": message["timestamp"]
+    })
+
+
+async def list_agents(scope, receive, send):
+    agents, topics = broker.registry()
+    await send_json(send, {
+        "agents": agents,
+        "topics": topics
+    })
+
+
+async def register_agent(scope, receive, send):
+    data = await read_json(receive)
+    if not data:
+        raise HTTPError(400, "No JSON body provided")
+
+    created = await asyncio.to_thread(broker.register, data.get('name'))
+    await send_json(send, {
+        "status": "success",
+        "agent": data['name'],
+        "created": created
+    })
+
+
+async def subscription_body(receive):
+    data = await read_json(receive)
+    if not data or not data.get('agent'):
+        raise HTTPError(400, "Missing 'agent' field")
+    return data['agent']
+
+
+async def subscribe(scope, receive, send, topic):
+    subscribers = await asyncio.to_thread(broker.subscribe, topic, await subscription_body(receive))
+    await send_json(send, {
+        "status": "success",
+        "topic": topic,
+        "subscribers": subscribers
+    })
+
+
+async def unsubscribe(scope, receive, send, topic):
+    subscribers = await asyncio.to_thread(broker.unsubscribe, topic, await subscription_body(receive))
+    await send_json(send, {
+        "status": "success",
+        "topic": topic,
+        "subscribers": subscribers
+    })
+
+
+async def get_messages(scope, receive, send, agent):
+    queue = broker.queue(agent)
+    args = query_args(scope)
+    since, limit = cursor_args(args)
+    clear_after = args.get('clear', 'false').lower() == 'true'
+    wait = min(float(args.get('wait', 0)), LONG_POLL_MAX_WAIT)
+
+    if wait > 0:
+        await wait_until(queue, lambda: queue.has_after(since), wait)
+    messages, remaining = await asyncio.to_thread(broker.fetch, agent, since, limit)
+    if clear_after and messages:
+        await asyncio.to_thread(broker.ack, agent, messages[-1]['id'])
+
+    await send_json(send, {
+        "agent": agent,
+        "messages": messages,
+        "count": len(messages),
+        "next": messages[-1]['id'] if messages else since,
+        "remaining": remaining
+    })
+
+
+async def ack_messages(scope, receive, send, agent):
+    upto = ack_id(await read_json(receive))
+    acknowledged = await asyncio.to_thread(broker.ack, agent, upto)
+    await send_json(send, {
+        "status": "success",
+        "acknowledged": acknowledged
+    })
+
+
+async def stream_messages(scope, receive, send, agent):
+    queue = broker.queue(agent)
+    try:
+        last_id = int(header(scope, b'last-event-id') or query_args(scope).get('since', 0))
+    except ValueError:
+        raise HTTPError(400, "Last-Event-ID and 'since' must be message ids")
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no')],
+    })
+
+    # A put or the client hanging up wakes the stream
+    woken = asyncio.Event()
+    disconnected = False
+
+    async def watch_disconnect():
+        nonlocal disconnected
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected = True
+        woken.set()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    wake = threadsafe_setter(woken)
+    queue.watch(wake)
+    try:
+        await send({'type': 'http.response.body', 'body': b': connected\n\n', 'more_body': True})
+        while not disconnected:
+            messages, _ = queue.fetch(last_id)
+            if messages:
+                body = ''.join(format_event(msg) for msg in messages)
+                await send({'type': 'http.response.body', 'body': body.encode('utf-8'), 'more_body': True})
+                last_id = messages[-1]['id']
+                continue
+
+            woken.clear()
+            try:
+                await asyncio.wait_for(woken.wait(), SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+    finally:
+        queue.unwatch(wake)
+        watcher.cancel()
+
+
+async def clear_messages(scope, receive, send, agent):
+    cleared = await asyncio.to_thread(broker.clear, agent)
+    await send_json(send, {
+        "status": "success",
+        "cleared_count": cleared
+    })
+
+
+async def get_status(scope, receive, send):
+    await send_json(send, {
+        "status": "running",
+        "queues": broker.status(),
+        "total_messages": broker.total_messages,
+        "timestamp": get_timestamp()
+    })
+
+
+async def get_history(scope, receive, send):
+    messages = await asyncio.to_thread(broker.recent, int(query_args(scope).get('limit', 100)))
+    await send_json(send, {
+        "messages": messages,
+        "count": len(messages)
+    })
+
+
+async def index(scope, receive, send):
+    await send_json(send, {
+        "name": "Agent Bridge Server",
+        "version": "1.0.0",
+        "endpoints": ENDPOINTS
+    })
+
+
+# (method, first path segment) -> (handler, whether it takes the agent or topic segment)
+ROUTES = {
+    ('POST', 'message'): (send_message, False),
+    ('GET', 'agents'): (list_agents, False),
+    ('POST', 'agents'): (register_agent, False),
+    ('POST', 'subscribe'): (subscribe, True),
+    ('POST', 'unsubscribe'): (unsubscribe, True),
+    ('GET', 'messages'): (get_messages, True),
+    ('POST', 'ack'): (ack_messages, True),
+    ('GET', 'stream'): (stream_messages, True),
+    ('POST', 'clear'): (clear_messages, True),
+    ('GET', 'status'): (get_status, False),
+    ('GET', 'history'): (get_history, False),
+    ('GET', ''): (index, False),
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        event = await receive()
+        if event['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif event['type'] == 'lifespan.shutdown':
+            broker.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    parts = scope['path'].strip('/').split('/')
+    route = ROUTES.get((scope['method'], parts[0]))
+    try:
+        if route is None and any(key[1] == parts[0] for key in ROUTES):
+            raise HTTPError(405, f"Method {scope['method']} not allowed")
+        if route is None or len(parts) != (2 if route[1] else 1):
+            raise HTTPError(404, "Not found")
+
+        handler, takes_name = route
+        if takes_name:
+            await handler(scope, receive, send, parts[1])
+        else:
+            await handler(scope, receive, send)
+
+    except HTTPError as e:
+        await send_json(send, {"error": str(e)}, e.status)
+    except ValueError as e:
+        await send_json(send, {"error": str(e)}, 400)
+    except Exception as e:
+        await send_json(send, {"error": str(e)}, 500)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("ERROR: uvicorn package not installed. Run: pip install uvicorn")
+        sys.exit(1)
+
+    print(f"Starting Agent Bridge Server (asyncio) on http://{BRIDGE_HOST}:{BRIDGE_PORT}")
+    print("Press Ctrl+C to stop")
+    uvicorn.run(app, host=BRIDGE_HOST, port=BRIDGE_PORT, log_level='warning', access_log=False)
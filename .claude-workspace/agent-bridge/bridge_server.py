@@ -1,45 +1,54 @@
 """
 Agent Bridge Server - HTTP API for bidirectional agent communication.
 
-Provides endpoints for Claude and GPT agents to exchange messages.
+Provides endpoints for agents (claude, gpt and any registered with
+POST /agents) to exchange messages directly or through topics, which fan a
+message out to every subscriber without copying it.
+Agents fetch by cursor (GET /messages/<agent>?since=<id>&limit=N) and
+acknowledge what they have processed (POST /ack/<agent>), and can poll,
+long-poll (GET /messages/<agent>?wait=30) or hold open a
+Server-Sent Events stream (GET /stream/<agent>); waiting readers sleep on
+their queue's condition variable and are woken the moment a message is
+queued for them. Queues and locks are per agent (see broker.py). Every
+message is appended to a durable log in LOG_DIR (see message_log.py), so a
+restart keeps undelivered messages and /history.
+
 Run with: python bridge_server.py
+For many concurrent agents, run the asyncio server instead: python bridge_asgi.py
 """
 
-import json
-import threading
-from datetime import datetime
-from collections import defaultdict
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 
-from config import BRIDGE_HOST, BRIDGE_PORT
+from broker import MessageBroker, ENDPOINTS, get_timestamp, format_event, cursor_args, ack_id
+from message_log import MessageLog
+from config import (
+    BRIDGE_HOST, BRIDGE_PORT, LONG_POLL_MAX_WAIT, SSE_KEEPALIVE,
+    LOG_DIR, LOG_SEGMENT_BYTES, LOG_RETENTION_BYTES, LOG_RETENTION_SECONDS,
+    LOG_FSYNC_INTERVAL, LOG_FSYNC_BATCH
+)
 
 app = Flask(__name__)
 
-# Thread-safe message queues for each agent
-message_queues = defaultdict(list)
-queue_lock = threading.Lock()
-
-# Message history for debugging
-message_history = []
-
-
-def get_timestamp():
-    """Get current timestamp in ISO format."""
-    return datetime.utcnow().isoformat() + "Z"
+# Per-agent message queues, restored from and persisted to the message log
+broker = MessageBroker(log=MessageLog(LOG_DIR, LOG_SEGMENT_BYTES, LOG_RETENTION_BYTES, LOG_RETENTION_SECONDS,
+                                      LOG_FSYNC_INTERVAL, LOG_FSYNC_BATCH))
 
 
 @app.route('/message', methods=['POST'])
 def send_message():
     """
-    Send a message from one agent to another.
+    Send a message from one agent to another agent or to a topic.
 
     Request body:
     {
-        "from": "claude" | "gpt",
-        "to": "claude" | "gpt",
+        "from": agent name,
+        "to": agent or topic name,
         "content": "message content"
     }
 
+    A topic message is queued for every subscriber except the sender,
+    stored once and shared by all of them; it carries a "recipients" list.
+
     Returns:
     {
         "status": "success",
@@ -53,49 +62,120 @@ def send_message():
         if not data:
             return jsonify({"error": "No JSON body provided"}), 400
 
-        sender = data.get('from')
-        recipient = data.get('to')
-        content = data.get('content')
-
-        # Validate required fields
-        if not sender:
-            return jsonify({"error": "Missing 'from' field"}), 400
-        if not recipient:
-            return jsonify({"error": "Missing 'to' field"}), 400
-        if not content:
-            return jsonify({"error": "Missing 'content' field"}), 400
-
-        # Validate agent names
-        valid_agents = ['claude', 'gpt']
-        if sender not in valid_agents:
-            return jsonify({"error": f"Invalid sender '{sender}'. Must be one of: {valid_agents}"}), 400
-        if recipient not in valid_agents:
-            return jsonify({"error": f"Invalid recipient '{recipient}'. Must be one of: {valid_agents}"}), 400
-
-        # Create message
-        with queue_lock:
-            message_id = len(message_history) + 1
-            message = {
-                "id": message_id,
-                "from": sender,
-                "to": recipient,
-                "content": content,
-                "timestamp": get_timestamp(),
-                "read": False
-            }
-
-            # Add to recipient's queue
-            message_queues[recipient].append(message)
-
-            # Add to history
-            message_history.append(message)
+        message = broker.send(data.get('from'), data.get('to'), data.get('content'))
 
         return jsonify({
             "status": "success",
-            "message_id": message_id,
+            "message_id": message["id"],
             "timestamp": message["timestamp"]
         })
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/agents', methods=['GET'])
+def list_agents():
+    """
+    List registered agents and topics.
+
+    Returns:
+    {
+        "agents": [str, ...],
+        "topics": {topic: [subscribed agent, ...]}
+    }
+    """
+    try:
+        agents, topics = broker.registry()
+
+        return jsonify({
+            "agents": agents,
+            "topics": topics
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/agents', methods=['POST'])
+def register_agent():
+    """
+    Register an agent so it can send and receive messages.
+
+    Request body:
+    {
+        "name": str   # 1-64 letters, digits, '_', '.' or '-'
+    }
+
+    Returns:
+    {
+        "status": "success",
+        "agent": str,
+        "created": bool   # false if it was already registered
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
+
+        if not data:
+            return jsonify({"error": "No JSON body provided"}), 400
+
+        created = broker.register(data.get('name'))
+
+        return jsonify({
+            "status": "success",
+            "agent": data['name'],
+            "created": created
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/subscribe/<topic>', methods=['POST'])
+@app.route('/unsubscribe/<topic>', methods=['POST'])
+def change_subscription(topic):
+    """
+    Subscribe an agent to a topic (created on first subscription), or unsubscribe it.
+
+    URL params:
+    - topic: topic name
+
+    Request body:
+    {
+        "agent": str
+    }
+
+    Returns:
+    {
+        "status": "success",
+        "topic": str,
+        "subscribers": [str, ...]
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
+
+        if not data or not data.get('agent'):
+            return jsonify({"error": "Missing 'agent' field"}), 400
+
+        if request.path.startswith('/subscribe/'):
+            subscribers = broker.subscribe(topic, data['agent'])
+        else:
+            subscribers = broker.unsubscribe(topic, data['agent'])
+
+        return jsonify({
+            "status": "success",
+            "topic": topic,
+            "subscribers": subscribers
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -106,52 +186,144 @@ def get_messages(agent):
     Get pending messages for an agent.
 
     URL params:
-    - agent: "claude" | "gpt"
+    - agent: a registered agent name
 
     Query params:
-    - clear: "true" to clear messages after retrieval (default: false)
+    - since: only return messages with an id above this (default: 0, all)
+    - limit: return at most this many messages (default: no limit)
+    - clear: "true" to acknowledge the returned messages at once (default: false)
+    - wait: seconds to block for a message newer than since if there is
+      none (default: 0, capped at LONG_POLL_MAX_WAIT); returns an empty list
+      on timeout
+
+    Messages stay pending until acknowledged (POST /ack/<agent> or clear),
+    so a consumer pages through with since=<next> and acknowledges what it
+    has processed; a consumer that crashes first gets them again.
 
     Returns:
     {
         "agent": str,
         "messages": [...],
-        "count": int
+        "count": int,
+        "next": int,       # id of the last message returned (since if none): the next cursor
+        "remaining": int   # pending messages after these, not returned because of limit
     }
     """
     try:
-        valid_agents = ['claude', 'gpt']
-        if agent not in valid_agents:
-            return jsonify({"error": f"Invalid agent '{agent}'. Must be one of: {valid_agents}"}), 400
+        queue = broker.queue(agent)
 
+        since, limit = cursor_args(request.args)
         clear_after = request.args.get('clear', 'false').lower() == 'true'
+        wait = min(float(request.args.get('wait', 0)), LONG_POLL_MAX_WAIT)
 
-        with queue_lock:
-            messages = list(message_queues[agent])
-
-            # Mark as read
-            for msg in message_queues[agent]:
-                msg['read'] = True
-
-            if clear_after:
-                message_queues[agent] = []
+        if wait > 0:
+            queue.wait_after(since, wait)
+        messages, remaining = broker.fetch(agent, since, limit)
+        if clear_after and messages:
+            broker.ack(agent, messages[-1]['id'])
 
         return jsonify({
             "agent": agent,
             "messages": messages,
-            "count": len(messages)
+            "count": len(messages),
+            "next": messages[-1]['id'] if messages else since,
+            "remaining": remaining
         })
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/ack/<agent>', methods=['POST'])
+def ack_messages(agent):
+    """
+    Acknowledge an agent's messages up to and including an id.
+
+    Acknowledged messages are trimmed from the queue and not delivered again,
+    even after a restart.
+
+    URL params:
+    - agent: a registered agent name
+
+    Request body:
+    {
+        "upto": int
+    }
+
+    Returns:
+    {
+        "status": "success",
+        "acknowledged": int
+    }
+    """
+    try:
+        acknowledged = broker.ack(agent, ack_id(request.get_json(silent=True)))
+
+        return jsonify({
+            "status": "success",
+            "acknowledged": acknowledged
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/stream/<agent>', methods=['GET'])
+def stream_messages(agent):
+    """
+    Stream an agent's messages as Server-Sent Events.
+
+    URL params:
+    - agent: a registered agent name
+
+    Sends every pending message, then each new one as soon as it is queued,
+    as an event with the message id and the message JSON as its data:
+        id: 7
+        event: message
+        data: {"id": 7, "from": "claude", ...}
+
+    A reconnecting client's Last-Event-ID header (or ?since=<id>) skips the
+    messages it already has. A comment line is sent every SSE_KEEPALIVE
+    seconds while idle so dead connections are noticed.
+    """
+    try:
+        queue = broker.queue(agent)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.args.get('since', 0))
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID and 'since' must be message ids"}), 400
+
+    def events(last_id):
+        yield ": connected\n\n"  # Flushes the response headers before the first wait
+        while True:
+            queue.wait_after(last_id, SSE_KEEPALIVE)
+            messages, _ = queue.fetch(last_id)
+
+            if not messages:
+                yield ": keepalive\n\n"
+                continue
+            for msg in messages:
+                yield format_event(msg)
+            last_id = messages[-1]['id']
+
+    return Response(stream_with_context(events(last_id)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/clear/<agent>', methods=['POST'])
 def clear_messages(agent):
     """
-    Clear all pending messages for an agent.
+    Clear (acknowledge) all pending messages for an agent.
 
     URL params:
-    - agent: "claude" | "gpt"
+    - agent: a registered agent name
 
     Returns:
     {
@@ -160,19 +332,15 @@ def clear_messages(agent):
     }
     """
     try:
-        valid_agents = ['claude', 'gpt']
-        if agent not in valid_agents:
-            return jsonify({"error": f"Invalid agent '{agent}'. Must be one of: {valid_agents}"}), 400
-
-        with queue_lock:
-            cleared_count = len(message_queues[agent])
-            message_queues[agent] = []
+        cleared_count = broker.clear(agent)
 
         return jsonify({
             "status": "success",
             "cleared_count": cleared_count
         })
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -186,28 +354,18 @@ def get_status():
     {
         "status": "running",
         "queues": {
-            "claude": {"pending": int, "unread": int},
-            "gpt": {"pending": int, "unread": int}
+            agent: {"pending": int, "unread": int},
+            ...
         },
         "total_messages": int,
         "timestamp": str
     }
     """
     try:
-        with queue_lock:
-            queues = {}
-            for agent in ['claude', 'gpt']:
-                messages = message_queues[agent]
-                unread = sum(1 for m in messages if not m.get('read', False))
-                queues[agent] = {
-                    "pending": len(messages),
-                    "unread": unread
-                }
-
         return jsonify({
             "status": "running",
-            "queues": queues,
-            "total_messages": len(message_history),
+            "queues": broker.status(),
+            "total_messages": broker.total_messages,
             "timestamp": get_timestamp()
         })
 
@@ -231,15 +389,15 @@ def get_history():
     """
     try:
         limit = int(request.args.get('limit', 100))
-
-        with queue_lock:
-            messages = list(message_history[-limit:])
+        messages = broker.recent(limit)
 
         return jsonify({
             "messages": messages,
             "count": len(messages)
         })
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -250,17 +408,14 @@ def index():
     return jsonify({
         "name": "Agent Bridge Server",
         "version": "1.0.0",
-        "endpoints": {
-            "POST /message": "Send a message between agents",
-            "GET /messages/<agent>": "Get pending messages for an agent",
-            "POST /clear/<agent>": "Clear messages for an agent",
-            "GET /status": "Get current queue status",
-            "GET /history": "Get full message history"
-        }
+        "endpoints": ENDPOINTS
     })
 
 
 if __name__ == '__main__':
     print(f"Starting Agent Bridge Server on http://{BRIDGE_HOST}:{BRIDGE_PORT}")
     print("Press Ctrl+C to stop")
-    app.run(host=BRIDGE_HOST, port=BRIDGE_PORT, debug=False, threaded=True)
+    try:
+        app.run(host=BRIDGE_HOST, port=BRIDGE_PORT, debug=False, threaded=True)
+    finally:
+        broker.close()
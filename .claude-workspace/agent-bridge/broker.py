@@ -0,0 +1,367 @@
+"""
+Message broker shared by the Flask (bridge_server.py) and asyncio (bridge_asgi.py) servers.
+
+Agents are registered at run time (claude and gpt always exist), and a
+message goes either to one agent or to a topic, which fans it out to every
+subscriber but the sender. A message is one dict, never modified once
+sent, that every recipient's queue holds by reference; the log and the
+history store it once however many agents receive it.
+
+Each agent has its own queue with its own lock, so readers of different
+agents never contend, and no lock is held for more than a list append or
+slice. With a MessageLog (message_log.py) every message is numbered and
+appended to the log under the log's lock, then queued, so ids, the log
+and every queue agree on order; acknowledgements and the registry of
+agents and topics are recorded in the log, and a restarted broker gets
+its unacknowledged messages back from it. Without a log, messages are
+numbered and queued under a send lock and the history is kept in memory.
+
+Consumers read with a cursor: fetch(agent, since, limit) returns only
+messages newer than the last id they have seen, and ack(agent, upto)
+trims everything up to an id, so the work per request scales with the new
+messages rather than the backlog.
+
+Readers wait in one of two ways:
+- threads (Flask) block on the queue's condition variable;
+- coroutines (ASGI) register a watcher callback, called after every put,
+  that sets an asyncio.Event.
+"""
+
+import re
+import json
+import bisect
+import threading
+import itertools
+from operator import itemgetter
+from datetime import datetime
+
+DEFAULT_AGENTS = ['claude', 'gpt']
+
+# Agent and topic names appear in URLs
+NAME_PATTERN = re.compile(r'[A-Za-z0-9_.-]{1,64}')
+
+message_id = itemgetter('id')
+
+# Served by GET / on both servers
+ENDPOINTS = {
+    "POST /message": "Send a message to an agent or a topic",
+    "GET /agents": "List registered agents and topic subscriptions",
+    "POST /agents": "Register an agent",
+    "POST /subscribe/<topic>": "Subscribe an agent to a topic",
+    "POST /unsubscribe/<topic>": "Unsubscribe an agent from a topic",
+    "GET /messages/<agent>": "Get pending messages for an agent (?since=ID&limit=N to page, ?wait=N to long-poll)",
+    "POST /ack/<agent>": "Acknowledge an agent's messages up to an id",
+    "GET /stream/<agent>": "Server-Sent Events stream of an agent's messages",
+    "POST /clear/<agent>": "Acknowledge all of an agent's pending messages",
+    "GET /status": "Get current queue status",
+    "GET /history": "Get full message history"
+}
+
+
+def get_timestamp():
+    """Get current timestamp in ISO format."""
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def cursor_args(args):
+    """(since, limit) from GET /messages query params; raises ValueError if they are not ids/counts."""
+    try:
+        since = int(args.get('since', 0))
+        limit = int(args['limit']) if args.get('limit') else None
+    except ValueError:
+        raise ValueError("'since' must be a message id and 'limit' a number of messages")
+    if since < 0 or (limit is not None and limit <= 0):
+        raise ValueError("'since' must be >= 0 and 'limit' > 0")
+    return since, limit
+
+
+def ack_id(data):
+    """The id in a POST /ack body; raises ValueError if it is missing or not an id."""
+    if not data or 'upto' not in data:
+        raise ValueError("Missing 'upto' field")
+    upto = data['upto']
+    if not isinstance(upto, int) or isinstance(upto, bool) or upto < 0:
+        raise ValueError("'upto' must be a message id")
+    return upto
+
+
+def format_event(message):
+    """One message as a Server-Sent Event."""
+    return f"id: {message['id']}\nevent: message\ndata: {json.dumps(message)}\n\n"
+
+
+class AgentQueue:
+    """Unacknowledged messages of one agent, oldest first.
+
+    Messages are never modified once queued. Consumers fetch by cursor (the
+    last id they have seen) and acknowledge up to an id; acknowledged
+    messages are trimmed by moving the head index, and the list is compacted
+    once the head passes half its length, so both cost O(1) amortized plus
+    a binary search. A message stays queued until it is acknowledged, so
+    a consumer that dies before acknowledging gets it again (at-least-once).
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.head = 0  # messages[:head] are acknowledged, awaiting compaction
+        self.delivered = 0  # Highest id handed to a reader; later ones count as unread
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.watchers = set()
+
+    def put(self, message):
+        """Queue a message; callers put messages in id order."""
+        with self.lock:
+            self.messages.append(message)
+            self.condition.notify_all()
+            watchers = list(self.watchers)
+        for watcher in watchers:
+            watcher()
+
+    def watch(self, callback):
+        """Call callback (with no arguments) after every put until unwatch()."""
+        with self.lock:
+            self.watchers.add(callback)
+
+    def unwatch(self, callback):
+        with self.lock:
+            self.watchers.discard(callback)
+
+    def _position(self, last_id):
+        """Index of the first pending message with an id above last_id."""
+        return bisect.bisect_right(self.messages, last_id, lo=self.head, key=message_id)
+
+    def fetch(self, since=0, limit=None):
+        """Up to limit pending messages with an id above since; (messages, how many more remain)."""
+        with self.lock:
+            start = self._position(since)
+            end = len(self.messages) if limit is None else min(start + limit, len(self.messages))
+            messages = self.messages[start:end]
+            if messages:
+                self.delivered = max(self.delivered, messages[-1]['id'])
+            return messages, len(self.messages) - end
+
+    def has_after(self, last_id):
+        with self.lock:
+            return len(self.messages) > self.head and self.messages[-1]['id'] > last_id
+
+    def wait_after(self, last_id, timeout):
+        """Block the calling thread until a message newer than last_id is pending or timeout passes."""
+        with self.lock:
+            self.condition.wait_for(
+                lambda: len(self.messages) > self.head and self.messages[-1]['id'] > last_id, timeout=timeout)
+
+    def ack(self, upto):
+        """Trim every pending message with an id up to upto; returns how many were removed."""
+        with self.lock:
+            position = self._position(upto)
+            removed = position - self.head
+            self.head = position
+            if self.head > len(self.messages) // 2:
+                del self.messages[:self.head]
+                self.head = 0
+            return removed
+
+    def last_id(self):
+        """Id of the newest pending message, or None."""
+        with self.lock:
+            return self.messages[-1]['id'] if len(self.messages) > self.head else None
+
+    def counts(self):
+        """(pending, unread): unread messages have not been fetched by any reader yet."""
+        with self.lock:
+            return len(self.messages) - self.head, len(self.messages) - self._position(self.delivered)
+
+
+class MessageBroker:
+    """Per-agent queues, topics and the message history, optionally backed by a MessageLog."""
+
+    def __init__(self, agents=DEFAULT_AGENTS, log=None):
+        self.queues = {}
+        self.topics = {}  # topic -> set of subscribed agents
+        self.log = log
+        self.history = []
+        self._ids = itertools.count(1)
+        self._send_lock = threading.Lock()
+        self._registry_lock = threading.Lock()
+        self._dropped_through = 0
+
+        saved_agents, saved_topics = log.registry() if log is not None else ([], {})
+        for agent in list(agents) + saved_agents:
+            self.queues.setdefault(agent, AgentQueue())
+        self.topics = {topic: set(subscribers) for topic, subscribers in saved_topics.items()}
+
+        if log is not None:
+            for message, recipients in log.pending(list(self.queues)):
+                for agent in recipients:
+                    if agent in self.queues:
+                        self.queues[agent].messages.append(message)
+            self._apply_retention()
+
+    @property
+    def agents(self):
+        with self._registry_lock:
+            return list(self.queues)
+
+    def queue(self, agent, role='agent'):
+        """The queue of a registered agent; raises ValueError naming the role otherwise."""
+        if not isinstance(agent, str) or agent not in self.queues:
+            raise ValueError(f"Unknown {role} '{agent}'. Registered agents: {self.agents}")
+        return self.queues[agent]
+
+    def _save_registry(self):
+        """Persist agents and topics; call with self._registry_lock held."""
+        if self.log is not None:
+            self.log.save_registry(list(self.queues), {topic: sorted(subscribers)
+                                                 for topic, subscribers in self.topics.items()})
+
+    def register(self, agent):
+        """Register an agent; returns False if it already was. Raises ValueError for a bad name."""
+        if not agent:
+            raise ValueError("Missing 'name' field")
+        if not isinstance(agent, str) or not NAME_PATTERN.fullmatch(agent):
+            raise ValueError("Agent names are 1-64 letters, digits, '_', '.' or '-'")
+        with self._registry_lock:
+            if agent in self.topics:
+                raise ValueError(f"'{agent}' is already a topic")
+            if agent in self.queues:
+                return False
+            self.queues[agent] = AgentQueue()
+            self._save_registry()
+        return True
+
+    def subscribe(self, topic, agent):
+        """Subscribe a registered agent to a topic, creating the topic; returns its subscribers."""
+        if not NAME_PATTERN.fullmatch(topic):
+            raise ValueError("Topic names are 1-64 letters, digits, '_', '.' or '-'")
+        self.queue(agent)
+        with self._registry_lock:
+            if topic in self.queues:
+                raise ValueError(f"'{topic}' is already an agent")
+            subscribers = self.topics.setdefault(topic, set())
+            if agent not in subscribers:
+                subscribers.add(agent)
+                self._save_registry()
+            return sorted(subscribers)
+
+    def unsubscribe(self, topic, agent):
+        """Unsubscribe an agent from a topic; returns the remaining subscribers."""
+        with self._registry_lock:
+            if topic not in self.topics:
+                raise ValueError(f"Unknown topic '{topic}'")
+            subscribers = self.topics[topic]
+            if agent in subscribers:
+                subscribers.discard(agent)
+                self._save_registry()
+            return sorted(subscribers)
+
+    def registry(self):
+        """(agents, {topic: subscribers}) for GET /agents."""
+        with self._registry_lock:
+            return list(self.queues), {topic: sorted(subscribers) for topic, subscribers in self.topics.items()}
+
+    def send(self, sender, recipient, content):
+        """Validate and queue a message for an agent or a topic's subscribers; returns it.
+
+        Raises ValueError for a bad request. A topic message lists the agents
+        it went to under "recipients"; all of them share the one message.
+        """
+        if not sender:
+            raise ValueError("Missing 'from' field")
+        if not recipient:
+            raise ValueError("Missing 'to' field")
+        if not content:
+            raise ValueError("Missing 'content' field")
+        if not isinstance(recipient, str):
+            raise ValueError("'to' must be an agent or topic name")
+        self.queue(sender, 'sender')
+
+        message = {
+            "id": None,
+            "from": sender,
+            "to": recipient,
+            "content": content,
+            "timestamp": get_timestamp()
+        }
+        with self._registry_lock:
+            subscribers = self.topics.get(recipient)
+            if subscribers is not None:
+                recipients = sorted(subscribers - {sender})
+                message["recipients"] = recipients
+        if subscribers is None:
+            self.queue(recipient, 'recipient')
+            recipients = [recipient]
+        queues = [self.queues[agent] for agent in recipients]
+
+        if self.log is None:
+            with self._send_lock:
+                message["id"] = next(self._ids)
+                for queue in queues:
+                    queue.put(message)
+                self.history.append(message)
+            return message
+
+        with self.log.lock:
+            self.log.append(message)
+            for queue in queues:
+                queue.put(message)
+        self._apply_retention()
+        return message
+
+    def _apply_retention(self):
+        """Forget pending messages whose log segments retention has deleted."""
+        dropped_through = self.log.dropped_through
+        if dropped_through > self._dropped_through:
+            self._dropped_through = dropped_through
+            with self._registry_lock:
+                queues = list(self.queues.values())
+            for queue in queues:
+                queue.ack(dropped_through)
+
+    def fetch(self, agent, since=0, limit=None):
+        """Up to limit of an agent's pending messages newer than since; (messages, remaining)."""
+        if self.log is not None:
+            self._apply_retention()
+        return self.queue(agent).fetch(since, limit)
+
+    def ack(self, agent, upto):
+        """Acknowledge an agent's messages up to id upto; returns how many were trimmed.
+
+        upto is clamped to the newest id sent, so a consumer cannot
+        acknowledge messages that do not exist yet.
+        """
+        upto = min(upto, self.total_messages)
+        removed = self.queue(agent).ack(upto)
+        if self.log is not None:
+            self.log.ack(agent, upto)
+        return removed
+
+    def clear(self, agent):
+        """Acknowledge all of an agent's pending messages; returns how many there were."""
+        last_id = self.queue(agent).last_id()
+        return self.ack(agent, last_id) if last_id is not None else 0
+
+    def recent(self, limit):
+        """The last limit messages of the history."""
+        if limit <= 0:
+            return []
+        if self.log is not None:
+            return self.log.recent(limit)
+        return self.history[-limit:]
+
+    @property
+    def total_messages(self):
+        return self.log.last_id if self.log is not None else len(self.history)
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+
+    def status(self):
+        with self._registry_lock:
+            items = list(self.queues.items())
+        queues = {}
+        for agent, queue in items:
+            pending, unread = queue.counts()
+            queues[agent] = {"pending": pending, "unread": unread}
+        return queues
@@ -2,11 +2,26 @@
 Configuration for the Agent Bridge system.
 """
 
+import os
+
 # Server configuration
 BRIDGE_HOST = "127.0.0.1"
 BRIDGE_PORT = 5555
 BRIDGE_URL = f"http://{BRIDGE_HOST}:{BRIDGE_PORT}"
 
+# Longest a GET /messages/<agent>?wait=N long-poll may block (seconds)
+LONG_POLL_MAX_WAIT = 60
+# Idle interval between keepalive comments on a /stream/<agent> connection (seconds)
+SSE_KEEPALIVE = 15
+
+# Durable message log (see message_log.py)
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "message_log")
+LOG_SEGMENT_BYTES = 8 * 1024 * 1024  # Start a new segment past this size
+LOG_RETENTION_BYTES = 256 * 1024 * 1024  # Delete the oldest segments past this total
+LOG_RETENTION_SECONDS = 7 * 24 * 3600  # ... or once they are this old
+LOG_FSYNC_INTERVAL = 0.05  # Longest a message stays unsynced (seconds)
+LOG_FSYNC_BATCH = 256  # Sync sooner once this many messages are unsynced
+
 # Model configurations
 MODELS = {
     "gpt": "gpt-4",
@@ -0,0 +1,363 @@
+"""
+Durable, segmented append-only log of bridge messages.
+
+Layout of the log directory:
+    <first id:020d>.log   records: uint32 length, uint32 CRC-32, message JSON
+    <first id:020d>.idx   one INDEX_ENTRY per record: id, offset, length, recipient code
+    meta.json             {"agents": [name, ...], "acked": {name: id},
+                           "registry": {"agents": [name, ...], "topics": {topic: [name, ...]}}}
+
+A recipient code is the index of the message's "to" (an agent or a topic)
+in meta["agents"]. A message fanned out to a topic is stored once, with
+its "recipients" list inside the record, and FANOUT is set in its code.
+
+Appends go straight to the files with os.write, so readers see them at
+once; a flusher thread fsyncs every fsync_interval seconds, or sooner
+after fsync_batch unsynced messages, so a crash loses at most that window.
+A new segment starts once the active one passes segment_bytes, and
+sealed segments are deleted, oldest first, once the log is larger than
+retention_bytes or a segment is older than retention_seconds. The flusher
+also checks segment age, rolling an active segment left idle that long.
+
+Each agent's acknowledgement (the id up to which it has processed its queue)
+is kept in meta.json, written by the flusher. On startup the log trims a
+torn tail, then rebuilds the pending queues: only segments that still
+hold unacknowledged messages are looked at, direct messages are skipped
+from the index alone, and each remaining record is read once however
+many agents it went to. /history reads records through mmap, so no
+history is kept in memory.
+"""
+
+import os
+import json
+import mmap
+import zlib
+import time
+import struct
+import threading
+
+RECORD_HEADER = struct.Struct('<II')  # payload length, CRC-32 of the payload
+INDEX_ENTRY = struct.Struct('<QIIH')  # message id, record offset, record length, recipient code
+FANOUT = 0x8000  # Recipient code flag: the record lists its recipients
+
+
+class Segment:
+    """One .log/.idx pair; written through fds while active, read through mmap."""
+
+    def __init__(self, directory, base_id):
+        self.base_id = base_id
+        self.log_path = os.path.join(directory, f"{base_id:020d}.log")
+        self.idx_path = os.path.join(directory, f"{base_id:020d}.idx")
+        self.log_fd = self.idx_fd = None
+        self._maps = {}
+        self.size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        self.count = os.path.getsize(self.idx_path) // INDEX_ENTRY.size if os.path.exists(self.idx_path) else 0
+        self.last_id = self.entry(self.count - 1)[0] if self.count else base_id - 1
+
+    def _view(self, path, end):
+        """A read-only mapping of path covering at least end bytes, remapped as the file grows."""
+        current = self._maps.get(path)
+        if current is None or len(current) < end:
+            if current is not None:
+                current.close()
+            with open(path, 'rb') as f:
+                current = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[path] = current
+        return current
+
+    def entry(self, i):
+        """(id, offset, length, recipient code) of the i-th record."""
+        start = i * INDEX_ENTRY.size
+        return INDEX_ENTRY.unpack_from(self._view(self.idx_path, start + INDEX_ENTRY.size), start)
+
+    def entries(self, start=0):
+        view = self._view(self.idx_path, self.count * INDEX_ENTRY.size) if self.count else b''
+        return INDEX_ENTRY.iter_unpack(view[start * INDEX_ENTRY.size:self.count * INDEX_ENTRY.size])
+
+    def read(self, offset, length):
+        """The message stored in the record at offset."""
+        view = self._view(self.log_path, offset + length)
+        return json.loads(view[offset + RECORD_HEADER.size:offset + length])
+
+    def open_for_append(self):
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        self.log_fd = os.open(self.log_path, flags, 0o644)
+        self.idx_fd = os.open(self.idx_path, flags, 0o644)
+
+    def append(self, message_id, code, payload):
+        record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        os.write(self.log_fd, record)
+        os.write(self.idx_fd, INDEX_ENTRY.pack(message_id, self.size, len(record), code))
+        self.size += len(record)
+        self.count += 1
+        self.last_id = message_id
+
+    def sync(self):
+        os.fsync(self.log_fd)
+        os.fsync(self.idx_fd)
+
+    def seal(self):
+        """Sync and close the write fds; the segment stays readable."""
+        self.sync()
+        os.close(self.log_fd)
+        os.close(self.idx_fd)
+        self.log_fd = self.idx_fd = None
+
+    def close(self):
+        for view in self._maps.values():
+            view.close()
+        self._maps = {}
+
+    def delete(self):
+        self.close()
+        os.remove(self.log_path)
+        os.remove(self.idx_path)
+
+    def recover(self, record_code):
+        """Make the index and log agree after a crash: drop torn records, index unindexed ones.
+
+        record_code maps a message to its recipient code, for records the index missed.
+        """
+        with open(self.idx_path, 'ab') as f:
+            f.truncate(self.count * INDEX_ENTRY.size)
+        while self.count and sum(self.entry(self.count - 1)[1:3]) > self.size:
+            self.count -= 1
+        self.close()
+        with open(self.idx_path, 'ab') as f:
+            f.truncate(self.count * INDEX_ENTRY.size)
+
+        offset = sum(self.entry(self.count - 1)[1:3]) if self.count else 0
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+        self.close()
+
+        new_entries = []
+        position = 0
+        while position + RECORD_HEADER.size <= len(tail):
+            length, crc = RECORD_HEADER.unpack_from(tail, position)
+            payload = tail[position + RECORD_HEADER.size:position + RECORD_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            message = json.loads(payload)
+            new_entries.append(INDEX_ENTRY.pack(message['id'], offset + position,
+                                                RECORD_HEADER.size + length, record_code(message)))
+            position += RECORD_HEADER.size + length
+
+        with open(self.log_path, 'ab') as f:
+            f.truncate(offset + position)
+        with open(self.idx_path, 'ab') as f:
+            f.write(b''.join(new_entries))
+        self.size = offset + position
+        self.count += len(new_entries)
+        self.last_id = self.entry(self.count - 1)[0] if self.count else self.base_id - 1
+
+
+class MessageLog:
+    """Append-only message log with per-agent acknowledgements; see the module docstring.
+
+    append() must be called with self.lock held, so that callers can queue
+    the message in id order under the same lock.
+    """
+
+    def __init__(self, directory, segment_bytes, retention_bytes, retention_seconds,
+                 fsync_interval, fsync_batch):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.retention_bytes = retention_bytes
+        self.retention_seconds = retention_seconds
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+
+        self.lock = threading.Lock()
+        self.meta_path = os.path.join(directory, 'meta.json')
+        # Highest id whose segment retention has deleted
+        self.dropped_through = 0
+
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.meta_path) as f:
+                self.meta = json.load(f)
+        except (OSError, ValueError):
+            self.meta = {'agents': [], 'acked': {}}
+        self._meta_dirty = False
+
+        base_ids = sorted(int(name[:-4]) for name in os.listdir(directory) if name.endswith('.log'))
+        self.segments = [Segment(directory, base_id) for base_id in base_ids]
+        if self.segments:
+            self.segments[-1].recover(self.record_code)
+        else:
+            self.segments.append(Segment(directory, 1))
+        self.active.open_for_append()
+        self._enforce_retention()
+
+        self._unsynced = 0
+        self._closed = False
+        self._sync_wanted = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    @property
+    def active(self):
+        return self.segments[-1]
+
+    @property
+    def last_id(self):
+        return self.active.last_id if self.active.count else self.active.base_id - 1
+
+    def agent_code(self, agent):
+        """Small integer standing for a recipient (agent or topic) in the index."""
+        agents = self.meta['agents']
+        if agent not in agents:
+            if len(agents) >= FANOUT:
+                raise ValueError("Too many agents and topics for the message log")
+            agents.append(agent)
+            self._save_meta()
+        return agents.index(agent)
+
+    def record_code(self, message):
+        code = self.agent_code(message['to'])
+        return code | FANOUT if 'recipients' in message else code
+
+    def registry(self):
+        """(agents, {topic: subscribers}) as last saved by save_registry()."""
+        registry = self.meta.get('registry', {})
+        return registry.get('agents', []), registry.get('topics', {})
+
+    def save_registry(self, agents, topics):
+        """Durably record the registered agents and topic subscriptions."""
+        with self.lock:
+            self.meta['registry'] = {'agents': agents, 'topics': topics}
+            self._save_meta()
+
+    def append(self, message):
+        """Number a message with the next id and append it. Call with self.lock held."""
+        message['id'] = self.last_id + 1
+        payload = json.dumps(message).encode('utf-8')
+        self.active.append(message['id'], self.record_code(message), payload)
+
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_batch:
+            self._sync_wanted.set()
+        if self.active.size >= self.segment_bytes:
+            self._roll()
+
+    def _roll(self):
+        self.active.seal()
+        self.segments.append(Segment(self.directory, self.last_id + 1))
+        self.active.open_for_append()
+        self._unsynced = 0
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        """Delete the oldest sealed segments while the log is too large or they are too old."""
+        total = sum(segment.size for segment in self.segments)
+        now = time.time()
+        while len(self.segments) > 1:
+            oldest = self.segments[0]
+            too_old = now - os.path.getmtime(oldest.log_path) > self.retention_seconds
+            if total <= self.retention_bytes and not too_old:
+                break
+            total -= oldest.size
+            self.dropped_through = max(self.dropped_through, oldest.last_id)
+            oldest.delete()
+            self.segments.pop(0)
+
+    def ack(self, agent, upto):
+        """Record that an agent is done with every message up to id upto (saved by the flusher)."""
+        with self.lock:
+            if upto > self.meta['acked'].get(agent, 0):
+                self.meta['acked'][agent] = upto
+                self._meta_dirty = True
+
+    def acked(self, agent):
+        return self.meta['acked'].get(agent, 0)
+
+    def pending(self, agents):
+        """(message, recipients) for every stored message some of the given agents
+        have not acknowledged, oldest first; recipients are those agents."""
+        names = self.meta['agents']
+        acked = [self.acked(name) for name in names]
+        floor = min((self.acked(agent) for agent in agents), default=0)
+        for segment in self.segments:
+            if segment.last_id <= floor:
+                continue
+            for message_id, offset, length, code in segment.entries():
+                if code & FANOUT:
+                    if message_id <= floor:
+                        continue
+                    message = segment.read(offset, length)
+                    recipients = [agent for agent in message['recipients'] if message_id > self.acked(agent)]
+                    if recipients:
+                        yield message, recipients
+                elif message_id > acked[code]:
+                    yield segment.read(offset, length), [names[code]]
+
+    def recent(self, limit):
+        """The last limit messages, oldest first."""
+        messages = []
+        with self.lock:
+            for segment in reversed(self.segments):
+                take = min(limit - len(messages), segment.count)
+                for i in range(segment.count - 1, segment.count - 1 - take, -1):
+                    _, offset, length, _ = segment.entry(i)
+                    messages.append(segment.read(offset, length))
+                if len(messages) >= limit:
+                    break
+        messages.reverse()
+        return messages
+
+    def _save_meta(self):
+        """Write meta.json. Call with self.lock held, so the snapshot is consistent."""
+        snapshot = json.dumps(self.meta)
+        self._meta_dirty = False
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    def _expire(self):
+        """Apply age-based retention between rolls. Call with self.lock held.
+
+        An active segment nobody has written to for retention_seconds is
+        rolled, so that it is sealed and can be dropped like any other.
+        """
+        active = self.active
+        if active.count and time.time() - os.path.getmtime(active.log_path) > self.retention_seconds:
+            self._roll()
+        else:
+            self._enforce_retention()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._sync_wanted.wait(self.fsync_interval)
+            self._sync_wanted.clear()
+            self.flush()
+            with self.lock:
+                self._expire()
+
+    def flush(self):
+        """fsync the active segment and save acknowledgements, if anything changed."""
+        with self.lock:
+            segment = self.active if self._unsynced else None
+            self._unsynced = 0
+            if self._meta_dirty:
+                self._save_meta()
+        if segment is not None:
+            try:
+                segment.sync()
+            except (OSError, TypeError):
+                pass  # Sealed (and synced) by a roll in the meantime
+
+    def close(self):
+        self._closed = True
+        self._sync_wanted.set()
+        self._flusher.join()
+        with self.lock:
+            self.active.seal()
+            if self._meta_dirty:
+                self._save_meta()
+            for segment in self.segments:
+                segment.close()
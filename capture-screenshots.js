@@ -38,6 +38,9 @@ const MODEL_FILES = [
     'Voinian Heavy Fighter.glb'
 ];
 
+// Models named on the command line (with or without .glb); all of them if none
+const SELECTED = process.argv.slice(2).map(name => name.endsWith('.glb') ? name : `${name}.glb`);
+
 const PROJECT_DIR = __dirname;
 const OUTPUT_DIR = path.join(PROJECT_DIR, 'evo_assets', 'game_renders');
 const PORT = 8765;
@@ -87,6 +90,14 @@ function startServer() {
 }
 
 async function captureScreenshots() {
+    const unknown = SELECTED.filter(file => !MODEL_FILES.includes(file));
+    if (unknown.length > 0) {
+        throw new Error(`Unknown models: ${unknown.join(', ')}`);
+    }
+    // Indices into MODEL_FILES, which is also the viewer's model list
+    const indices = MODEL_FILES.map((file, i) => i)
+        .filter(i => SELECTED.length === 0 || SELECTED.includes(MODEL_FILES[i]));
+
     console.log('Starting screenshot capture...');
     console.log(`Output directory: ${OUTPUT_DIR}`);
 
@@ -142,13 +153,13 @@ async function captureScreenshots() {
     await page.waitForFunction(() => window.modelReady === true, { timeout: 30000 });
     await sleep(1000);
 
-    console.log(`\nCapturing ${MODEL_FILES.length} models...\n`);
+    console.log(`\nCapturing ${indices.length} models...\n`);
 
-    for (let i = 0; i < MODEL_FILES.length; i++) {
+    for (const [n, i] of indices.entries()) {
         const modelName = MODEL_FILES[i].replace('.glb', '');
         const outputPath = path.join(OUTPUT_DIR, `${modelName}.png`);
 
-        console.log(`[${i + 1}/${MODEL_FILES.length}] Capturing: ${modelName}`);
+        console.log(`[${n + 1}/${indices.length}] Capturing: ${modelName}`);
 
         // Load the model
         await page.evaluate((index) => {
@@ -174,6 +185,7 @@ async function captureScreenshots() {
             console.log(`   Saved: ${modelName}.png (${stats.size} bytes)`);
         } else {
             console.error(`   ERROR: Canvas not found for ${modelName}`);
+            process.exitCode = 1;
         }
     }
 
@@ -181,7 +193,7 @@ async function captureScreenshots() {
     server.close();
 
     console.log('\n=== Screenshot Capture Complete ===');
-    console.log(`Total models captured: ${MODEL_FILES.length}`);
+    console.log(`Total models captured: ${indices.length}`);
     console.log(`Output directory: ${OUTPUT_DIR}`);
 
     // List output files with sizes
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Compare Blender reference renders against in-game GLB renders, without a browser.
+
+Loads reference_renders/<ship>.png and game_renders/<ship>.png in parallel,
+aligns each pair on their silhouettes (crop to the silhouette bounding box,
+scale the game crop uniformly to fit the reference box and centre it there)
+and computes:
+- mean / 95th percentile per-pixel colour delta
+- silhouette IoU
+- SSIM on luminance
+
+Game renders are opaque captures on the viewer's clear colour, so their
+silhouette is keyed out of that background colour; renders that already
+carry transparency are used as they are.
+
+Writes a heatmap diff image per ship plus summary.json and summary.html into
+comparison_screenshots/, or the directory given with --output. With --ships only those ships are compared and
+their results replace theirs in the existing summary, so a rebuild of one
+ship does not re-compare the rest. Requires NumPy and Pillow.
+
+Usage:
+    python compare_renders.py
+    python compare_renders.py --jobs 8
+    python compare_renders.py --ships Krait "UE Fighter"
+    python compare_renders.py --output /tmp/comparison
+"""
+
+import os
+import sys
+import json
+import html
+import argparse
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    print("ERROR: numpy and pillow are required. Run: pip install numpy pillow")
+    sys.exit(1)
+
+from postprocess_renders import EVO_ASSETS_DIR, load_rgba, alpha_bbox
+
+REFERENCE_DIR = os.path.join(EVO_ASSETS_DIR, 'reference_renders')
+GAME_DIR = os.path.join(EVO_ASSETS_DIR, 'game_renders')
+OUTPUT_DIR = os.path.join(EVO_ASSETS_DIR, 'comparison_screenshots')
+
+ALPHA_THRESHOLD = 128  # Alpha at or above this counts as inside the silhouette
+GAME_BACKGROUND = (0x0a, 0x0a, 0x1a)  # model-viewer.html clear colour
+BACKGROUND_TOLERANCE = 8  # Max per-channel distance from GAME_BACKGROUND keyed out as background
+SSIM_WINDOW = 7
+# A pair below either threshold is reported as a mismatch
+IOU_THRESHOLD = 0.90
+SSIM_THRESHOLD = 0.70
+
+
+def box_mean(a, k):
+    """Mean over a k x k window centred on every pixel, via an integral image."""
+    pad = k // 2
+    padded = np.pad(a, pad, mode='reflect')
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+    integral[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+    sums = integral[k:, k:] - integral[:-k, k:] - integral[k:, :-k] + integral[:-k, :-k]
+    return sums / (k * k)
+
+
+def ssim(x, y, k=SSIM_WINDOW):
+    """Mean structural similarity of two equally sized greyscale images (0-255 floats)."""
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+
+    mu_x = box_mean(x, k)
+    mu_y = box_mean(y, k)
+    var_x = box_mean(x * x, k) - mu_x ** 2
+    var_y = box_mean(y * y, k) - mu_y ** 2
+    cov = box_mean(x * y, k) - mu_x * mu_y
+
+    ssim_map = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / ((mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2))
+    return float(ssim_map.mean())
+
+
+def key_background(rgba, background=GAME_BACKGROUND, tolerance=BACKGROUND_TOLERANCE):
+    """Make pixels within `tolerance` of the background colour transparent.
+
+    Images that already have transparent pixels are returned unchanged.
+    """
+    if (rgba[..., 3] < 255).any():
+        return rgba
+    distance = np.abs(rgba[..., :3].astype(np.int16) - np.array(background, dtype=np.int16)).max(axis=2)
+    keyed = rgba.copy()
+    keyed[..., 3] = np.where(distance <= tolerance, 0, 255)
+    return keyed
+
+
+def align_to_reference(reference, game):
+    """Crop both images to their silhouettes and fit the game crop into the reference crop.
+
+    The game crop keeps its aspect ratio: it is scaled by the smaller of the
+    two box ratios and centred on a transparent canvas of the reference size.
+    """
+    ref_box = alpha_bbox(reference)
+    game_box = alpha_bbox(game)
+    if ref_box is None or game_box is None:
+        return None, None
+
+    x0, y0, x1, y1 = ref_box
+    ref_crop = reference[y0:y1, x0:x1]
+
+    width, height = x1 - x0, y1 - y0
+    gx0, gy0, gx1, gy1 = game_box
+    scale = min(width / (gx1 - gx0), height / (gy1 - gy0))
+    size = (max(1, min(width, round((gx1 - gx0) * scale))), max(1, min(height, round((gy1 - gy0) * scale))))
+    game_crop = Image.fromarray(game[gy0:gy1, gx0:gx1], 'RGBA').resize(size, Image.Resampling.LANCZOS)
+
+    canvas = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    canvas.paste(game_crop, ((width - size[0]) // 2, (height - size[1]) // 2))
+    return ref_crop, np.asarray(canvas)
+
+
+def heatmap(delta, silhouette_xor):
+    """Colour a 0-1 delta map black -> red -> yellow, with silhouette mismatches in magenta."""
+    rgb = np.zeros(delta.shape + (3,), dtype=np.float32)
+    rgb[..., 0] = np.clip(delta * 2, 0, 1)
+    rgb[..., 1] = np.clip(delta * 2 - 1, 0, 1)
+    rgb[silhouette_xor] = (1.0, 0.0, 1.0)
+    return (rgb * 255).astype(np.uint8)
+
+
+def compare_pair(name, output_dir=OUTPUT_DIR):
+    """Compare one ship's reference and game renders, writing its diff image to output_dir.
+
+    Returns its result dict.
+    """
+    reference_path = os.path.join(REFERENCE_DIR, name + '.png')
+    game_path = os.path.join(GAME_DIR, name + '.png')
+
+    missing = [p for p in (reference_path, game_path) if not os.path.exists(p)]
+    if missing:
+        return {'name': name, 'status': 'missing', 'missing': [os.path.relpath(p, EVO_ASSETS_DIR) for p in missing]}
+
+    ref, game = align_to_reference(load_rgba(reference_path), key_background(load_rgba(game_path)))
+    if ref is None:
+        return {'name': name, 'status': 'empty'}
+
+    ref = ref.astype(np.float32)
+    game = game.astype(np.float32)
+
+    ref_mask = ref[..., 3] >= ALPHA_THRESHOLD
+    game_mask = game[..., 3] >= ALPHA_THRESHOLD
+    union = ref_mask | game_mask
+    iou = float((ref_mask & game_mask).sum() / max(union.sum(), 1))
+
+    # Composite over black so colour deltas outside a silhouette count fully
+    ref_rgb = ref[..., :3] * (ref[..., 3:4] / 255.0)
+    game_rgb = game[..., :3] * (game[..., 3:4] / 255.0)
+    delta = np.abs(ref_rgb - game_rgb).mean(axis=2) / 255.0
+    union_delta = delta[union]
+
+    luma = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    structural = ssim(ref_rgb @ luma, game_rgb @ luma)
+
+    diff_name = f"diff-{name}.png"
+    Image.fromarray(heatmap(delta, ref_mask ^ game_mask), 'RGB').save(os.path.join(output_dir, diff_name))
+
+    ok = iou >= IOU_THRESHOLD and structural >= SSIM_THRESHOLD
+    return {
+        'name': name,
+        'status': 'match' if ok else 'mismatch',
+        'iou': round(iou, 4),
+        'ssim': round(structural, 4),
+        'mean_delta': round(float(union_delta.mean()), 4) if union_delta.size else 0.0,
+        'p95_delta': round(float(np.percentile(union_delta, 95)), 4) if union_delta.size else 0.0,
+        'diff_image': diff_name,
+    }
+
+
+def write_html(results, path):
+    """Write a sortable-by-eye HTML table: worst SSIM first, with reference/game/diff thumbnails."""
+    output_dir = os.path.dirname(os.path.abspath(path))
+    reference_url = os.path.relpath(REFERENCE_DIR, output_dir).replace(os.sep, '/')
+    game_url = os.path.relpath(GAME_DIR, output_dir).replace(os.sep, '/')
+    rows = []
+    for r in results:
+        name = html.escape(r['name'])
+        if r['status'] in ('missing', 'empty'):
+            rows.append(f"<tr class='{r['status']}'><td>{name}</td><td colspan='7'>{r['status']}</td></tr>")
+            continue
+        rows.append(
+            f"<tr class='{r['status']}'><td>{name}</td><td>{r['status']}</td>"
+            f"<td>{r['iou']:.3f}</td><td>{r['ssim']:.3f}</td><td>{r['mean_delta']:.3f}</td>"
+            f"<td><img src='{reference_url}/{name}.png'></td>"
+            f"<td><img src='{game_url}/{name}.png'></td>"
+            f"<td><img src='{html.escape(r['diff_image'])}'></td></tr>"
+        )
+
+    with open(path, 'w') as f:
+        f.write(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Model comparison</title>
+<style>
+body {{ background: #0a0a1a; color: #ddd; font-family: monospace; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #333; padding: 4px 8px; }}
+img {{ width: 128px; height: 128px; object-fit: contain; background: #222; }}
+.match td:nth-child(2) {{ color: #00ff88; }}
+.mismatch td:nth-child(2), .missing td, .empty td {{ color: #ff5555; }}
+</style></head><body>
+<h1>Blender reference vs game render</h1>
+<table>
+<tr><th>Ship</th><th>Status</th><th>IoU</th><th>SSIM</th><th>Mean &Delta;</th><th>Reference</th><th>Game</th><th>Diff</th></tr>
+{chr(10).join(rows)}
+</table></body></html>
+""")
+
+
+def load_summary_results(path):
+    """Results of a previous run, keyed by ship name; empty if there is none."""
+    try:
+        with open(path) as f:
+            return {r['name']: r for r in json.load(f)['results']}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare reference renders with game renders")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--ships', nargs='+', metavar='NAME',
+                        help="Only compare these ships, keeping the other results in summary.json")
+    parser.add_argument('--output', default=OUTPUT_DIR, metavar='DIR',
+                        help="Directory for the diff images and summaries (default: comparison_screenshots/)")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    summary_path = os.path.join(args.output, 'summary.json')
+
+    if args.ships:
+        names = set(args.ships)
+    else:
+        names = set()
+        for directory in (REFERENCE_DIR, GAME_DIR):
+            if os.path.isdir(directory):
+                names.update(os.path.splitext(f)[0] for f in os.listdir(directory) if f.endswith('.png'))
+
+    print(f"Comparing {len(names)} ships")
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(compare_pair, sorted(names), repeat(args.output)))
+
+    if args.ships:
+        previous = load_summary_results(summary_path)
+        previous.update((r['name'], r) for r in results)
+        results = list(previous.values())
+
+    # Worst matches first; missing and empty pairs at the end
+    results.sort(key=lambda r: (r['status'] in ('missing', 'empty'), r.get('ssim', 0)))
+
+    for r in results:
+        if 'ssim' in r:
+            print(f"  {r['status']:<9} {r['name']:<28} IoU={r['iou']:.3f} SSIM={r['ssim']:.3f} delta={r['mean_delta']:.3f}")
+        else:
+            print(f"  {r['status']:<9} {r['name']}")
+
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    print("Summary: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+    tmp_path = summary_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'counts': counts, 'results': results}, f, indent=2)
+    os.replace(tmp_path, summary_path)
+    write_html(results, os.path.join(args.output, 'summary.html'))
+    print(f"Wrote {os.path.join(args.output, 'summary.html')}")
+
+
+if __name__ == "__main__":
+    main()
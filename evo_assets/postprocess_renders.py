@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Post-render stage for the PNGs in reference_renders/ and game_renders/.
+
+For every render this:
+1. Auto-crops to the alpha bounding box and records the crop offset
+2. Builds a mip pyramid (256/128/64 relative to the 512px frame)
+3. Writes palette-quantized PNG and WebP variants
+4. Writes a per-file JSON report with the size of every output
+
+Files are processed in parallel with a process pool. Requires NumPy and Pillow.
+
+Usage:
+    python postprocess_renders.py
+    python postprocess_renders.py --sources reference_renders --jobs 4
+"""
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    print("ERROR: numpy and pillow are required. Run: pip install numpy pillow")
+    sys.exit(1)
+
+EVO_ASSETS_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIRS = ['reference_renders', 'game_renders']
+OUTPUT_DIR = os.path.join(EVO_ASSETS_DIR, 'processed_renders')
+
+FRAME_SIZE = 512  # Size of the frames written by render_models.py
+MIP_SIZES = [256, 128, 64]  # Mip levels, named by the frame size they correspond to
+# Crop boxes are snapped to this so offsets stay whole pixels at every mip level
+CROP_ALIGN = FRAME_SIZE // MIP_SIZES[-1]
+PALETTE_COLORS = 256
+WEBP_QUALITY = 90
+
+
+def load_rgba(path):
+    """Load an image as an (h, w, 4) uint8 array."""
+    with Image.open(path) as img:
+        return np.asarray(img.convert('RGBA'))
+
+
+def alpha_bbox(rgba, align=1):
+    """Bounding box (x0, y0, x1, y1) of non-transparent pixels, or None if fully transparent.
+
+    With align > 1 the box is grown outward to multiples of `align`,
+    clamped to the image.
+    """
+    alpha = rgba[..., 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    cols = np.flatnonzero(alpha.any(axis=0))
+    if rows.size == 0:
+        return None
+
+    height, width = alpha.shape
+    x0 = cols[0] // align * align
+    y0 = rows[0] // align * align
+    x1 = min(-(-(cols[-1] + 1) // align) * align, width)
+    y1 = min(-(-(rows[-1] + 1) // align) * align, height)
+    return int(x0), int(y0), int(x1), int(y1)
+
+
+def downsample(rgba, factor):
+    """Box-filter an image down by an integer factor, averaging in premultiplied alpha.
+
+    Premultiplying keeps transparent pixels from darkening the silhouette edge.
+    """
+    height, width = rgba.shape[:2]
+    pad_y = -height % factor
+    pad_x = -width % factor
+    img = np.pad(rgba.astype(np.float32), ((0, pad_y), (0, pad_x), (0, 0)))
+
+    alpha = img[..., 3:4] / 255.0
+    img[..., :3] *= alpha
+
+    h, w = img.shape[0] // factor, img.shape[1] // factor
+    img = img.reshape(h, factor, w, factor, 4).mean(axis=(1, 3))
+
+    alpha = img[..., 3:4] / 255.0
+    np.divide(img[..., :3], alpha, out=img[..., :3], where=alpha > 0)
+    return np.clip(np.rint(img), 0, 255).astype(np.uint8)
+
+
+def process_render(source_path, output_dir):
+    """Crop, mip and re-encode one render. Returns its report dict, or None if it is empty."""
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    rgba = load_rgba(source_path)
+
+    bbox = alpha_bbox(rgba, align=CROP_ALIGN)
+    if bbox is None:
+        return None
+
+    x0, y0, x1, y1 = bbox
+    cropped = rgba[y0:y1, x0:x1]
+    outputs = {}
+
+    def write(suffix, array, **save_args):
+        path = os.path.join(output_dir, name + suffix)
+        Image.fromarray(array, 'RGBA').save(path, **save_args)
+        outputs[suffix] = os.path.getsize(path)
+
+    write('.png', cropped, optimize=True)
+
+    scale = FRAME_SIZE / rgba.shape[0]
+    mips = []
+    for size in MIP_SIZES:
+        factor = max(1, round(FRAME_SIZE / size / scale))
+        mip = downsample(cropped, factor)
+        write(f'@{size}.png', mip, optimize=True)
+        mips.append({
+            'size': size,
+            'offset': [x0 // factor, y0 // factor],
+            'width': mip.shape[1],
+            'height': mip.shape[0],
+        })
+
+    quantized = Image.fromarray(cropped, 'RGBA').quantize(
+        colors=PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+    quantized_path = os.path.join(output_dir, name + '.q.png')
+    quantized.save(quantized_path, optimize=True)
+    outputs['.q.png'] = os.path.getsize(quantized_path)
+
+    write('.webp', cropped, quality=WEBP_QUALITY, method=6)
+
+    report = {
+        'source': os.path.basename(source_path),
+        'source_dir': os.path.basename(os.path.dirname(source_path)),
+        'source_bytes': os.path.getsize(source_path),
+        'frame': [rgba.shape[1], rgba.shape[0]],
+        'offset': [x0, y0],
+        'width': x1 - x0,
+        'height': y1 - y0,
+        'mips': mips,
+        'outputs': {name + suffix: size for suffix, size in outputs.items()},
+    }
+    with open(os.path.join(output_dir, name + '.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    return report
+
+
+def print_report(reports):
+    """Print a size table: source PNG vs cropped, quantized and WebP variants."""
+    print(f"\n{'File':<44} {'Source':>9} {'Cropped':>9} {'Palette':>9} {'WebP':>9} {'Saved':>7}")
+    print("-" * 92)
+
+    totals = [0, 0, 0, 0]
+    for report in reports:
+        name = os.path.splitext(report['source'])[0]
+        sizes = [
+            report['source_bytes'],
+            report['outputs'][name + '.png'],
+            report['outputs'][name + '.q.png'],
+            report['outputs'][name + '.webp'],
+        ]
+        totals = [t + s for t, s in zip(totals, sizes)]
+        saved = 1 - min(sizes[1:]) / sizes[0]
+        label = f"{report['source_dir']}/{report['source']}"
+        print(f"{label:<44} " + " ".join(f"{s / 1024:8.1f}K" for s in sizes) + f" {saved:6.1%}")
+
+    if reports:
+        print("-" * 92)
+        print(f"{'TOTAL':<44} " + " ".join(f"{t / 1024:8.1f}K" for t in totals))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crop, mip and re-encode rendered ship PNGs")
+    parser.add_argument('--sources', nargs='+', default=SOURCE_DIRS,
+                        help="Render directories inside evo_assets (default: %(default)s)")
+    parser.add_argument('--output', default=OUTPUT_DIR, help="Output directory")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    tasks = []
+    for source in args.sources:
+        source_dir = os.path.join(EVO_ASSETS_DIR, source)
+        if not os.path.isdir(source_dir):
+            print(f"Skipping missing directory: {source_dir}")
+            continue
+
+        output_dir = os.path.join(args.output, source)
+        os.makedirs(output_dir, exist_ok=True)
+        for f in sorted(os.listdir(source_dir)):
+            if f.endswith('.png'):
+                tasks.append((os.path.join(source_dir, f), output_dir))
+
+    print(f"Processing {len(tasks)} renders into {args.output}")
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        reports = list(pool.map(process_render, *zip(*tasks))) if tasks else []
+
+    for (source_path, output_dir), report in zip(tasks, reports):
+        if report is None:
+            print(f"WARNING: {source_path} is fully transparent, skipped")
+
+    reports = [r for r in reports if r is not None]
+    print_report(reports)
+
+    with open(os.path.join(args.output, 'report.json'), 'w') as f:
+        json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
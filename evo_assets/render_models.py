@@ -2,119 +2,222 @@
 Blender script to render all .blend files with top-down orthographic camera.
 Run with: blender --background --python render_models.py
 
+Render farm mode shards the files across several headless Blender workers:
+    blender --background --python render_models.py -- --jobs 8 --retries 2
+
+--session renders every ship inside one persistent template scene, appending
+each ship with bpy.data.libraries.load instead of reopening it per file.
+
+--sprites N renders each ship at N headings (e.g. 36 or 72) and packs the
+frames into one atlas PNG plus a JSON frame table per ship in SPRITE_DIR.
+
+--backend picks the render engine: eevee, workbench (fast flat-shaded
+previews) or cycles (CPU, low samples plus denoising, for GPU-less machines).
+The default, auto, uses EEVEE and falls back to Cycles when EEVEE is missing
+or only runs on a software GL driver.
+
+Every file's phase timings, RSS and bpy.data block counts are appended to
+PROFILE_PATH as JSON lines; see scripts/batch_profile.py for reports.
+
+Each ship's exact world-space bounds, triangle and vertex counts, surface
+area and centre of mass are measured in one vectorized pass over its mesh
+data (see scripts/geometry_stats.py), frame the camera, and are written to
+GEOMETRY_DIR/<ship>.geometry.json.
+
+Renders are cached in OUTPUT_DIR/.render_manifest.json, keyed on the .blend
+content hash and the render settings; pass --force to re-render everything.
+Finished renders are committed to the asset store (scripts/asset_store.py)
+and linked back into OUTPUT_DIR.
+
 This script is designed to run from WSL with paths converted to Windows format.
 """
 
 import bpy
 import os
+import sys
+import glob
+import json
 import math
+import time
+import hashlib
+import argparse
+import subprocess
+import tempfile
+
+# Helpers shared with the glTF export pipeline live in the repo's scripts/ directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from canonical_materials import canonicalize_materials
+from batch_profile import ProfileLog, timed
+from geometry_stats import analyze_objects, stats_bounds, write_manifest
+import asset_store
 
 # Configuration - Using Windows UNC paths for WSL with backslashes
 WSL_DISTRO = "Ubuntu-22.04"
 BLEND_DIR_WSL = "/home/daa/neji/evo_assets/evo_models/Blender"
 OUTPUT_DIR_WSL = "/home/daa/neji/evo_assets/reference_renders"
+SPRITE_DIR_WSL = "/home/daa/neji/evo_assets/sprite_sheets"
+GEOMETRY_DIR_WSL = "/home/daa/neji/evo_assets/geometry"
+PROFILE_PATH_WSL = "/home/daa/neji/evo_assets/profiles/render.jsonl"
 
 # Convert to Windows UNC paths with proper backslashes
 BLEND_DIR = "\\\\wsl.localhost\\" + WSL_DISTRO + BLEND_DIR_WSL.replace("/", "\\")
 OUTPUT_DIR = "\\\\wsl.localhost\\" + WSL_DISTRO + OUTPUT_DIR_WSL.replace("/", "\\")
+SPRITE_DIR = "\\\\wsl.localhost\\" + WSL_DISTRO + SPRITE_DIR_WSL.replace("/", "\\")
+GEOMETRY_DIR = "\\\\wsl.localhost\\" + WSL_DISTRO + GEOMETRY_DIR_WSL.replace("/", "\\")
+PROFILE_PATH = "\\\\wsl.localhost\\" + WSL_DISTRO + PROFILE_PATH_WSL.replace("/", "\\")
 
 RENDER_SIZE = 512  # 512x512 pixels
 
-def convert_materials_to_principled():
-    """Convert old materials to use Principled BSDF with vertex colors if available."""
-    for mat in bpy.data.materials:
-        if mat.use_nodes:
-            # Check if there's already a proper setup
-            has_principled = False
-            for node in mat.node_tree.nodes:
-                if node.type == 'BSDF_PRINCIPLED':
-                    has_principled = True
-                    break
-            if has_principled:
-                continue
-
-        # Enable nodes if not already
-        mat.use_nodes = True
-        nodes = mat.node_tree.nodes
-        links = mat.node_tree.links
-
-        # Clear existing nodes
-        nodes.clear()
-
-        # Create Principled BSDF
-        principled = nodes.new('ShaderNodeBsdfPrincipled')
-        principled.location = (0, 0)
-
-        # Set a default color based on material name or diffuse color
-        if hasattr(mat, 'diffuse_color'):
-            principled.inputs['Base Color'].default_value = mat.diffuse_color
-
-        # Create output node
-        output = nodes.new('ShaderNodeOutputMaterial')
-        output.location = (300, 0)
-
-        # Link them
-        links.new(principled.outputs['BSDF'], output.inputs['Surface'])
-
-def setup_vertex_color_materials():
-    """Set up materials to use vertex colors if available."""
-    for obj in bpy.data.objects:
-        if obj.type != 'MESH':
-            continue
+# Render backends (quality tiers). 'engine' None means the EEVEE id of this Blender build.
+RENDER_BACKENDS = {
+    'eevee': {'engine': None, 'samples': 64},
+    'workbench': {'engine': 'BLENDER_WORKBENCH', 'samples': 8},  # Flat-shaded previews
+    'cycles': {'engine': 'CYCLES', 'samples': 32, 'denoise': True},  # CPU final renders
+}
+RENDER_BACKEND = 'eevee'  # Resolved from --backend in main()
+EEVEE_PROBE_MAX_SECONDS = 10.0  # A slower probe render means EEVEE is on software GL
+SUN_ENERGY = 3.0
+FILL_ENERGY = 1.5
+CAMERA_PADDING = 1.3  # Ortho scale relative to the model's largest XY dimension
+SESSION_WORLD_COLOR = (0.0509, 0.0509, 0.0509)  # World colour saved in the EVO .blend files
+
+SPRITE_SIZE = 128  # Pixel size of one rotation frame in a sprite sheet
+SPRITE_PADDING = 1.05  # Ortho scale relative to the XY diagonal, so every heading fits
+
+# Records the source hash and settings of every render, so unchanged ships are skipped
+MANIFEST_PATH = OUTPUT_DIR + "\\.render_manifest.json"
+# World-space bounds of each ship rendered by this process, by .blend name;
+# recorded in the manifest for scripts/check_budgets.py
+SHIP_BOUNDS = {}
+
+def parse_args():
+    """Parse script arguments (everything after '--' on the Blender command line)."""
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+
+    parser = argparse.ArgumentParser(
+        prog='render_models.py',
+        description="Render .blend files with a top-down orthographic camera."
+    )
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Number of headless Blender workers (default: 1, render in this process)")
+    parser.add_argument('--retries', type=int, default=1,
+                        help="Times a failed file is re-dispatched in farm mode (default: 1)")
+    parser.add_argument('--session', action='store_true',
+                        help="Render all ships in one persistent template scene")
+    parser.add_argument('--sprites', type=int, metavar='N',
+                        help="Render N-heading rotation sprite sheets instead of single renders")
+    parser.add_argument('--backend', choices=['auto'] + list(RENDER_BACKENDS), default='auto',
+                        help="Render backend (default: auto, EEVEE with a Cycles CPU fallback)")
+    parser.add_argument('--profile', default=PROFILE_PATH,
+                        help="JSON-lines file for per-file phase timings (default: %(default)s)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-render every file, ignoring the render manifest")
+    parser.add_argument('--files', nargs='+',
+                        help="Only render these .blend files (names inside the blend directory)")
+    # Internal: set by the coordinator when it launches a worker process
+    parser.add_argument('--worker-results', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # Left out, --sprites is 0 (single renders); given, it needs at least one heading
+    if args.sprites is not None and args.sprites < 1:
+        parser.error(f"--sprites must be at least 1, got {args.sprites}")
+    args.sprites = args.sprites or 0
+    return args
+
+def eevee_engine_id():
+    """EEVEE's engine id in this Blender build ('BLENDER_EEVEE_NEXT' in 4.2-4.x), or None."""
+    engines = [item.identifier for item in bpy.types.RenderSettings.bl_rna.properties['engine'].enum_items]
+    for engine in ['BLENDER_EEVEE_NEXT', 'BLENDER_EEVEE']:
+        if engine in engines:
+            return engine
+    return None
+
+def backend_engine(backend):
+    """Render engine id for a backend name."""
+    return RENDER_BACKENDS[backend]['engine'] or eevee_engine_id()
+
+def gpu_device_present():
+    """Best-effort check for a GPU device node. Only Linux can be checked; elsewhere assume one."""
+    if not sys.platform.startswith('linux'):
+        return True
+    return bool(glob.glob('/dev/dri/renderD*')) or os.path.exists('/dev/nvidia0')
 
-        mesh = obj.data
+def eevee_is_usable():
+    """Check that EEVEE exists and can render a tiny probe scene in reasonable time."""
+    engine = eevee_engine_id()
+    if engine is None:
+        print("EEVEE is not available in this Blender build")
+        return False
 
-        # Check if mesh has vertex colors
-        if not mesh.color_attributes:
-            continue
+    if not gpu_device_present():
+        print("No GPU device found, EEVEE would run on software GL")
+        return False
 
-        color_attr = mesh.color_attributes[0]
-
-        # Process each material slot
-        for slot in obj.material_slots:
-            mat = slot.material
-            if mat is None:
-                # Create a new material
-                mat = bpy.data.materials.new(name=f"{obj.name}_Material")
-                slot.material = mat
-
-            mat.use_nodes = True
-            nodes = mat.node_tree.nodes
-            links = mat.node_tree.links
-
-            # Find or create Principled BSDF
-            principled = None
-            output = None
-            for node in nodes:
-                if node.type == 'BSDF_PRINCIPLED':
-                    principled = node
-                elif node.type == 'OUTPUT_MATERIAL':
-                    output = node
-
-            if principled is None:
-                nodes.clear()
-                principled = nodes.new('ShaderNodeBsdfPrincipled')
-                principled.location = (0, 0)
-
-            if output is None:
-                output = nodes.new('ShaderNodeOutputMaterial')
-                output.location = (300, 0)
-                links.new(principled.outputs['BSDF'], output.inputs['Surface'])
-
-            # Add vertex color node
-            vc_node = nodes.new('ShaderNodeVertexColor')
-            vc_node.layer_name = color_attr.name
-            vc_node.location = (-300, 0)
-
-            # Connect vertex color to base color
-            links.new(vc_node.outputs['Color'], principled.inputs['Base Color'])
+    probe = bpy.data.scenes.new('EngineProbe')
+    cam_data = bpy.data.cameras.new('EngineProbe')
+    cam_obj = bpy.data.objects.new('EngineProbe', cam_data)
+    probe.collection.objects.link(cam_obj)
+    probe.camera = cam_obj
+    probe.render.engine = engine
+    probe.render.resolution_x = 8
+    probe.render.resolution_y = 8
+
+    start = time.perf_counter()
+    try:
+        bpy.ops.render.render(scene=probe.name)
+    except RuntimeError as e:
+        print(f"EEVEE probe render failed: {e}")
+        return False
+    finally:
+        bpy.data.scenes.remove(probe)
+        bpy.data.objects.remove(cam_obj)
+        bpy.data.cameras.remove(cam_data)
+    elapsed = time.perf_counter() - start
+
+    if elapsed > EEVEE_PROBE_MAX_SECONDS:
+        print(f"EEVEE probe render took {elapsed:.1f}s, assuming software GL")
+        return False
+    return True
+
+def resolve_backend(requested):
+    """Turn a --backend choice into a concrete backend, falling back to Cycles if EEVEE is unusable."""
+    if requested != 'auto':
+        return requested
+    if eevee_is_usable():
+        return 'eevee'
+    print("Falling back to the Cycles CPU backend")
+    return 'cycles'
+
+def backend_note():
+    """Description of the active backend, stamped into every rendered PNG's metadata."""
+    backend = RENDER_BACKENDS[RENDER_BACKEND]
+    note = f"backend={RENDER_BACKEND} engine={backend_engine(RENDER_BACKEND)} samples={backend['samples']}"
+    if backend.get('denoise'):
+        note += " denoise=1"
+    return note
 
 def setup_scene():
     """Set up the scene with proper lighting and render settings."""
     scene = bpy.context.scene
-
-    # Use EEVEE for faster rendering
-    scene.render.engine = 'BLENDER_EEVEE_NEXT'
+    backend = RENDER_BACKENDS[RENDER_BACKEND]
+
+    scene.render.engine = backend_engine(RENDER_BACKEND)
+
+    if RENDER_BACKEND == 'eevee':
+        scene.eevee.taa_render_samples = backend['samples']
+    elif RENDER_BACKEND == 'workbench':
+        scene.display.render_aa = str(backend['samples'])
+        scene.display.shading.light = 'STUDIO'
+        scene.display.shading.color_type = 'MATERIAL'
+    elif RENDER_BACKEND == 'cycles':
+        scene.cycles.device = 'CPU'
+        scene.cycles.samples = backend['samples']
+        scene.cycles.use_denoising = backend['denoise']
+
+    # Record the backend in the PNG metadata (not burned into the image)
+    scene.render.use_stamp = False
+    scene.render.use_stamp_note = True
+    scene.render.stamp_note_text = backend_note()
 
     # Render settings
     scene.render.resolution_x = RENDER_SIZE
@@ -133,113 +236,350 @@ def list_blend_files():
             blend_files.append(f)
     return sorted(blend_files)
 
-def render_blend_file(blend_filename):
-    """Open a blend file and render it."""
+def render_settings():
+    """Settings that affect the rendered image; changing any of them invalidates the cache."""
+    return {
+        'render_size': RENDER_SIZE,
+        'backend': RENDER_BACKEND,
+        'engine': backend_engine(RENDER_BACKEND),
+        'samples': RENDER_BACKENDS[RENDER_BACKEND]['samples'],
+        'denoise': RENDER_BACKENDS[RENDER_BACKEND].get('denoise', False),
+        'sun_energy': SUN_ENERGY,
+        'fill_energy': FILL_ENERGY,
+        'camera_padding': CAMERA_PADDING,
+    }
+
+def load_manifest():
+    """Load the render manifest, or an empty one if it is missing or unreadable."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest):
+    """Write the render manifest atomically so an interrupted run cannot corrupt it."""
+    tmp_path = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def update_manifest(entries):
+    """Merge {blend file: entry} into the manifest on disk and return the merged manifest.
+
+    Several render processes (build_assets.py jobs, the asset daemon) may
+    record renders at once, so the read-modify-write happens under a lock.
+    """
+    with asset_store.lock_file(MANIFEST_PATH + ".lock"):
+        manifest = load_manifest()
+        manifest.update(entries)
+        save_manifest(manifest)
+    return manifest
+
+def hash_blend_file(blend_filename, manifest=None):
+    """SHA-256 of a .blend file's contents.
+
+    If the manifest entry's size and mtime still match the file, the stored
+    hash is reused instead of reading the file again.
+    """
     blend_path = BLEND_DIR + "\\" + blend_filename
-    output_name = os.path.splitext(blend_filename)[0] + ".png"
-    output_path = OUTPUT_DIR + "\\" + output_name
+    stat = os.stat(blend_path)
+
+    entry = (manifest or {}).get(blend_filename)
+    if entry and entry['blend_size'] == stat.st_size and entry['blend_mtime_ns'] == stat.st_mtime_ns:
+        return entry['blend_hash']
+
+    sha = hashlib.sha256()
+    with open(blend_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def render_is_current(manifest, blend_filename):
+    """True if the existing render matches the .blend contents and render settings."""
+    entry = manifest.get(blend_filename)
+    if entry is None or entry['settings'] != render_settings():
+        return False
 
+    output_path = OUTPUT_DIR + "\\" + entry['output']
+    if not os.path.exists(output_path):
+        return False
+
+    return entry['blend_hash'] == hash_blend_file(blend_filename, manifest)
+
+def record_render(manifest, blend_filename, bounds=None):
+    """Store the source hash, settings and ship bounds of a successful render in the manifest.
+
+    bounds defaults to what this process measured while rendering the file;
+    farm coordinators pass the bounds their workers reported.
+    """
+    stat = os.stat(BLEND_DIR + "\\" + blend_filename)
+    bounds = bounds or SHIP_BOUNDS.get(blend_filename)
+    manifest[blend_filename] = {
+        'blend_hash': hash_blend_file(blend_filename),
+        'blend_size': stat.st_size,
+        'blend_mtime_ns': stat.st_mtime_ns,
+        'settings': render_settings(),
+        'output': os.path.splitext(blend_filename)[0] + ".png",
+        'rendered_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    if bounds:
+        manifest[blend_filename]['bounds'] = {'min': list(bounds[0]), 'max': list(bounds[1])}
+
+    # Keep one copy of the render in the asset store, linked back into OUTPUT_DIR
+    output_path = OUTPUT_DIR + "\\" + manifest[blend_filename]['output']
+    if os.path.exists(output_path):
+        asset_store.commit('renders', output_path)
+
+def blend_file_size(blend_filename):
+    """Size of a .blend file in bytes, used as a proxy for its render cost."""
+    return os.path.getsize(BLEND_DIR + "\\" + blend_filename)
+
+def order_largest_first(blend_files):
+    """Sort files by size, largest first, so the slowest renders start earliest."""
+    return sorted(blend_files, key=blend_file_size, reverse=True)
+
+def shard_files(blend_files, num_shards):
+    """Split files into at most num_shards lists with balanced total size.
+
+    Files are handed out largest-first, each to the shard with the smallest
+    total so far, which keeps the slowest worker close to the average.
+    """
+    shards = [[] for _ in range(num_shards)]
+    loads = [0] * num_shards
+    for blend_filename in order_largest_first(blend_files):
+        i = loads.index(min(loads))
+        shards[i].append(blend_filename)
+        loads[i] += blend_file_size(blend_filename)
+    return [shard for shard in shards if shard]
+
+def create_camera_and_lights():
+    """Create the ortho render camera plus the sun and fill lights, linked to the scene."""
+    scene = bpy.context.scene
+
+    # Create camera
+    cam_data = bpy.data.cameras.new('RenderCamera')
+    cam_data.type = 'ORTHO'
+    cam_obj = bpy.data.objects.new('RenderCamera', cam_data)
+    scene.collection.objects.link(cam_obj)
+    scene.camera = cam_obj
+
+    # Create main sun light
+    light_data = bpy.data.lights.new('SunLight', 'SUN')
+    light_data.energy = SUN_ENERGY
+    light_obj = bpy.data.objects.new('SunLight', light_data)
+    scene.collection.objects.link(light_obj)
+
+    # Add fill light from opposite side
+    fill_light_data = bpy.data.lights.new('FillLight', 'SUN')
+    fill_light_data.energy = FILL_ENERGY
+    fill_light_obj = bpy.data.objects.new('FillLight', fill_light_data)
+    scene.collection.objects.link(fill_light_obj)
+
+    return cam_obj, light_obj, fill_light_obj
+
+def frame_camera_and_lights(rig, bounds):
+    """Point the camera straight down at the model and place the lights around it."""
+    cam_obj, light_obj, fill_light_obj = rig
+    (min_x, min_y, min_z), (max_x, max_y, max_z) = bounds
+
+    center_x = (min_x + max_x) / 2
+    center_y = (min_y + max_y) / 2
+    center_z = (min_z + max_z) / 2
+    size_x = max_x - min_x
+    size_y = max_y - min_y
+    size_z = max_z - min_z
+
+    print(f"Model bounds: size=({size_x:.2f}, {size_y:.2f}, {size_z:.2f}), center=({center_x:.2f}, {center_y:.2f}, {center_z:.2f})")
+
+    # Calculate camera settings - add padding
+    cam_obj.data.ortho_scale = max(size_x, size_y) * CAMERA_PADDING
+
+    # Position camera above looking down (top-down view)
+    cam_obj.location = (center_x, center_y, max_z + 10)
+    cam_obj.rotation_euler = (0, 0, 0)  # Looking straight down -Z
+
+    light_obj.location = (center_x + 5, center_y - 5, max_z + 20)
+    light_obj.rotation_euler = (math.radians(45), math.radians(15), math.radians(45))
+
+    fill_light_obj.location = (center_x - 5, center_y + 5, max_z + 15)
+    fill_light_obj.rotation_euler = (math.radians(45), math.radians(-15), math.radians(-45))
+
+def prepare_meshes(blend_filename, timings):
+    """Set up materials for the loaded ship and return its mesh objects and bounds.
+
+    Also writes the ship's geometry manifest to GEOMETRY_DIR.
+
+    Returns (None, None) and prints a warning if the ship has nothing to render.
+    """
+    with timed(timings, 'materials'):
+        # Collapse equivalent materials (using vertex colors if available)
+        canonicalize_materials()
+
+    # Find all mesh objects
+    mesh_objects = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+
+    if not mesh_objects:
+        print(f"WARNING: No mesh objects found in {blend_filename}")
+        return None, None
+
+    print(f"Found {len(mesh_objects)} mesh objects")
+
+    # Print material info
+    for obj in mesh_objects:
+        if obj.data.color_attributes:
+            print(f"  {obj.name}: has vertex colors ({obj.data.color_attributes[0].name})")
+
+    with timed(timings, 'geometry'):
+        stats = analyze_objects(mesh_objects)
+        if stats is not None:
+            ship_name = os.path.splitext(blend_filename)[0]
+            os.makedirs(GEOMETRY_DIR, exist_ok=True)
+            write_manifest(ship_name, stats, GEOMETRY_DIR + "\\" + ship_name + ".geometry.json")
+
+    if stats is None:
+        print(f"WARNING: Could not calculate bounds for {blend_filename}")
+        return None, None
+
+    print(f"Geometry: {stats['triangles']} triangles, {stats['vertices']} vertices, "
+          f"surface area {stats['surface_area']:.2f}")
+    bounds = stats_bounds(stats)
+    SHIP_BOUNDS[blend_filename] = bounds
+    return mesh_objects, bounds
+
+def render_still(output_path, timings):
+    """Render the current scene and write it to output_path."""
+    # A previous render may be a read-only link into the asset store
+    asset_store.detach(output_path)
+
+    with timed(timings, 'render'):
+        bpy.ops.render.render()
+
+    with timed(timings, 'write'):
+        bpy.data.images['Render Result'].save_render(filepath=output_path)
+
+def print_processing_header(blend_filename, blend_path, output_path):
+    """Print the per-file banner."""
     print(f"\n{'='*60}")
     print(f"Processing: {blend_filename}")
     print(f"Input: {blend_path}")
     print(f"Output: {output_path}")
     print(f"{'='*60}")
 
+def print_timings(timings):
+    """Print one file's phase timings on a single line."""
+    phases = ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in timings.items())
+    print(f"Timings: {phases}")
+
+def render_blend_file(blend_filename, timings=None):
+    """Open a blend file and render it."""
+    timings = {} if timings is None else timings
+    blend_path = BLEND_DIR + "\\" + blend_filename
+    output_name = os.path.splitext(blend_filename)[0] + ".png"
+    output_path = OUTPUT_DIR + "\\" + output_name
+
+    print_processing_header(blend_filename, blend_path, output_path)
+
     try:
         # Open the blend file
-        bpy.ops.wm.open_mainfile(filepath=blend_path)
+        with timed(timings, 'load'):
+            bpy.ops.wm.open_mainfile(filepath=blend_path)
 
         # Setup render settings
-        setup_scene()
+        with timed(timings, 'setup'):
+            setup_scene()
+
+        mesh_objects, bounds = prepare_meshes(blend_filename, timings)
+        if mesh_objects is None:
+            return False
 
-        # Try to set up vertex color materials
-        setup_vertex_color_materials()
+        with timed(timings, 'setup'):
+            # Delete existing cameras and lights (to have a clean setup)
+            for obj in bpy.data.objects:
+                if obj.type in ['CAMERA', 'LIGHT']:
+                    bpy.data.objects.remove(obj, do_unlink=True)
 
-        # Find all mesh objects
-        mesh_objects = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+            rig = create_camera_and_lights()
+            frame_camera_and_lights(rig, bounds)
 
-        if not mesh_objects:
-            print(f"WARNING: No mesh objects found in {blend_filename}")
-            return False
+        render_still(output_path, timings)
+
+        print(f"SUCCESS: Rendered to {output_path}")
+        print_timings(timings)
+        return True
+
+    except Exception as e:
+        print(f"ERROR rendering {blend_filename}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def build_template_scene():
+    """Build the reusable session scene: render settings, camera and lights.
+
+    Starts from an empty factory scene with the colour management and world
+    colour of the EVO .blend files, so session renders match open_mainfile ones.
+    Returns the (camera, sun, fill) rig.
+    """
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    setup_scene()
+
+    scene = bpy.context.scene
+    scene.view_settings.view_transform = 'Standard'
+    scene.world = bpy.data.worlds.new('World')
+    scene.world.color = SESSION_WORLD_COLOR
 
-        print(f"Found {len(mesh_objects)} mesh objects")
+    return create_camera_and_lights()
 
-        # Print material info
-        for obj in mesh_objects:
-            if obj.data.color_attributes:
-                print(f"  {obj.name}: has vertex colors ({obj.data.color_attributes[0].name})")
+def load_ship(blend_path):
+    """Append a ship's objects from a .blend into the current scene.
 
-        # Calculate bounds using world matrix
-        min_x = min_y = min_z = float('inf')
-        max_x = max_y = max_z = float('-inf')
+    Cameras and lights are dropped, as in render_blend_file, so only the
+    template rig lights the model. Returns the appended objects.
+    """
+    with bpy.data.libraries.load(blend_path, link=False) as (data_from, data_to):
+        data_to.objects = data_from.objects
 
-        from mathutils import Vector
+    ship_objects = []
+    for obj in data_to.objects:
+        if obj is None:
+            continue
+        if obj.type in ['CAMERA', 'LIGHT']:
+            bpy.data.objects.remove(obj, do_unlink=True)
+            continue
+        bpy.context.scene.collection.objects.link(obj)
+        ship_objects.append(obj)
+
+    return ship_objects
+
+def unload_ship(ship_objects):
+    """Remove a ship's objects and purge the meshes and materials they leave behind."""
+    for obj in ship_objects:
+        bpy.data.objects.remove(obj, do_unlink=True)
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
 
-        for obj in mesh_objects:
-            if obj.type == 'MESH':
-                for corner in obj.bound_box:
-                    world_corner = obj.matrix_world @ Vector(corner)
-                    min_x = min(min_x, world_corner.x)
-                    min_y = min(min_y, world_corner.y)
-                    min_z = min(min_z, world_corner.z)
-                    max_x = max(max_x, world_corner.x)
-                    max_y = max(max_y, world_corner.y)
-                    max_z = max(max_z, world_corner.z)
+def render_blend_file_in_session(blend_filename, rig, timings=None):
+    """Render a ship inside the persistent template scene built by build_template_scene()."""
+    timings = {} if timings is None else timings
+    blend_path = BLEND_DIR + "\\" + blend_filename
+    output_name = os.path.splitext(blend_filename)[0] + ".png"
+    output_path = OUTPUT_DIR + "\\" + output_name
 
-        if min_x == float('inf'):
-            print(f"WARNING: Could not calculate bounds for {blend_filename}")
+    print_processing_header(blend_filename, blend_path, output_path)
+
+    ship_objects = []
+    try:
+        with timed(timings, 'load'):
+            ship_objects = load_ship(blend_path)
+
+        mesh_objects, bounds = prepare_meshes(blend_filename, timings)
+        if mesh_objects is None:
             return False
 
-        center_x = (min_x + max_x) / 2
-        center_y = (min_y + max_y) / 2
-        center_z = (min_z + max_z) / 2
-        size_x = max_x - min_x
-        size_y = max_y - min_y
-        size_z = max_z - min_z
-
-        print(f"Model bounds: size=({size_x:.2f}, {size_y:.2f}, {size_z:.2f}), center=({center_x:.2f}, {center_y:.2f}, {center_z:.2f})")
-
-        # Calculate camera settings - add padding
-        max_dim = max(size_x, size_y) * 1.3
-
-        # Delete existing cameras and lights (to have a clean setup)
-        for obj in bpy.data.objects:
-            if obj.type in ['CAMERA', 'LIGHT']:
-                bpy.data.objects.remove(obj, do_unlink=True)
-
-        # Create camera
-        cam_data = bpy.data.cameras.new('RenderCamera')
-        cam_data.type = 'ORTHO'
-        cam_data.ortho_scale = max_dim
-
-        cam_obj = bpy.data.objects.new('RenderCamera', cam_data)
-        bpy.context.scene.collection.objects.link(cam_obj)
-
-        # Position camera above looking down (top-down view)
-        cam_obj.location = (center_x, center_y, max_z + 10)
-        cam_obj.rotation_euler = (0, 0, 0)  # Looking straight down -Z
-
-        bpy.context.scene.camera = cam_obj
-
-        # Create main sun light
-        light_data = bpy.data.lights.new('SunLight', 'SUN')
-        light_data.energy = 3.0
-        light_obj = bpy.data.objects.new('SunLight', light_data)
-        bpy.context.scene.collection.objects.link(light_obj)
-        light_obj.location = (center_x + 5, center_y - 5, max_z + 20)
-        light_obj.rotation_euler = (math.radians(45), math.radians(15), math.radians(45))
-
-        # Add fill light from opposite side
-        fill_light_data = bpy.data.lights.new('FillLight', 'SUN')
-        fill_light_data.energy = 1.5
-        fill_light_obj = bpy.data.objects.new('FillLight', fill_light_data)
-        bpy.context.scene.collection.objects.link(fill_light_obj)
-        fill_light_obj.location = (center_x - 5, center_y + 5, max_z + 15)
-        fill_light_obj.rotation_euler = (math.radians(45), math.radians(-15), math.radians(-45))
-
-        # Set output path and render
-        bpy.context.scene.render.filepath = output_path
-        bpy.ops.render.render(write_still=True)
+        with timed(timings, 'setup'):
+            frame_camera_and_lights(rig, bounds)
+
+        render_still(output_path, timings)
 
         print(f"SUCCESS: Rendered to {output_path}")
         return True
@@ -250,32 +590,276 @@ def render_blend_file(blend_filename):
         traceback.print_exc()
         return False
 
-def main():
-    """Main function to process all blend files."""
-    print(f"\nBlend directory: {BLEND_DIR}")
-    print(f"Output directory: {OUTPUT_DIR}")
+    finally:
+        with timed(timings, 'cleanup'):
+            unload_ship(ship_objects)
+        print_timings(timings)
+
+def pack_sprite_atlas(frame_paths, atlas_path):
+    """Pack equally sized frame PNGs into a near-square grid atlas.
+
+    Frames are laid out row-major from the top-left corner. Returns the
+    (columns, rows) of the grid.
+    """
+    import numpy as np
+
+    columns = math.ceil(math.sqrt(len(frame_paths)))
+    rows = math.ceil(len(frame_paths) / columns)
+    atlas = np.zeros((rows * SPRITE_SIZE, columns * SPRITE_SIZE, 4), dtype=np.float32)
+
+    for i, frame_path in enumerate(frame_paths):
+        image = bpy.data.images.load(frame_path)
+        pixels = np.empty(SPRITE_SIZE * SPRITE_SIZE * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        bpy.data.images.remove(image)
+
+        # Blender stores pixel rows bottom-up, so row 0 of the grid goes at the top
+        row, column = divmod(i, columns)
+        y0 = (rows - 1 - row) * SPRITE_SIZE
+        x0 = column * SPRITE_SIZE
+        atlas[y0:y0 + SPRITE_SIZE, x0:x0 + SPRITE_SIZE] = pixels.reshape(SPRITE_SIZE, SPRITE_SIZE, 4)
+
+    atlas_image = bpy.data.images.new('SpriteAtlas', columns * SPRITE_SIZE, rows * SPRITE_SIZE, alpha=True)
+    atlas_image.pixels.foreach_set(atlas.ravel())
+    atlas_image.filepath_raw = atlas_path
+    atlas_image.file_format = 'PNG'
+    atlas_image.save()
+    bpy.data.images.remove(atlas_image)
+
+    return columns, rows
+
+def render_sprite_sheet(blend_filename, rig, headings, timings=None):
+    """Render a ship at `headings` evenly spaced rotations and pack them into an atlas.
+
+    The ship is loaded once into the template scene and parented to a pivot
+    at its centre, which is spun clockwise under the fixed camera and lights.
+    Frame 0 is the ship as it appears in the reference render. Writes
+    SPRITE_DIR/<ship>.png and SPRITE_DIR/<ship>.json (the frame table).
+    """
+    timings = {} if timings is None else timings
+    blend_path = BLEND_DIR + "\\" + blend_filename
+    ship_name = os.path.splitext(blend_filename)[0]
+    atlas_path = SPRITE_DIR + "\\" + ship_name + ".png"
+    table_path = SPRITE_DIR + "\\" + ship_name + ".json"
 
-    # Ensure output directory exists
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    print_processing_header(blend_filename, blend_path, atlas_path)
 
-    # Get list of blend files
-    blend_files = list_blend_files()
+    scene = bpy.context.scene
+    ship_objects = []
+    try:
+        with timed(timings, 'load'):
+            ship_objects = load_ship(blend_path)
 
-    print(f"\nFound {len(blend_files)} .blend files to process")
+        mesh_objects, bounds = prepare_meshes(blend_filename, timings)
+        if mesh_objects is None:
+            return False
 
-    results = {'success': [], 'failed': []}
+        with timed(timings, 'setup'):
+            (min_x, min_y, min_z), (max_x, max_y, max_z) = bounds
+            pivot = bpy.data.objects.new('SpritePivot', None)
+            pivot.location = ((min_x + max_x) / 2, (min_y + max_y) / 2, (min_z + max_z) / 2)
+            scene.collection.objects.link(pivot)
+            ship_objects.append(pivot)
+            bpy.context.view_layer.update()
+
+            for obj in ship_objects:
+                if obj.parent is None and obj is not pivot:
+                    world_matrix = obj.matrix_world.copy()
+                    obj.parent = pivot
+                    obj.matrix_world = world_matrix
+
+            # Frame the XY diagonal so the ship stays inside the frame at every heading
+            frame_camera_and_lights(rig, bounds)
+            rig[0].data.ortho_scale = math.hypot(max_x - min_x, max_y - min_y) * SPRITE_PADDING
+            scene.render.resolution_x = SPRITE_SIZE
+            scene.render.resolution_y = SPRITE_SIZE
+
+        frame_dir = tempfile.mkdtemp(prefix='sprites_')
+        frame_paths = []
+        for i in range(headings):
+            pivot.rotation_euler = (0, 0, -2 * math.pi * i / headings)
+            frame_path = os.path.join(frame_dir, f"frame_{i:03d}.png")
+            render_still(frame_path, timings)
+            frame_paths.append(frame_path)
+
+        with timed(timings, 'write'):
+            columns, rows = pack_sprite_atlas(frame_paths, atlas_path)
+
+            frames = []
+            for i in range(headings):
+                row, column = divmod(i, columns)
+                frames.append({
+                    'index': i,
+                    'heading': 360.0 * i / headings,
+                    'x': column * SPRITE_SIZE,
+                    'y': row * SPRITE_SIZE,
+                })
+
+            with open(table_path, 'w') as f:
+                json.dump({
+                    'ship': ship_name,
+                    'image': ship_name + ".png",
+                    'frame_width': SPRITE_SIZE,
+                    'frame_height': SPRITE_SIZE,
+                    'columns': columns,
+                    'rows': rows,
+                    'headings': headings,
+                    'degrees_per_frame': 360.0 / headings,
+                    'world_units_per_pixel': rig[0].data.ortho_scale / SPRITE_SIZE,
+                    'backend': backend_note(),
+                    'frames': frames,
+                }, f, indent=2)
+
+            for frame_path in frame_paths:
+                os.remove(frame_path)
+            os.rmdir(frame_dir)
+
+        print(f"SUCCESS: {headings} frames packed into {atlas_path}")
+        return True
+
+    except Exception as e:
+        print(f"ERROR rendering sprites for {blend_filename}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        scene.render.resolution_x = RENDER_SIZE
+        scene.render.resolution_y = RENDER_SIZE
+        with timed(timings, 'cleanup'):
+            unload_ship(ship_objects)
+        print_timings(timings)
+
+def render_files(blend_files, manifest=None, session=False, sprites=0, profile=None):
+    """Render files one after another in this Blender process.
+
+    With session=True the template scene is built once and every ship is
+    appended into it, instead of reopening each .blend with open_mainfile.
+    With sprites=N each ship is rendered as an N-heading sprite sheet
+    (always in a session).
+    When a manifest is given, each successful render is recorded and the
+    manifest saved straight away, so an interrupted batch keeps its progress.
+    Per-file phase timings, memory and datablock counts go to `profile`.
+    """
+    profile = profile or ProfileLog('render')
+    results = {'success': [], 'failed': [], 'timings': {}, 'profile': profile.records, 'bounds': {}}
+
+    session = session or sprites > 0
+    rig = None
+    if session:
+        timings = {}
+        with timed(timings, 'setup'):
+            rig = build_template_scene()
+        results['timings']['(session setup)'] = timings
 
     for blend_filename in blend_files:
-        if render_blend_file(blend_filename):
+        timings = {}
+        if sprites:
+            ok = render_sprite_sheet(blend_filename, rig, sprites, timings)
+        elif session:
+            ok = render_blend_file_in_session(blend_filename, rig, timings)
+        else:
+            ok = render_blend_file(blend_filename, timings)
+        results['timings'][blend_filename] = timings
+        profile.record(blend_filename, timings, ok, mode='sprites' if sprites else 'session' if session else 'file')
+
+        if ok:
             results['success'].append(blend_filename)
+            results['bounds'][blend_filename] = SHIP_BOUNDS.get(blend_filename)
+            if manifest is not None:
+                entries = {}
+                record_render(entries, blend_filename)
+                manifest.update(update_manifest(entries))
         else:
             results['failed'].append(blend_filename)
 
-    # Print summary
+    return results
+
+def merge_timings(into, timings):
+    """Add per-file phase timings into another {file: {phase: seconds}} dict."""
+    for name, phases in timings.items():
+        merged = into.setdefault(name, {})
+        for phase, seconds in phases.items():
+            merged[phase] = merged.get(phase, 0.0) + seconds
+
+def launch_worker(shard, work_dir, worker_id, worker_args):
+    """Start a headless Blender process that renders one shard of files."""
+    results_path = os.path.join(work_dir, f"worker-{worker_id}.json")
+    log_path = os.path.join(work_dir, f"worker-{worker_id}.log")
+
+    cmd = [
+        bpy.app.binary_path, '--background', '--factory-startup',
+        '--python', os.path.abspath(__file__),
+        '--', *worker_args, '--worker-results', results_path, '--files', *shard,
+    ]
+
+    log_file = open(log_path, 'w')
+    process = subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT)
+    return process, log_file, results_path, log_path
+
+def run_workers(blend_files, jobs, work_dir, round_id, worker_args):
+    """Render blend_files across up to `jobs` workers and collect their results."""
+    shards = shard_files(blend_files, jobs)
+    workers = []
+
+    for i, shard in enumerate(shards):
+        worker_id = f"{round_id}-{i}"
+        print(f"[worker {worker_id}] {len(shard)} files: {', '.join(shard)}")
+        workers.append((shard, worker_id) + launch_worker(shard, work_dir, worker_id, worker_args))
+
+    results = {'success': [], 'failed': [], 'timings': {}, 'profile': [], 'bounds': {}}
+
+    for shard, worker_id, process, log_file, results_path, log_path in workers:
+        returncode = process.wait()
+        log_file.close()
+
+        # A worker that crashed may not have written results; anything it did
+        # not report as rendered counts as failed so it gets retried.
+        succeeded = []
+        if os.path.exists(results_path):
+            with open(results_path) as f:
+                worker_results = json.load(f)
+            succeeded = worker_results['success']
+            merge_timings(results['timings'], worker_results['timings'])
+            results['profile'].extend(worker_results['profile'])
+            results['bounds'].update(worker_results.get('bounds', {}))
+
+        failed = [f for f in shard if f not in succeeded]
+        results['success'].extend(succeeded)
+        results['failed'].extend(failed)
+
+        print(f"[worker {worker_id}] exited with code {returncode}: "
+              f"{len(succeeded)} rendered, {len(failed)} failed (log: {log_path})")
+
+    return results
+
+def render_farm(blend_files, jobs, retries, worker_args):
+    """Coordinator: shard files across headless Blender workers, retrying failures."""
+    work_dir = tempfile.mkdtemp(prefix='render_farm_')
+    print(f"Render farm: {jobs} workers, {retries} retries, logs in {work_dir}")
+
+    results = run_workers(blend_files, jobs, work_dir, 0, worker_args)
+
+    for attempt in range(1, retries + 1):
+        if not results['failed']:
+            break
+        print(f"\nRetry {attempt}/{retries}: {len(results['failed'])} failed files")
+        retry_results = run_workers(results['failed'], jobs, work_dir, attempt, worker_args)
+        results['success'].extend(retry_results['success'])
+        results['failed'] = retry_results['failed']
+        merge_timings(results['timings'], retry_results['timings'])
+        results['profile'].extend(retry_results['profile'])
+        results['bounds'].update(retry_results['bounds'])
+
+    return results
+
+def print_summary(results):
+    """Print the success/failure summary for a rendering run."""
     print(f"\n{'='*60}")
     print("RENDERING COMPLETE")
     print(f"{'='*60}")
     print(f"Successful: {len(results['success'])}")
+    print(f"Skipped (up to date): {len(results['skipped'])}")
     print(f"Failed: {len(results['failed'])}")
 
     if results['success']:
@@ -288,5 +872,81 @@ def main():
         for f in results['failed']:
             print(f"  - {f}")
 
+    if results['timings']:
+        totals = {}
+        for phases in results['timings'].values():
+            for phase, seconds in phases.items():
+                totals[phase] = totals.get(phase, 0.0) + seconds
+        print(f"\nPhase totals (across all files):")
+        for phase, seconds in totals.items():
+            print(f"  {phase:<10} {seconds:8.2f}s")
+        print(f"  {'total':<10} {sum(totals.values()):8.2f}s")
+
+def main():
+    """Main function to process all blend files."""
+    global RENDER_BACKEND
+
+    args = parse_args()
+    RENDER_BACKEND = resolve_backend(args.backend)
+    print(f"Render backend: {backend_note()}")
+
+    print(f"\nBlend directory: {BLEND_DIR}")
+    print(f"Output directory: {OUTPUT_DIR}")
+
+    # Ensure output directory exists
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # Get list of blend files
+    blend_files = args.files or list_blend_files()
+
+    print(f"\nFound {len(blend_files)} .blend files to process")
+
+    if args.worker_results:
+        # Worker mode: render our shard and report back to the coordinator.
+        # The coordinator owns the manifest, so workers never touch it.
+        results = render_files(blend_files, session=args.session, sprites=args.sprites)
+        with open(args.worker_results, 'w') as f:
+            json.dump(results, f)
+        return
+
+    profile = ProfileLog('render', args.profile)
+
+    if args.sprites:
+        # Sprite sheets are not tracked in the render manifest
+        os.makedirs(SPRITE_DIR, exist_ok=True)
+        if args.jobs > 1:
+            worker_args = ['--backend', RENDER_BACKEND, '--sprites', str(args.sprites)]
+            results = render_farm(blend_files, args.jobs, args.retries, worker_args)
+            profile.write_records(results['profile'])
+        else:
+            results = render_files(blend_files, sprites=args.sprites, profile=profile)
+        results['skipped'] = []
+        print_summary(results)
+        return
+
+    manifest = load_manifest()
+
+    skipped = []
+    if not args.force:
+        skipped = [f for f in blend_files if render_is_current(manifest, f)]
+        blend_files = [f for f in blend_files if f not in skipped]
+        print(f"{len(skipped)} renders up to date, {len(blend_files)} to render")
+
+    if args.jobs > 1 and blend_files:
+        # Workers get the resolved backend so they do not each probe EEVEE again
+        worker_args = ['--backend', RENDER_BACKEND] + (['--session'] if args.session else [])
+        results = render_farm(blend_files, args.jobs, args.retries, worker_args)
+        profile.write_records(results['profile'])
+        entries = {}
+        for blend_filename in results['success']:
+            record_render(entries, blend_filename, results['bounds'].get(blend_filename))
+        update_manifest(entries)
+    else:
+        results = render_files(blend_files, manifest, session=args.session, profile=profile)
+
+    results['skipped'] = skipped
+    print_summary(results)
+    print(f"Profile: run {profile.run_id} appended to {args.profile}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Pack the converted ship GLBs into one binary bundle with an offset index.
+
+Loading 30+ ships otherwise costs one HTTP request or file open per file.
+The bundle holds every GLB (plus its collision sidecar, if any, and
+optionally the top-down reference render as a thumbnail) at a known
+offset, so a client fetches one file, or range-requests just the index and
+the ships it needs, and slices them out without re-parsing anything.
+
+Layout (little-endian):
+    0   magic b'EVOB'
+    4   uint32 version (1)
+    8   uint32 index length in bytes
+    12  uint32 offset of the first file
+    16  index: UTF-8 JSON {"files": {name: {"offset", "length", "sha256"}}}
+        then every file, each starting on an ALIGNMENT-byte boundary
+
+Offsets are from the start of the bundle. Names are 'models/<Ship>.glb',
+'models/<Ship>.collision.json' and 'thumbnails/<Ship>.png'.
+space-armada/src/rendering/models.js loads ships from the bundle when it exists.
+
+Library use (scripts/ on sys.path):
+    from asset_bundle import AssetBundle
+    with AssetBundle('ships.bundle') as bundle:
+        data = bundle.read('models/Krait.glb')  # memoryview of the mapping
+        glb = bundle.glb('models/Krait.glb')    # GLBFile over the same bytes
+
+Command line:
+    python asset_bundle.py pack --thumbnails
+    python asset_bundle.py list ../space-armada/assets/models/ships.bundle
+    python asset_bundle.py verify ../space-armada/assets/models/ships.bundle
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import GLBFile, MODELS_DIR
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THUMBNAIL_DIR = os.path.join(REPO_DIR, 'evo_assets', 'reference_renders')
+# The game fetches the bundle from its model directory
+BUNDLE_PATH = os.path.join(REPO_DIR, 'space-armada', 'assets', 'models', 'ships.bundle')
+
+BUNDLE_MAGIC = b'EVOB'
+BUNDLE_VERSION = 1
+HEADER = struct.Struct('<4sIII')
+ALIGNMENT = 16  # Keeps typed-array views of the GLB chunks aligned in the client
+
+
+def bundle_sources(models_dir=MODELS_DIR, thumbnail_dir=None):
+    """(bundle name, path) of every GLB, its collision sidecar and, optionally, its thumbnail."""
+    sources = []
+    for filename in sorted(os.listdir(models_dir)):
+        if not filename.endswith('.glb'):
+            continue
+        ship = filename[:-4]
+        sources.append(('models/' + filename, os.path.join(models_dir, filename)))
+
+        sidecar = os.path.join(models_dir, ship + '.collision.json')
+        if os.path.exists(sidecar):
+            sources.append((f"models/{ship}.collision.json", sidecar))
+
+        if thumbnail_dir:
+            thumbnail = os.path.join(thumbnail_dir, ship + '.png')
+            if os.path.exists(thumbnail):
+                sources.append((f"thumbnails/{ship}.png", thumbnail))
+    return sources
+
+
+def pack(sources, output_path):
+    """Write a bundle of (name, path) sources atomically; returns its index."""
+    contents = []
+    for name, path in sources:
+        with open(path, 'rb') as f:
+            contents.append((name, f.read()))
+
+    # Offsets depend on the index length, which depends on the offsets' digits;
+    # settle it by reserving room for the largest possible offsets first
+    files = {name: {'offset': 0, 'length': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+             for name, data in contents}
+    index_length = len(json.dumps({'files': files}, separators=(',', ':')).encode('utf-8')) + 12 * len(files)
+
+    data_offset = HEADER.size + index_length
+    data_offset += -data_offset % ALIGNMENT
+    offset = data_offset
+    for name, data in contents:
+        files[name]['offset'] = offset
+        offset += len(data) + (-len(data) % ALIGNMENT)
+
+    index = json.dumps({'files': files}, separators=(',', ':')).encode('utf-8')
+    index += b' ' * (index_length - len(index))
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, index_length, data_offset))
+        f.write(index)
+        f.write(b'\0' * (data_offset - f.tell()))
+        for name, data in contents:
+            f.write(data)
+            f.write(b'\0' * (-len(data) % ALIGNMENT))
+    os.replace(tmp_path, output_path)
+    return files
+
+
+class AssetBundle:
+    """A memory-mapped bundle: the index in .files, file contents as memoryviews of the mapping."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, index_length, _ = HEADER.unpack_from(self._view, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {BUNDLE_VERSION} asset bundle")
+        index = self._view[HEADER.size:HEADER.size + index_length]
+        self.files = json.loads(bytes(index))['files']
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            pass  # Views handed out are still alive; the mapping is freed with them
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self.files
+
+    def names(self, prefix=''):
+        return [name for name in self.files if name.startswith(prefix)]
+
+    def read(self, name):
+        """A file's bytes, as a memoryview of the mapping (no copy)."""
+        entry = self.files[name]
+        return self._view[entry['offset']:entry['offset'] + entry['length']]
+
+    def glb(self, name):
+        """A GLBFile over a bundled GLB, sharing the bundle's mapping."""
+        return GLBFile(f"{self.path}:{name}", data=self.read(name))
+
+    def verify(self, name):
+        """True if a file's bytes still match its recorded SHA-256."""
+        return hashlib.sha256(self.read(name)).hexdigest() == self.files[name]['sha256']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack ship GLBs into one indexed bundle, or inspect one")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pack_parser = commands.add_parser('pack', help="Write a bundle")
+    pack_parser.add_argument('--models', default=MODELS_DIR, help="Directory of GLBs (default: %(default)s)")
+    pack_parser.add_argument('--thumbnails', nargs='?', const=THUMBNAIL_DIR, metavar='DIR',
+                             help=f"Also pack <Ship>.png renders from DIR (default DIR: {THUMBNAIL_DIR})")
+    pack_parser.add_argument('--output', default=BUNDLE_PATH, help="Bundle path (default: %(default)s)")
+
+    for command in ('list', 'verify'):
+        sub = commands.add_parser(command, help=f"{command.capitalize()} the files in a bundle")
+        sub.add_argument('bundle', nargs='?', default=BUNDLE_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        files = pack(bundle_sources(args.models, args.thumbnails), args.output)
+        total = sum(entry['length'] for entry in files.values())
+        print(f"Packed {len(files)} files ({total / 1024:.1f}K) into {args.output} "
+              f"({os.path.getsize(args.output) / 1024:.1f}K)")
+        return
+
+    with AssetBundle(args.bundle) as bundle:
+        if args.command == 'list':
+            print(f"{'Name':<44} {'Offset':>10} {'Size':>9}  SHA-256")
+            print("-" * 96)
+            for name, entry in bundle.files.items():
+                print(f"{name:<44} {entry['offset']:>10} {entry['length'] / 1024:8.1f}K  {entry['sha256'][:16]}")
+            return
+
+        corrupt = [name for name in bundle.files if not bundle.verify(name)]
+        for name in corrupt:
+            print(f"CORRUPT: {name}")
+        print(f"Verified {len(bundle.files) - len(corrupt)}/{len(bundle.files)} files in {args.bundle}")
+        if corrupt:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Blender Python Script: warm asset worker for watch_assets.py
+Run with: blender --background --python asset_daemon.py [-- --backend cycles]
+
+--optimize, --lods and --collision apply to convert commands as they do to
+convert_blend_to_glb.py, so a watched rebuild refreshes the same outputs.
+
+Stays alive inside one Blender process and executes commands read from stdin,
+one JSON object per line, so each re-conversion or re-render skips Blender's
+startup cost:
+    {"id": 1, "op": "convert", "file": "Krait.blend"}
+    {"id": 2, "op": "render", "file": "Krait.blend"}
+    {"id": 3, "op": "quit"}
+
+Every reply is one stdout line starting with RESPONSE_MARKER followed by JSON,
+so it can be told apart from Blender's own log output:
+    @@ASSET_DAEMON@@ {"id": 1, "ok": true, "elapsed": 0.84, "rss_mb": 412.0}
+
+With --max-rss-mb the daemon exits after any command that leaves it above the
+ceiling, replying with "restart": true; the watcher starts a fresh one.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, '..', 'evo_assets'))
+
+import convert_blend_to_glb
+import render_models
+from batch_profile import memory_usage_mb
+
+RESPONSE_MARKER = "@@ASSET_DAEMON@@"
+
+def respond(message):
+    """Send one reply line to the watcher."""
+    print(RESPONSE_MARKER + " " + json.dumps(message), flush=True)
+
+def run_command(command):
+    """Execute one command and return whether it succeeded."""
+    op = command.get('op')
+    blend_file = command.get('file')
+
+    if op == 'ping':
+        return True
+
+    if op == 'convert':
+        return convert_blend_to_glb.convert_blend_file(blend_file)
+
+    if op == 'render':
+        # Keep the render manifest in step with batch runs of render_models.py
+        if not render_models.render_blend_file(blend_file):
+            return False
+        entries = {}
+        render_models.record_render(entries, blend_file)
+        render_models.update_manifest(entries)
+        return True
+
+    raise ValueError(f"Unknown op '{op}'")
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='asset_daemon.py')
+    parser.add_argument('--backend', default='auto', help="Render backend, as in render_models.py")
+    parser.add_argument('--max-rss-mb', type=float, default=0,
+                        help="Exit after a command that leaves RSS above this many MB (default: no ceiling)")
+    parser.add_argument('--optimize', action='store_true', help="Optimize converted GLBs")
+    parser.add_argument('--lods', action='store_true', help="Also write LOD chains when converting")
+    parser.add_argument('--collision', action='store_true', help="Also write collision sidecars when converting")
+    args = parser.parse_args(argv)
+
+    convert_blend_to_glb.OPTIMIZE_GLB = args.optimize
+    convert_blend_to_glb.GENERATE_LODS = args.lods
+    convert_blend_to_glb.WRITE_COLLISION = args.collision
+    render_models.RENDER_BACKEND = render_models.resolve_backend(args.backend)
+    os.makedirs(render_models.OUTPUT_DIR, exist_ok=True)
+    os.makedirs(convert_blend_to_glb.OUTPUT_DIR, exist_ok=True)
+
+    respond({'ready': True, 'backend': render_models.RENDER_BACKEND})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        command = json.loads(line)
+        if command.get('op') == 'quit':
+            respond({'id': command.get('id'), 'ok': True})
+            break
+
+        start = time.perf_counter()
+        try:
+            ok = run_command(command)
+            error = None
+        except Exception as e:
+            traceback.print_exc()
+            ok = False
+            error = str(e)
+
+        rss_mb = memory_usage_mb()[0]
+        restart = bool(args.max_rss_mb and rss_mb is not None and rss_mb > args.max_rss_mb)
+        respond({
+            'id': command.get('id'),
+            'ok': bool(ok),
+            'elapsed': round(time.perf_counter() - start, 3),
+            'error': error,
+            'rss_mb': round(rss_mb, 1) if rss_mb is not None else None,
+            'restart': restart,
+        })
+        if restart:
+            break
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for generated assets shared by several directories.
+
+Every file is kept once under STORE_DIR/objects, named by its SHA-256, and
+the directories of a collection (COLLECTIONS) are materialized from
+STORE_DIR/manifest.json as links to those blobs: hardlinks where possible,
+symlinks otherwise, and plain copies as a last resort (e.g. on network
+shares). The models collection covers evo_assets/models and the game's
+space-armada/assets/models, so the two can no longer drift apart.
+
+Blobs are read-only. A producer removes its output with detach() before
+writing it, then hands the finished file to commit(), which moves it into
+the store and links it into every directory of the collection. Writers that
+replace files atomically (os.replace) need no detach.
+convert_blend_to_glb.py commits each GLB, collision sidecar and LOD chain,
+and render_models.py each reference render.
+
+Command line:
+    python asset_store.py import            # adopt the files already on disk
+    python asset_store.py status            # report drift from the manifest
+    python asset_store.py sync              # re-link drifted or missing files
+    python asset_store.py verify            # re-hash every referenced blob
+    python asset_store.py gc                # delete blobs nothing references
+"""
+
+import os
+import sys
+import json
+import stat
+import time
+import shutil
+import hashlib
+import argparse
+from contextlib import contextmanager
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = os.path.join(REPO_DIR, 'evo_assets', 'store')
+OBJECTS_DIR = os.path.join(STORE_DIR, 'objects')
+MANIFEST_PATH = os.path.join(STORE_DIR, 'manifest.json')
+LOCK_PATH = MANIFEST_PATH + '.lock'
+
+# Directories materialized from the store, by collection; the first one is
+# where files are imported from
+COLLECTIONS = {
+    'models': [
+        os.path.join(REPO_DIR, 'evo_assets', 'models'),
+        os.path.join(REPO_DIR, 'space-armada', 'assets', 'models'),
+    ],
+    'renders': [
+        os.path.join(REPO_DIR, 'evo_assets', 'reference_renders'),
+    ],
+    'lods': [
+        os.path.join(REPO_DIR, 'evo_assets', 'models', 'lods'),
+    ],
+}
+# Files of each collection that import adopts
+COLLECTION_SUFFIXES = {
+    'models': ('.glb', '.collision.json'),
+    'renders': ('.png',),
+    'lods': ('.glb', '.lods.json'),
+}
+
+LOCK_TIMEOUT = 30.0
+READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+def hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def blob_path(digest):
+    return os.path.join(OBJECTS_DIR, digest[:2], digest)
+
+
+@contextmanager
+def lock_file(lock_path):
+    """Hold an exclusive lock file for the duration of the block, waiting up to LOCK_TIMEOUT."""
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{lock_path} held for over {LOCK_TIMEOUT:.0f}s; remove it if stale")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+@contextmanager
+def manifest_lock():
+    """Serialize manifest updates between processes (render farm workers, the daemon)."""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    with lock_file(LOCK_PATH):
+        yield
+
+
+def load_manifest():
+    """{collection: {file name: sha256}}; empty if the store has no manifest yet."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def add_blob(path):
+    """Hardlink (or copy, across devices) a file into the store; returns its digest."""
+    digest = hash_file(path)
+    target = blob_path(digest)
+    if os.path.exists(target):
+        return digest
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = target + '.tmp'
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(path, tmp_path)
+    except OSError:
+        shutil.copy2(path, tmp_path)
+    os.chmod(tmp_path, READ_ONLY)
+    os.replace(tmp_path, target)
+    return digest
+
+
+def link_blob(digest, target):
+    """Point target at a blob, replacing whatever is there; returns 'hardlink', 'symlink' or 'copy'."""
+    source = blob_path(digest)
+    tmp_target = target + '.tmp'
+    if os.path.lexists(tmp_target):
+        os.remove(tmp_target)
+
+    try:
+        os.link(source, tmp_target)
+        kind = 'hardlink'
+    except OSError:
+        try:
+            os.symlink(os.path.relpath(source, os.path.dirname(target)), tmp_target)
+            kind = 'symlink'
+        except OSError:
+            shutil.copy2(source, tmp_target)
+            kind = 'copy'
+    os.replace(tmp_target, target)
+    return kind
+
+
+def is_linked(digest, target):
+    """True if target already holds the blob's contents."""
+    source = blob_path(digest)
+    if not os.path.exists(target):
+        return False
+    if os.path.samefile(source, target):
+        return True
+    return os.path.getsize(target) == os.path.getsize(source) and hash_file(target) == digest
+
+
+def detach(path):
+    """Remove a store-linked output so a producer can write a fresh file in its place."""
+    if os.path.lexists(path):
+        os.remove(path)
+
+
+def commit(collection, path):
+    """Store a finished file and link it into every directory of its collection; returns its digest."""
+    name = os.path.basename(path)
+    digest = add_blob(path)
+    with manifest_lock():
+        manifest = load_manifest()
+        manifest.setdefault(collection, {})[name] = digest
+        save_manifest(manifest)
+
+    for directory in COLLECTIONS[collection]:
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, name)
+        if not (os.path.exists(target) and os.path.samefile(blob_path(digest), target)):
+            link_blob(digest, target)
+    return digest
+
+
+def forget(collection, names):
+    """Drop files from a collection's manifest and unlink them from its directories."""
+    if not names:
+        return
+    with manifest_lock():
+        manifest = load_manifest()
+        files = manifest.get(collection, {})
+        for name in names:
+            files.pop(name, None)
+        save_manifest(manifest)
+
+    for directory in COLLECTIONS[collection]:
+        for name in names:
+            detach(os.path.join(directory, name))
+
+
+def materialize(collection, names=None):
+    """Re-link drifted or missing files of a collection; returns the number of links written."""
+    files = load_manifest().get(collection, {})
+    written = 0
+    for name in names if names is not None else sorted(files):
+        if name not in files:
+            continue
+        for directory in COLLECTIONS[collection]:
+            os.makedirs(directory, exist_ok=True)
+            target = os.path.join(directory, name)
+            if not is_linked(files[name], target):
+                link_blob(files[name], target)
+                written += 1
+    return written
+
+
+def import_collection(collection):
+    """Commit every matching file in the collection's first directory; returns how many."""
+    source_dir = COLLECTIONS[collection][0]
+    names = sorted(f for f in os.listdir(source_dir) if f.endswith(COLLECTION_SUFFIXES[collection]))
+    for name in names:
+        commit(collection, os.path.join(source_dir, name))
+    return len(names)
+
+
+def drift(collection):
+    """(directory, name, problem) for every file that does not match the manifest."""
+    files = load_manifest().get(collection, {})
+    problems = []
+    for directory in COLLECTIONS[collection]:
+        for name, digest in sorted(files.items()):
+            target = os.path.join(directory, name)
+            if not os.path.exists(target):
+                problems.append((directory, name, 'missing'))
+            elif not is_linked(digest, target):
+                problems.append((directory, name, 'modified'))
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(COLLECTION_SUFFIXES[collection]) and name not in files:
+                    problems.append((directory, name, 'untracked'))
+    return problems
+
+
+def corrupt_blobs():
+    """Referenced blobs whose contents no longer match their name (written through a link)."""
+    referenced = {digest for files in load_manifest().values() for digest in files.values()}
+    return sorted(digest for digest in referenced
+                  if not os.path.exists(blob_path(digest)) or hash_file(blob_path(digest)) != digest)
+
+
+def collect_garbage():
+    """Delete blobs no manifest entry references; returns (count, bytes)."""
+    referenced = {digest for files in load_manifest().values() for digest in files.values()}
+    removed = freed = 0
+    if not os.path.isdir(OBJECTS_DIR):
+        return removed, freed
+    for prefix in os.listdir(OBJECTS_DIR):
+        for digest in os.listdir(os.path.join(OBJECTS_DIR, prefix)):
+            if digest in referenced:
+                continue
+            path = os.path.join(OBJECTS_DIR, prefix, digest)
+            freed += os.path.getsize(path)
+            os.chmod(path, READ_ONLY | stat.S_IWUSR)
+            os.remove(path)
+            removed += 1
+    return removed, freed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed store for generated models and renders")
+    parser.add_argument('command', choices=['import', 'status', 'sync', 'verify', 'gc'])
+    parser.add_argument('--collection', choices=sorted(COLLECTIONS), action='append',
+                        help="Only this collection (repeatable; default: all)")
+    args = parser.parse_args()
+    collections = args.collection or sorted(COLLECTIONS)
+
+    if args.command == 'gc':
+        removed, freed = collect_garbage()
+        print(f"Removed {removed} unreferenced blobs ({freed / (1024 * 1024):.1f} MB)")
+        return
+
+    if args.command == 'verify':
+        corrupt = corrupt_blobs()
+        for digest in corrupt:
+            print(f"CORRUPT: {blob_path(digest)}")
+        print(f"{len(corrupt)} corrupt blobs")
+        if corrupt:
+            sys.exit(1)
+        return
+
+    drifted = 0
+    for collection in collections:
+        if args.command == 'import':
+            count = import_collection(collection)
+            print(f"{collection}: imported {count} files into {STORE_DIR}")
+        elif args.command == 'sync':
+            print(f"{collection}: wrote {materialize(collection)} links")
+        else:
+            problems = drift(collection)
+            for directory, name, problem in problems:
+                print(f"{collection}: {problem:<9} {os.path.join(directory, name)}")
+            if not problems:
+                print(f"{collection}: {len(load_manifest().get(collection, {}))} files in sync")
+            drifted += len(problems)
+
+    if drifted:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
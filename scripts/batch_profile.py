@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Per-file, per-phase profiling for the Blender batch scripts, plus a report command.
+
+render_models.py and convert_blend_to_glb.py append one JSON line per
+processed file to a profile log:
+    {"run": "...", "script": "render", "file": "Igazra.blend", "ok": true,
+     "phases": {"load": 0.21, "materials": 0.01, "render": 3.2, ...},
+     "total": 3.6, "rss_mb": 410.2, "peak_rss_mb": 455.0,
+     "blocks": {"objects": 41, "meshes": 38, ...}}
+
+Report the slowest ships and phases of the latest run, or compare two runs:
+    python batch_profile.py report ../evo_assets/profiles/render.jsonl
+    python batch_profile.py compare ../evo_assets/profiles/render.jsonl
+    python batch_profile.py compare new.jsonl --baseline old.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from contextlib import contextmanager
+
+# bpy.data collections counted in every record
+BLOCK_TYPES = [
+    'objects', 'meshes', 'materials', 'images', 'textures',
+    'node_groups', 'cameras', 'lights', 'collections', 'libraries',
+]
+
+
+@contextmanager
+def timed(timings, phase):
+    """Add the wall time spent inside the block to timings[phase]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+
+def _windows_memory_counters():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+    return counters
+
+
+def memory_usage_mb():
+    """(current RSS, peak RSS) of this process in MB; either may be None if unknown."""
+    if sys.platform == 'win32':
+        counters = _windows_memory_counters()
+        return counters.WorkingSetSize / 2**20, counters.PeakWorkingSetSize / 2**20
+
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    peak_mb = peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+    current_mb = None
+    try:
+        with open('/proc/self/statm') as f:
+            current_mb = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return None, peak_mb
+    # statm is read after getrusage, so it can be a few pages above the recorded peak
+    return current_mb, max(current_mb, peak_mb)
+
+
+def bpy_block_counts():
+    """Number of datablocks in each of BLOCK_TYPES, or {} outside Blender."""
+    try:
+        import bpy
+    except ImportError:
+        return {}
+    return {name: len(getattr(bpy.data, name)) for name in BLOCK_TYPES}
+
+
+class ProfileLog:
+    """Collects per-file profile records and appends them to a JSON-lines file.
+
+    With path=None records are only kept in memory; farm workers use this and
+    hand their records to the coordinator, which writes them.
+    """
+
+    def __init__(self, script, path=None):
+        self.script = script
+        self.path = path
+        self.run_id = time.strftime('%Y%m%d-%H%M%S') + f"-{os.getpid()}"
+        self.records = []
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def record(self, file, timings, ok, **extra):
+        """Build a record for one processed file, including memory and datablock counts."""
+        rss_mb, peak_rss_mb = memory_usage_mb()
+        record = {
+            'run': self.run_id,
+            'script': self.script,
+            'file': file,
+            'ok': ok,
+            'phases': {phase: round(seconds, 4) for phase, seconds in timings.items()},
+            'total': round(sum(timings.values()), 4),
+            'rss_mb': round(rss_mb, 1) if rss_mb is not None else None,
+            'peak_rss_mb': round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+            'blocks': bpy_block_counts(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        record.update(extra)
+        self.write_records([record])
+        return record
+
+    def write_records(self, records):
+        """Append records (e.g. from farm workers) to this run and its log file."""
+        for record in records:
+            record['run'] = self.run_id
+        self.records.extend(records)
+        if self.path:
+            with open(self.path, 'a') as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+
+
+def load_runs(path):
+    """Read a profile log into {run_id: [records]}, in file order."""
+    runs = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                runs.setdefault(record['run'], []).append(record)
+    return runs
+
+
+def pick_run(runs, run_id, offset=-1):
+    """Select a run by id, or by position (default: latest)."""
+    if run_id:
+        if run_id not in runs:
+            sys.exit(f"ERROR: run '{run_id}' not found")
+        return run_id, runs[run_id]
+    run_ids = list(runs)
+    if len(run_ids) < -offset:
+        sys.exit("ERROR: not enough runs in the profile log")
+    return run_ids[offset], runs[run_ids[offset]]
+
+
+def phase_totals(records):
+    totals = {}
+    for record in records:
+        for phase, seconds in record['phases'].items():
+            totals[phase] = totals.get(phase, 0.0) + seconds
+    return totals
+
+
+def print_report(run_id, records, top):
+    """Print run totals, the slowest files and the phase breakdown."""
+    failed = sum(1 for r in records if not r['ok'])
+    total = sum(r['total'] for r in records)
+    peaks = [r['peak_rss_mb'] for r in records if r.get('peak_rss_mb') is not None]
+
+    print(f"Run {run_id} ({records[0]['script']}): {len(records)} files, {failed} failed, "
+          f"{total:.2f}s total" + (f", peak RSS {max(peaks):.0f} MB" if peaks else ""))
+
+    print(f"\nSlowest files:")
+    print(f"  {'File':<32} {'Total':>8} {'Slowest phase':>22} {'RSS MB':>8} {'Meshes':>7}")
+    for r in sorted(records, key=lambda r: r['total'], reverse=True)[:top]:
+        phase, seconds = max(r['phases'].items(), key=lambda p: p[1], default=('-', 0.0))
+        rss = f"{r['rss_mb']:.0f}" if r.get('rss_mb') is not None else '-'
+        meshes = r.get('blocks', {}).get('meshes', '-')
+        print(f"  {r['file']:<32} {r['total']:7.2f}s {phase:>12} {seconds:8.2f}s {rss:>8} {meshes:>7}")
+
+    print(f"\nPhases:")
+    totals = phase_totals(records)
+    for phase, seconds in sorted(totals.items(), key=lambda p: p[1], reverse=True):
+        share = seconds / total if total else 0.0
+        print(f"  {phase:<12} {seconds:8.2f}s {share:6.1%}")
+
+
+def print_comparison(base_id, base, new_id, new, top):
+    """Print per-phase and per-file differences between a baseline run and a new run."""
+    print(f"Baseline {base_id} vs {new_id}")
+
+    base_phases = phase_totals(base)
+    new_phases = phase_totals(new)
+    print(f"\n  {'Phase':<12} {'Baseline':>10} {'New':>10} {'Change':>9}")
+    for phase in sorted(set(base_phases) | set(new_phases)):
+        b = base_phases.get(phase, 0.0)
+        n = new_phases.get(phase, 0.0)
+        change = f"{(n - b) / b:+8.1%}" if b else "     new"
+        print(f"  {phase:<12} {b:9.2f}s {n:9.2f}s {change}")
+    b_total = sum(base_phases.values())
+    n_total = sum(new_phases.values())
+    if b_total:
+        print(f"  {'total':<12} {b_total:9.2f}s {n_total:9.2f}s {(n_total - b_total) / b_total:+8.1%}")
+
+    base_files = {r['file']: r for r in base}
+    new_files = {r['file']: r for r in new}
+    common = set(base_files) & set(new_files)
+    deltas = sorted(common, key=lambda f: abs(new_files[f]['total'] - base_files[f]['total']), reverse=True)
+
+    print(f"\n  Largest per-file changes ({len(common)} files in both runs):")
+    for f in deltas[:top]:
+        b = base_files[f]['total']
+        n = new_files[f]['total']
+        print(f"  {f:<32} {b:8.2f}s -> {n:8.2f}s ({n - b:+.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report on Blender batch profile logs")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    report = sub.add_parser('report', help="Slowest files and phases of one run")
+    report.add_argument('log')
+    report.add_argument('--run', help="Run id (default: latest)")
+    report.add_argument('--top', type=int, default=10)
+
+    compare = sub.add_parser('compare', help="Compare two runs")
+    compare.add_argument('log')
+    compare.add_argument('--run', help="Run id of the new run (default: latest)")
+    compare.add_argument('--baseline', help="Log holding the baseline run (default: same log)")
+    compare.add_argument('--baseline-run', help="Baseline run id (default: latest in --baseline, "
+                                                "else the run before the new run)")
+    compare.add_argument('--top', type=int, default=10)
+
+    args = parser.parse_args()
+    runs = load_runs(args.log)
+
+    if args.command == 'report':
+        run_id, records = pick_run(runs, args.run)
+        print_report(run_id, records, args.top)
+        return
+
+    new_id, new = pick_run(runs, args.run)
+    if args.baseline:
+        base_id, base = pick_run(load_runs(args.baseline), args.baseline_run)
+    elif args.baseline_run:
+        base_id, base = pick_run(runs, args.baseline_run)
+    else:
+        run_ids = list(runs)
+        base_id, base = pick_run(runs, None, offset=run_ids.index(new_id) - len(run_ids) - 1)
+    print_comparison(base_id, base, new_id, new, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Incremental build of the whole Blender -> game asset pipeline.
+
+Each ship is a chain of targets:
+    glb:<Ship>      .blend -> evo_assets/models/<Ship>.glb (convert_blend_to_glb.py)
+    render:<Ship>   .blend -> evo_assets/reference_renders/<Ship>.png (render_models.py)
+    game:<Ship>     .glb -> evo_assets/game_renders/<Ship>.png (capture-screenshots.js)
+    compare:<Ship>  both renders -> comparison_screenshots/diff-<Ship>.png (compare_renders.py)
+
+A target is rebuilt only when it is stale: its command or the SHA-256 of
+any input (including the scripts that build it) changed since its last
+successful build, or one of its outputs is missing or was modified. State
+lives in STATE_PATH; file hashes are cached there by (size, mtime), so an
+up-to-date tree costs one stat per file. Saving one .blend rebuilds only
+that ship's chain, and a compare target whose renders came out identical
+is skipped.
+
+Independent targets run in parallel, up to --jobs at once. Targets that
+share a resource also share a pool with a fixed depth: capture-screenshots.js
+serves the viewer on a fixed port, and compare_renders.py rewrites one
+summary.json, so each runs one at a time.
+
+Usage:
+    python build_assets.py
+    python build_assets.py --jobs 4 --blender /path/to/blender
+    python build_assets.py --ships Krait "UE Fighter" --kinds glb game
+    python build_assets.py --dry-run
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+EVO_ASSETS_DIR = os.path.join(REPO_DIR, 'evo_assets')
+BLEND_DIR = os.path.join(EVO_ASSETS_DIR, 'evo_models', 'Blender')
+MODELS_DIR = os.path.join(EVO_ASSETS_DIR, 'models')
+REFERENCE_DIR = os.path.join(EVO_ASSETS_DIR, 'reference_renders')
+GAME_DIR = os.path.join(EVO_ASSETS_DIR, 'game_renders')
+COMPARISON_DIR = os.path.join(EVO_ASSETS_DIR, 'comparison_screenshots')
+STATE_PATH = os.path.join(EVO_ASSETS_DIR, '.build_state.json')
+
+# Sources each kind of target is built by, so editing a script rebuilds what it made
+CONVERT_SOURCES = [os.path.join(SCRIPTS_DIR, name) for name in (
+    'convert_blend_to_glb.py', 'canonical_materials.py', 'batch_profile.py', 'glb_optimize.py',
+    'lod_chain.py', 'silhouette.py', 'check_budgets.py', 'collision_volumes.py', 'glb_reader.py',
+)]
+RENDER_SOURCES = [
+    os.path.join(EVO_ASSETS_DIR, 'render_models.py'),
+    os.path.join(SCRIPTS_DIR, 'canonical_materials.py'),
+    os.path.join(SCRIPTS_DIR, 'geometry_stats.py'),
+]
+CAPTURE_SOURCES = [
+    os.path.join(REPO_DIR, 'capture-screenshots.js'),
+    os.path.join(REPO_DIR, 'model-viewer.html'),
+]
+COMPARE_SOURCES = [
+    os.path.join(EVO_ASSETS_DIR, 'compare_renders.py'),
+    os.path.join(EVO_ASSETS_DIR, 'postprocess_renders.py'),
+]
+
+KINDS = ('glb', 'render', 'game', 'compare')
+# Targets in a pool never run more than this many at once, whatever --jobs is
+POOLS = {'browser': 1, 'summary': 1}
+
+
+class Target:
+    """One buildable step: a command that turns its inputs into its outputs."""
+
+    def __init__(self, name, command, inputs, outputs, deps=(), pool=None, cwd=REPO_DIR):
+        self.name = name
+        self.command = command
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = list(deps)
+        self.pool = pool
+        self.cwd = cwd
+
+
+class HashCache:
+    """SHA-256 of files, remembered by (size, mtime_ns) so unchanged files are not re-read."""
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def digest(self, path):
+        """Hex digest of a file, or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = os.path.relpath(path, REPO_DIR)
+        cached = self.entries.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        self.entries[key] = [stat.st_size, stat.st_mtime_ns, sha.hexdigest()]
+        return sha.hexdigest()
+
+
+def load_state(path=STATE_PATH):
+    """{'targets': {name: record}, 'hashes': {path: [size, mtime_ns, sha256]}}."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault('targets', {})
+    state.setdefault('hashes', {})
+    return state
+
+
+def save_state(state, path=STATE_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def list_ships():
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(BLEND_DIR) if f.endswith('.blend'))
+
+
+def blender_command(blender, script, args):
+    return [blender, '--background', '--factory-startup', '--python', script, '--'] + args
+
+
+def ship_targets(ship, blender, convert_args=()):
+    """The four targets of one ship's chain."""
+    blend_file = ship + '.blend'
+    blend_path = os.path.join(BLEND_DIR, blend_file)
+    glb_path = os.path.join(MODELS_DIR, ship + '.glb')
+    reference_path = os.path.join(REFERENCE_DIR, ship + '.png')
+    game_path = os.path.join(GAME_DIR, ship + '.png')
+
+    return [
+        Target(f"glb:{ship}",
+               blender_command(blender, CONVERT_SOURCES[0], ['--files', blend_file] + list(convert_args)),
+               [blend_path] + CONVERT_SOURCES, [glb_path]),
+        Target(f"render:{ship}",
+               blender_command(blender, RENDER_SOURCES[0], ['--files', blend_file, '--force']),
+               [blend_path] + RENDER_SOURCES, [reference_path]),
+        Target(f"game:{ship}",
+               ['node', CAPTURE_SOURCES[0], ship],
+               [glb_path] + CAPTURE_SOURCES, [game_path],
+               deps=[f"glb:{ship}"], pool='browser'),
+        Target(f"compare:{ship}",
+               [sys.executable, COMPARE_SOURCES[0], '--jobs', '1', '--ships', ship],
+               [reference_path, game_path] + COMPARE_SOURCES,
+               [os.path.join(COMPARISON_DIR, f"diff-{ship}.png")],
+               deps=[f"render:{ship}", f"game:{ship}"], pool='summary', cwd=EVO_ASSETS_DIR),
+    ]
+
+
+def build_graph(ships, blender, kinds=KINDS, convert_args=()):
+    """Targets of the given kinds for the given ships, by name.
+
+    Dependencies on kinds that were left out are dropped: their outputs are
+    used as they are on disk.
+    """
+    targets = {}
+    for ship in ships:
+        for target in ship_targets(ship, blender, convert_args):
+            if target.name.split(':', 1)[0] in kinds:
+                targets[target.name] = target
+    for target in targets.values():
+        target.deps = [dep for dep in target.deps if dep in targets]
+    return targets
+
+
+def signature(target, hashes):
+    """Digest of a target's command and the contents of its inputs."""
+    sha = hashlib.sha256(json.dumps(target.command).encode('utf-8'))
+    for path in target.inputs:
+        sha.update(os.path.relpath(path, REPO_DIR).encode('utf-8'))
+        sha.update((hashes.digest(path) or 'missing').encode('ascii'))
+    return sha.hexdigest()
+
+
+def stale_reason(target, state, hashes):
+    """Why a target needs rebuilding, or None if it is up to date."""
+    record = state['targets'].get(target.name)
+    if record is None:
+        return "never built"
+    if record['signature'] != signature(target, hashes):
+        return "inputs changed"
+    for path in target.outputs:
+        digest = hashes.digest(path)
+        if digest is None:
+            return f"{os.path.basename(path)} missing"
+        if digest != record['outputs'].get(os.path.relpath(path, REPO_DIR)):
+            return f"{os.path.basename(path)} modified"
+    return None
+
+
+def run_target(target, verbose=False):
+    """Run a target's command; returns (ok, elapsed seconds, captured output)."""
+    start = time.perf_counter()
+    result = subprocess.run(target.command, cwd=target.cwd, stdout=None if verbose else subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+    missing = [path for path in target.outputs if not os.path.exists(path)]
+    output = result.stdout or ''
+    if missing and result.returncode == 0:
+        output += "\nNot written: " + ", ".join(missing)
+    return result.returncode == 0 and not missing, time.perf_counter() - start, output
+
+
+def build(targets, state, jobs=1, force=False, dry_run=False, verbose=False):
+    """Bring every target up to date, running independent ones in parallel.
+
+    A target is checked once all its dependencies have finished, so it sees
+    their fresh outputs; anything downstream of a failure is skipped.
+    Returns {'built': [...], 'up_to_date': [...], 'failed': [...], 'skipped': [...]}.
+    """
+    hashes = HashCache(state['hashes'])
+    results = {'built': [], 'up_to_date': [], 'failed': [], 'skipped': []}
+    done = {}  # name -> 'built' | 'up_to_date' | 'failed' | 'skipped'
+    waiting = dict(targets)
+    running = {}  # future -> target
+    pool_use = dict.fromkeys(POOLS, 0)
+
+    def finish(target, outcome):
+        done[target.name] = outcome
+        results[outcome].append(target.name)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        while waiting or running:
+            for name, target in sorted(waiting.items()):
+                if any(dep not in done for dep in target.deps):
+                    continue
+                if any(done[dep] in ('failed', 'skipped') for dep in target.deps):
+                    del waiting[name]
+                    finish(target, 'skipped')
+                    print(f"  skip     {name} (dependency failed)")
+                    continue
+
+                # In a dry run an upstream rebuild has not happened, so assume it changes our inputs
+                upstream_built = any(done[dep] == 'built' for dep in target.deps)
+                reason = "forced" if force else stale_reason(target, state, hashes)
+                if reason is None and not (dry_run and upstream_built):
+                    del waiting[name]
+                    finish(target, 'up_to_date')
+                    continue
+                if dry_run:
+                    del waiting[name]
+                    finish(target, 'built')
+                    print(f"  stale    {name} ({reason or 'dependency rebuilt'})")
+                    continue
+
+                if len(running) >= jobs or (target.pool and pool_use[target.pool] >= POOLS[target.pool]):
+                    continue
+                del waiting[name]
+                if target.pool:
+                    pool_use[target.pool] += 1
+                print(f"  build    {name} ({reason})")
+                running[executor.submit(run_target, target, verbose)] = target
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                target = running.pop(future)
+                if target.pool:
+                    pool_use[target.pool] -= 1
+                ok, elapsed, output = future.result()
+                if not ok:
+                    finish(target, 'failed')
+                    print(f"  FAILED   {target.name} ({elapsed:.1f}s)")
+                    if output.strip():
+                        print("    " + "\n    ".join(output.strip().splitlines()[-20:]))
+                    continue
+
+                state['targets'][target.name] = {
+                    'signature': signature(target, hashes),
+                    'outputs': {os.path.relpath(path, REPO_DIR): hashes.digest(path) for path in target.outputs},
+                    'built_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                }
+                save_state(state)
+                finish(target, 'built')
+                print(f"  done     {target.name} ({elapsed:.1f}s)")
+
+    if not dry_run:
+        save_state(state)  # Keeps hashes of the up-to-date targets' files for the next run
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild stale ship GLBs, renders and comparisons")
+    parser.add_argument('--ships', nargs='+', metavar='NAME',
+                        help="Only these ships (default: every .blend in evo_assets/evo_models/Blender)")
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS),
+                        help="Only these kinds of target (default: all)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Targets run at once (default: CPU count)")
+    parser.add_argument('--blender', default='blender', help="Blender executable (default: blender)")
+    parser.add_argument('--optimize', action='store_true', help="Pass --optimize to convert_blend_to_glb.py")
+    parser.add_argument('--collision', action='store_true', help="Pass --collision to convert_blend_to_glb.py")
+    parser.add_argument('--force', action='store_true', help="Rebuild every selected target")
+    parser.add_argument('--dry-run', action='store_true', help="List stale targets without building them")
+    parser.add_argument('--verbose', action='store_true', help="Show each command's output as it runs")
+    args = parser.parse_args()
+
+    ships = list_ships()
+    if args.ships:
+        unknown = sorted(set(args.ships) - set(ships))
+        if unknown:
+            parser.error(f"no .blend for: {', '.join(unknown)}")
+        ships = args.ships
+
+    convert_args = [flag for flag, on in (('--optimize', args.optimize), ('--collision', args.collision)) if on]
+    targets = build_graph(ships, args.blender, args.kinds, convert_args)
+    print(f"{len(targets)} targets for {len(ships)} ships, {args.jobs} jobs")
+
+    start = time.perf_counter()
+    results = build(targets, load_state(), args.jobs, args.force, args.dry_run, args.verbose)
+
+    verb = 'stale' if args.dry_run else 'built'
+    print(f"\n{len(results['built'])} {verb}, {len(results['up_to_date'])} up to date, "
+          f"{len(results['failed'])} failed, {len(results['skipped'])} skipped "
+          f"in {time.perf_counter() - start:.1f}s")
+    if results['failed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
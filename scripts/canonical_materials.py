@@ -0,0 +1,171 @@
+"""
+Material canonicalization shared by the render and glTF export scripts.
+
+Collapses materials that are equivalent in practice into one node graph per
+distinct (base colour, colour attribute, surface) combination, where the
+surface is the Principled metallic, roughness, emission and alpha. Fewer unique materials means
+fewer shaders for EEVEE to compile and fewer materials/draw calls in the
+exported GLBs. The pass is idempotent: canonical materials are tagged with
+their key and reused on later runs instead of being rebuilt.
+
+Import from a Blender script (scripts/ must be on sys.path):
+    from canonical_materials import canonicalize_materials
+"""
+
+import bpy
+import hashlib
+
+# Custom property that marks a material as canonical and stores its key
+CANONICAL_KEY_PROP = 'evo_canonical_key'
+
+# Blender's default material colour, used for empty slots
+DEFAULT_BASE_COLOR = (0.8, 0.8, 0.8, 1.0)
+
+# Principled BSDF defaults: metallic, roughness, emission RGB (colour x strength), alpha
+DEFAULT_SURFACE = (0.0, 0.5, 0.0, 0.0, 0.0, 1.0)
+
+# Colours closer than this are treated as the same material
+COLOR_PRECISION = 3
+
+def principled_node(mat):
+    """The material's Principled BSDF node, or None."""
+    if mat is None or not mat.node_tree:
+        return None
+    for node in mat.node_tree.nodes:
+        if node.type == 'BSDF_PRINCIPLED':
+            return node
+    return None
+
+def emission_color_input(node):
+    """The emission colour socket: 'Emission Color' since Blender 4.0, 'Emission' before."""
+    return node.inputs.get('Emission Color') or node.inputs['Emission']
+
+def material_base_color(mat):
+    """Effective base colour of a material: its Principled BSDF input, else its viewport colour."""
+    if mat is None:
+        return DEFAULT_BASE_COLOR
+
+    node = principled_node(mat)
+    if node is not None:
+        return tuple(node.inputs['Base Color'].default_value)
+
+    return tuple(mat.diffuse_color)
+
+def material_surface(mat):
+    """(metallic, roughness, emission R, G, B, alpha) of a material; emission is colour x strength."""
+    if mat is None:
+        return DEFAULT_SURFACE
+
+    node = principled_node(mat)
+    if node is None:
+        return (mat.metallic, mat.roughness, 0.0, 0.0, 0.0, 1.0)
+
+    strength = node.inputs['Emission Strength'].default_value
+    emission = [c * strength for c in emission_color_input(node).default_value[:3]]
+    return (node.inputs['Metallic'].default_value, node.inputs['Roughness'].default_value,
+            *emission, node.inputs['Alpha'].default_value)
+
+def is_canonicalizable(mat):
+    """Only flat materials are merged.
+
+    Anything with image textures, or with a Principled input other than the
+    base colour driven by other nodes (which the key cannot capture), is left
+    alone. A linked base colour is the colour attribute the key records.
+    """
+    if mat is None or not mat.node_tree:
+        return True
+    if any(node.type == 'TEX_IMAGE' for node in mat.node_tree.nodes):
+        return False
+    node = principled_node(mat)
+    if node is None:
+        return True
+    return not any(socket.is_linked for socket in node.inputs if socket.name != 'Base Color')
+
+def canonical_key(base_color, color_attribute, surface=DEFAULT_SURFACE):
+    """Key identifying a canonical material: rounded RGBA, colour attribute name (or None) and rounded surface."""
+    return (tuple(round(c, COLOR_PRECISION) for c in base_color), color_attribute,
+            tuple(round(v, COLOR_PRECISION) for v in surface))
+
+def canonical_material(key):
+    """Get the canonical material for a key, building its node graph only if it does not exist yet."""
+    key_str = repr(key)
+    name = "EVO_Canonical_" + hashlib.sha1(key_str.encode()).hexdigest()[:10]
+
+    mat = bpy.data.materials.get(name)
+    if mat is not None and mat.get(CANONICAL_KEY_PROP) == key_str:
+        return mat
+
+    base_color, color_attribute, surface = key
+    metallic, roughness, emission_r, emission_g, emission_b, alpha = surface
+
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    mat.diffuse_color = base_color
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+    nodes.clear()
+
+    principled = nodes.new('ShaderNodeBsdfPrincipled')
+    principled.location = (0, 0)
+    principled.inputs['Base Color'].default_value = base_color
+    principled.inputs['Metallic'].default_value = metallic
+    principled.inputs['Roughness'].default_value = roughness
+    principled.inputs['Alpha'].default_value = alpha
+    emission_color_input(principled).default_value = (emission_r, emission_g, emission_b, 1.0)
+    principled.inputs['Emission Strength'].default_value = 1.0
+    if alpha < 1.0 and hasattr(mat, 'blend_method'):
+        mat.blend_method = 'BLEND'
+
+    output = nodes.new('ShaderNodeOutputMaterial')
+    output.location = (300, 0)
+    links.new(principled.outputs['BSDF'], output.inputs['Surface'])
+
+    if color_attribute is not None:
+        vc_node = nodes.new('ShaderNodeVertexColor')
+        vc_node.layer_name = color_attribute
+        vc_node.location = (-300, 0)
+        links.new(vc_node.outputs['Color'], principled.inputs['Base Color'])
+
+    mat[CANONICAL_KEY_PROP] = key_str
+    # Keep canonical materials across orphan purges so later ships reuse them
+    mat.use_fake_user = True
+    return mat
+
+def canonicalize_materials(objects=None):
+    """Point every material slot of the given mesh objects at a canonical material.
+
+    Defaults to all objects in bpy.data. Empty slots only get a material when
+    the mesh has a colour attribute to show, as before. Returns the number of
+    distinct canonical materials in use.
+    """
+    if objects is None:
+        objects = bpy.data.objects
+
+    used = set()
+    slot_count = 0
+
+    for obj in objects:
+        if obj is None or obj.type != 'MESH':
+            continue
+
+        mesh = obj.data
+        color_attribute = mesh.color_attributes[0].name if mesh.color_attributes else None
+
+        for slot in obj.material_slots:
+            mat = slot.material
+            if mat is None and color_attribute is None:
+                continue
+            if not is_canonicalizable(mat):
+                continue
+
+            key = canonical_key(material_base_color(mat), color_attribute, material_surface(mat))
+            canonical = canonical_material(key)
+            if slot.material != canonical:
+                slot.material = canonical
+
+            used.add(canonical.name)
+            slot_count += 1
+
+    if slot_count:
+        print(f"Materials: {slot_count} slots -> {len(used)} canonical materials")
+    return len(used)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Performance budget gate for exported ship GLBs.
+
+Reports each ship's triangle, vertex, draw-call (primitive), material count
+and estimated GPU memory, and compares them with the budget of its class
+(fighter, freighter or capital). Exits with status 1 if any ship is over
+budget, so it can gate a conversion.
+
+Only the GLB's JSON chunk is read: counts come from accessor metadata, so
+no vertex data is touched. A ship's class comes from the config's "ships"
+map, then from keywords in its name, then from its length. Lengths use the
+bounds render_models.py records in the render manifest, falling back to
+the GLB's accessor min/max when the ship has not been rendered.
+
+GPU memory is the size of every bufferView the ship's meshes read, plus
+4 bytes per texel with a full mip chain for PNG textures (other images
+count at their encoded size).
+
+A JSON config overrides budgets per class and assigns classes per ship:
+    {"classes": {"fighter": {"triangles": 20000}}, "ships": {"Escape Pod": "fighter"}}
+
+Command line (default: every .glb in evo_assets/models):
+    python check_budgets.py
+    python check_budgets.py ../evo_assets/models/Krait.glb --config budgets.json --json
+"""
+
+import os
+import sys
+import json
+import struct
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import GLBFile, MODELS_DIR, mesh_instances, primitive_triangles, scene_bounds
+
+MANIFEST_PATH = os.path.join(os.path.dirname(MODELS_DIR), 'reference_renders', '.render_manifest.json')
+
+# Per-class limits; gpu_mb is the estimate described above
+BUDGETS = {
+    'fighter': {'triangles': 15000, 'vertices': 45000, 'draw_calls': 40, 'materials': 8, 'gpu_mb': 4.0},
+    'freighter': {'triangles': 25000, 'vertices': 75000, 'draw_calls': 48, 'materials': 12, 'gpu_mb': 8.0},
+    'capital': {'triangles': 60000, 'vertices': 180000, 'draw_calls': 64, 'materials': 16, 'gpu_mb': 16.0},
+}
+BUDGET_KEYS = ('triangles', 'vertices', 'draw_calls', 'materials', 'gpu_mb')
+
+# Name keywords checked in order, so "Heavy Fighter" is a fighter and "Freight Courier" a freighter
+CLASS_KEYWORDS = [
+    ('capital', ('carrier', 'warship', 'dreadnaught', 'cruiser', 'frigate')),
+    ('freighter', ('freight', 'cargo')),
+    ('fighter', ('fighter', 'gunship', 'courier', 'shuttle', 'pod', 'scout')),
+]
+# Largest dimension (model units) below which an unnamed ship is a fighter / freighter
+CLASS_LENGTHS = [('fighter', 3.0), ('freighter', 7.0)]
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def load_config(path):
+    """Budgets and ship classes, with a JSON config file merged over the defaults."""
+    budgets = {name: dict(limits) for name, limits in BUDGETS.items()}
+    ships = {}
+    if path:
+        with open(path) as f:
+            config = json.load(f)
+        for name, limits in config.get('classes', {}).items():
+            budgets.setdefault(name, {}).update(limits)
+        ships = config.get('ships', {})
+    return budgets, ships
+
+
+def load_manifest_bounds(path=MANIFEST_PATH):
+    """Ship bounds recorded by render_models.py, keyed by ship name (no extension)."""
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {os.path.splitext(blend)[0]: (entry['bounds']['min'], entry['bounds']['max'])
+            for blend, entry in manifest.items() if 'bounds' in entry}
+
+
+def ship_length(bounds):
+    return max(high - low for low, high in zip(*bounds))
+
+
+def classify(name, length, ships):
+    """Budget class of a ship from the config, its name, or its length."""
+    if name in ships:
+        return ships[name]
+    lowered = name.lower()
+    for ship_class, keywords in CLASS_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return ship_class
+    if length is not None:
+        for ship_class, limit in CLASS_LENGTHS:
+            if length < limit:
+                return ship_class
+    return 'capital'
+
+
+def image_gpu_bytes(glb, image):
+    """Texture memory of an embedded image: RGBA8 plus mips for PNGs, else its encoded size."""
+    if 'bufferView' not in image:
+        return 0
+    data = glb.buffer_view(image['bufferView'])
+    if bytes(data[:8]) == PNG_SIGNATURE and len(data) >= 24:
+        width, height = struct.unpack_from('>II', data, 16)
+        return width * height * 4 * 4 // 3
+    return len(data)
+
+
+def gpu_memory_bytes(glb, mesh_indices):
+    """Vertex, index and texture bytes uploaded for the given meshes, each buffer counted once."""
+    gltf = glb.json
+    accessors = set()
+    textures = set()
+    for mesh_index in mesh_indices:
+        for primitive in gltf['meshes'][mesh_index]['primitives']:
+            accessors.update(primitive['attributes'].values())
+            if 'indices' in primitive:
+                accessors.add(primitive['indices'])
+            if 'material' in primitive:
+                material = gltf['materials'][primitive['material']]
+                for key, value in material.get('pbrMetallicRoughness', {}).items():
+                    if key.endswith('Texture'):
+                        textures.add(value['index'])
+                for key in ('normalTexture', 'occlusionTexture', 'emissiveTexture'):
+                    if key in material:
+                        textures.add(material[key]['index'])
+
+    views = {gltf['accessors'][i]['bufferView'] for i in accessors if 'bufferView' in gltf['accessors'][i]}
+    total = sum(gltf['bufferViews'][v]['byteLength'] for v in views)
+
+    images = {gltf['textures'][t]['source'] for t in textures if 'source' in gltf['textures'][t]}
+    total += sum(image_gpu_bytes(glb, gltf['images'][i]) for i in images)
+    return total
+
+
+def measure(path, manifest_bounds, ships):
+    """Budget figures for one GLB, plus its class and the source of its length."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    with GLBFile(path) as glb:
+        gltf = glb.json
+        instances = list(mesh_instances(gltf))
+        triangles = vertices = draw_calls = 0
+        materials = set()
+        for mesh_index, _ in instances:
+            for primitive in gltf['meshes'][mesh_index]['primitives']:
+                draw_calls += 1
+                triangles += primitive_triangles(gltf, primitive)
+                vertices += gltf['accessors'][primitive['attributes']['POSITION']]['count']
+                if 'material' in primitive:
+                    materials.add(primitive['material'])
+
+        bounds, bounds_source = manifest_bounds.get(name), 'render'
+        if bounds is None:
+            bounds, bounds_source = scene_bounds(gltf), 'glb'
+        length = ship_length(bounds) if bounds is not None else None
+
+        return {
+            'name': name,
+            'class': classify(name, length, ships),
+            'length': round(length, 3) if length is not None else None,
+            'bounds_source': bounds_source if length is not None else None,
+            'triangles': triangles,
+            'vertices': vertices,
+            'draw_calls': draw_calls,
+            'materials': len(materials),
+            'gpu_mb': round(gpu_memory_bytes(glb, {m for m, _ in instances}) / (1024 * 1024), 3),
+        }
+
+
+def check(report, budgets):
+    """Names of the budget figures this ship exceeds; stored in report['over']."""
+    limits = budgets.get(report['class'], {})
+    report['over'] = [key for key in BUDGET_KEYS if key in limits and report[key] > limits[key]]
+    return report['over']
+
+
+def check_files(paths, config_path=None, manifest_path=MANIFEST_PATH):
+    """Measure and check GLBs; returns (reports, budgets)."""
+    budgets, ships = load_config(config_path)
+    manifest_bounds = load_manifest_bounds(manifest_path)
+    reports = []
+    for path in paths:
+        report = measure(path, manifest_bounds, ships)
+        check(report, budgets)
+        reports.append(report)
+    return reports, budgets
+
+
+def print_reports(reports, budgets):
+    print(f"{'Ship':<24} {'Class':<10} {'Tris':>8} {'Verts':>8} {'Draws':>6} {'Mats':>5} {'GPU MB':>7}  Over budget")
+    print("-" * 96)
+    for r in reports:
+        limits = budgets.get(r['class'], {})
+        over = ", ".join(f"{key} {r[key]} > {limits[key]}" for key in r['over']) or "-"
+        print(f"{r['name']:<24} {r['class']:<10} {r['triangles']:>8} {r['vertices']:>8} "
+              f"{r['draw_calls']:>6} {r['materials']:>5} {r['gpu_mb']:>7.2f}  {over}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check exported ship GLBs against per-class performance budgets")
+    parser.add_argument('files', nargs='*', help="GLB files (default: every .glb in evo_assets/models)")
+    parser.add_argument('--config', help="JSON file overriding class budgets and assigning ship classes")
+    parser.add_argument('--manifest', default=MANIFEST_PATH,
+                        help="Render manifest with ship bounds (default: %(default)s)")
+    parser.add_argument('--json', action='store_true', help="Print the reports as JSON")
+    args = parser.parse_args()
+
+    files = args.files or sorted(os.path.join(MODELS_DIR, f) for f in os.listdir(MODELS_DIR) if f.endswith('.glb'))
+    reports, budgets = check_files(files, args.config, args.manifest)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print_reports(reports, budgets)
+
+    over = [r['name'] for r in reports if r['over']]
+    if over:
+        if not args.json:
+            print(f"\n{len(over)} of {len(reports)} ships over budget")
+        sys.exit(1)
+    if not args.json:
+        print(f"\nAll {len(reports)} ships within budget")
+
+
+if __name__ == "__main__":
+    main()
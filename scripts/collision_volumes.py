@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Precomputed collision and culling volumes for exported ship GLBs.
+
+For each ship this writes a <Name>.collision.json sidecar next to its GLB
+with, in the GLB's model space (glTF, Y up):
+- bounds: the axis-aligned box
+- sphere: a bounding sphere (Ritter's, or the box-centred one if smaller)
+- obb: the smallest of three oriented boxes (principal axes, Y-up with a
+  minimum-area top-down rectangle, and the axis-aligned box)
+- hull: the 3D convex hull (quickhull) as vertices and outward triangles,
+  checked to contain every vertex of the ship within HULL_EPSILON before
+  the sidecar is written
+- silhouette: the top-down outline render_models.py renders, as a simplified
+  counter-clockwise polygon of (x, z) points plus a bounding circle
+
+The outline is rasterized with silhouette.py (the raster the LOD checks use),
+traced around the ship if it is one connected piece, or taken as the convex
+hull of every piece if it is not, and simplified with Douglas-Peucker until
+it has at most MAX_POLYGON_VERTICES points.
+space-armada/src/game/physics.js loads the sidecars, so the game never has to
+read vertex data for broad-phase, narrow-phase or culling tests.
+Requires NumPy.
+
+Library use (scripts/ on sys.path):
+    from collision_volumes import write_sidecar
+    write_sidecar('Krait.glb')
+
+Command line (default: every .glb in evo_assets/models):
+    python collision_volumes.py
+    python collision_volumes.py ../evo_assets/models/Krait.glb --print
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import np, GLBFile, MODELS_DIR, TRIANGLES, mesh_instances
+from silhouette import silhouette_frame, rasterize_silhouette
+
+SIDECAR_SUFFIX = '.collision.json'
+SIDECAR_VERSION = 1
+
+MAX_POLYGON_VERTICES = 32
+POLYGON_TOLERANCE_PX = 1.0  # Initial Douglas-Peucker tolerance, in silhouette raster pixels
+HULL_EPSILON = 1e-5  # Plane distance treated as coplanar, relative to the ship's size
+MAX_HULL_SWEEPS = 8  # Passes re-adding points left outside the hull before giving up
+DECIMALS = 4
+
+# Moore neighbourhood in clockwise order on the raster (rows grow downwards), starting west
+NEIGHBOURS = [(0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1)]
+
+
+def sidecar_path(glb_path):
+    return os.path.splitext(glb_path)[0] + SIDECAR_SUFFIX
+
+
+def world_triangles(glb):
+    """Model-space triangles (n, 3, 3) of every triangle primitive in the default scene."""
+    gltf = glb.json
+    if 'EXT_meshopt_compression' in gltf.get('extensionsRequired', []):
+        raise ValueError(f"{glb.path} is meshopt-compressed; compute volumes before compressing")
+
+    triangles = []
+    for mesh_index, world in mesh_instances(gltf):
+        for primitive in gltf['meshes'][mesh_index]['primitives']:
+            if primitive.get('mode', TRIANGLES) != TRIANGLES:
+                continue
+            positions = glb.accessor_floats(primitive['attributes']['POSITION']).astype(np.float64)
+            positions = positions @ world[:3, :3].T + world[:3, 3]
+            if 'indices' in primitive:
+                indices = glb.accessor(primitive['indices']).reshape(-1).astype(np.int64)
+            else:
+                indices = np.arange(len(positions))
+            indices = indices[:len(indices) - len(indices) % 3]
+            triangles.append(positions[indices].reshape(-1, 3, 3))
+
+    return np.concatenate(triangles) if triangles else np.zeros((0, 3, 3))
+
+
+def bounding_sphere(points):
+    """(center, radius) enclosing points of any dimension: Ritter's sphere or the box-centred one."""
+    first = points[0]
+    a = points[np.argmax(((points - first) ** 2).sum(axis=1))]
+    b = points[np.argmax(((points - a) ** 2).sum(axis=1))]
+    center = (a + b) / 2
+    radius = np.linalg.norm(b - a) / 2
+
+    for point in points:
+        d = np.linalg.norm(point - center)
+        if d > radius:
+            radius_new = (radius + d) / 2
+            center = center + (point - center) * ((radius_new - radius) / d)
+            radius = radius_new
+
+    # Ritter's sphere drifts with point order; the box centre sometimes does better
+    candidates = [center, (points.min(axis=0) + points.max(axis=0)) / 2]
+    radii = [float(np.sqrt(((points - c) ** 2).sum(axis=1).max())) for c in candidates]
+    best = int(np.argmin(radii))
+    return candidates[best], radii[best]
+
+
+def convex_hull(points):
+    """Quickhull: (vertex indices, outward triangles as rows of indices into points).
+
+    Each step grows the hull to the farthest outside point of a face. The
+    faces it replaces are those it sees, plus any neighbour the new fan would
+    fold over (a concave or degenerate edge with the horizon), so the
+    surface stays convex and every face keeps a well-defined normal. Points
+    of the replaced faces, their vertices included, are handed to the new
+    faces; a final sweep hands any point still outside a face back to it.
+    Raises ValueError if the points are flat.
+    """
+    extent = float((points.max(axis=0) - points.min(axis=0)).max()) or 1.0
+    eps = HULL_EPSILON * extent
+    min_normal = eps * eps  # Twice the area below which a face is degenerate
+
+    # Initial tetrahedron from extreme points
+    axis = np.argmax(points.max(axis=0) - points.min(axis=0))
+    i0, i1 = int(np.argmin(points[:, axis])), int(np.argmax(points[:, axis]))
+    line = points[i1] - points[i0]
+    i2 = int(np.argmax(np.linalg.norm(np.cross(points - points[i0], line), axis=1)))
+    normal = np.cross(line, points[i2] - points[i0])
+    if np.linalg.norm(normal) <= eps * extent:
+        raise ValueError("points are collinear")
+    i3 = int(np.argmax(np.abs((points - points[i0]) @ normal)))
+    if abs((points[i3] - points[i0]) @ normal) / np.linalg.norm(normal) <= eps:
+        raise ValueError("points are coplanar")
+
+    faces, planes, outside, alive = [], [], [], []
+    edge_faces = {}  # Directed edge -> the face it belongs to; (b, a) is the neighbour across (a, b)
+
+    def add_face(a, b, c, candidates):
+        """Add an outward face and give it the candidates outside it; returns those."""
+        normal = np.cross(points[b] - points[a], points[c] - points[a])
+        normal /= np.linalg.norm(normal)
+        offset = float(normal @ points[a])
+        index = len(faces)
+        faces.append((a, b, c))
+        planes.append((normal, offset))
+        alive.append(True)
+        for edge in ((a, b), (b, c), (c, a)):
+            edge_faces[edge] = index
+        if len(candidates):
+            candidates = candidates[points[candidates] @ normal - offset > eps]
+        outside.append(candidates)
+        return candidates
+
+    def folds(edge, neighbour, apex):
+        """Whether a fan face on horizon edge (a, b) would be degenerate or concave with the neighbour."""
+        a, b = edge
+        fan_normal = np.cross(points[b] - points[a], points[apex] - points[a])
+        if np.linalg.norm(fan_normal) <= min_normal:
+            return True
+        opposite = next(v for v in faces[neighbour] if v != a and v != b)
+        return (points[opposite] - points[a]) @ fan_normal > 0
+
+    def expand(pending):
+        while pending:
+            face = pending.popleft()
+            if not alive[face] or not len(outside[face]):
+                continue
+            normal, offset = planes[face]
+            candidates = outside[face]
+            apex = int(candidates[np.argmax(points[candidates] @ normal - offset)])
+
+            # Grow the visible region until every horizon edge makes a convex fan face
+            visible = {face}
+            while True:
+                horizon, merged = [], set()
+                for current in visible:
+                    a, b, c = faces[current]
+                    for edge in ((a, b), (b, c), (c, a)):
+                        neighbour = edge_faces[edge[::-1]]
+                        if neighbour in visible:
+                            continue
+                        normal, offset = planes[neighbour]
+                        if points[apex] @ normal - offset > eps or folds(edge, neighbour, apex):
+                            merged.add(neighbour)
+                        else:
+                            horizon.append(edge)
+                if not merged:
+                    break
+                visible |= merged
+
+            orphans = np.unique(np.concatenate([outside[i] for i in visible] +
+                                               [np.array(faces[i], np.int64) for i in visible]))
+            orphans = orphans[orphans != apex]
+            for i in visible:
+                alive[i] = False
+                outside[i] = outside[i][:0]
+                a, b, c = faces[i]
+                for edge in ((a, b), (b, c), (c, a)):
+                    if edge_faces.get(edge) == i:
+                        del edge_faces[edge]
+
+            for a, b in horizon:
+                claimed = add_face(a, b, apex, orphans)
+                if len(claimed):
+                    orphans = np.setdiff1d(orphans, claimed)
+                    pending.append(len(faces) - 1)
+
+    centroid = points[[i0, i1, i2, i3]].mean(axis=0)
+    remaining = np.setdiff1d(np.arange(len(points)), [i0, i1, i2, i3])
+    for a, b, c in ((i0, i1, i2), (i0, i1, i3), (i0, i2, i3), (i1, i2, i3)):
+        if np.cross(points[b] - points[a], points[c] - points[a]) @ (centroid - points[a]) > 0:
+            b, c = c, b
+        # Every point goes to the first face it is outside of
+        claimed = add_face(a, b, c, remaining)
+        remaining = np.setdiff1d(remaining, claimed)
+    expand(deque(range(4)))
+
+    # Points dropped as within eps of a face can end up further outside its replacements
+    for _ in range(MAX_HULL_SWEEPS):
+        live = [i for i in range(len(faces)) if alive[i]]
+        normals = np.array([planes[i][0] for i in live])
+        offsets = np.array([planes[i][1] for i in live])
+        distances = points @ normals.T - offsets
+        stray = np.flatnonzero(distances.max(axis=1) > eps)
+        if not len(stray):
+            break
+        owners = np.argmax(distances[stray], axis=1)
+        pending = deque()
+        for owner in np.unique(owners):
+            outside[live[owner]] = stray[owners == owner]
+            pending.append(live[owner])
+        expand(pending)
+    else:
+        raise ValueError(f"hull did not converge in {MAX_HULL_SWEEPS} sweeps")
+
+    triangles = np.array([faces[i] for i in range(len(faces)) if alive[i]], dtype=np.int64)
+    return np.unique(triangles), triangles
+
+
+def check_hull(points, vertices, faces):
+    """Raise ValueError unless every point is within eps of every face plane and no face is degenerate."""
+    extent = float((points.max(axis=0) - points.min(axis=0)).max()) or 1.0
+    eps = HULL_EPSILON * extent
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    if not np.all(lengths > eps * eps):
+        raise ValueError(f"hull has {int(np.sum(~(lengths > eps * eps)))} degenerate faces")
+    normals /= lengths[:, None]
+    offsets = np.einsum('ij,ij->i', normals, corners[:, 0])
+    worst = float((points @ normals.T - offsets).max())
+    if worst > eps:
+        raise ValueError(f"hull leaves points {worst:.4g} outside a face (tolerance {eps:.2g})")
+
+
+def box_for_axes(points, axes):
+    """(volume, center, half extents) of the box around points with the given orthonormal rows as axes."""
+    projected = points @ axes.T
+    low, high = projected.min(axis=0), projected.max(axis=0)
+    half = (high - low) / 2
+    return float(np.prod(2 * half)), ((low + high) / 2) @ axes, half
+
+
+def convex_hull_2d(points):
+    """Counter-clockwise hull of 2D points (monotone chain)."""
+    order = np.lexsort((points[:, 1], points[:, 0]))
+    hull = []
+    for sweep in (order, order[::-1]):
+        chain = []
+        for i in sweep:
+            while len(chain) >= 2:
+                o, a = points[chain[-2]], points[chain[-1]]
+                if (a[0] - o[0]) * (points[i][1] - o[1]) - (a[1] - o[1]) * (points[i][0] - o[0]) > 0:
+                    break
+                chain.pop()
+            chain.append(i)
+        hull.extend(chain[:-1])
+    return points[hull]
+
+
+def oriented_box(points):
+    """The smallest of the principal-axis, Y-up top-down and axis-aligned boxes around points."""
+    candidates = [np.eye(3)]
+
+    _, vectors = np.linalg.eigh(np.cov(points.T))
+    candidates.append(vectors.T)
+
+    # Y up, with the rectangle of least area around the top-down (x, z) outline;
+    # it has a side on one of the outline's hull edges
+    outline = convex_hull_2d(points[:, [0, 2]])
+    edges = np.roll(outline, -1, axis=0) - outline
+    angles = np.unique(np.round(np.arctan2(edges[:, 1], edges[:, 0]) % (np.pi / 2), 9))
+    best_area, best_angle = None, 0.0
+    for angle in angles:
+        c, s = np.cos(angle), np.sin(angle)
+        rotated = outline @ np.array([[c, s], [-s, c]]).T
+        area = np.prod(rotated.max(axis=0) - rotated.min(axis=0))
+        if best_area is None or area < best_area:
+            best_area, best_angle = area, angle
+    c, s = np.cos(best_angle), np.sin(best_angle)
+    candidates.append(np.array([[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]]))
+
+    volume, center, half, axes = min((box_for_axes(points, axes) + (axes,) for axes in candidates),
+                                     key=lambda box: box[0])
+    return center, axes, half
+
+
+def label_components(mask):
+    """(labels, count): 8-connected pieces of a mask numbered from 1, 0 elsewhere."""
+    labels = np.zeros(mask.shape, np.int32)
+    label = 0
+    height, width = mask.shape
+    for y, x in zip(*np.nonzero(mask)):
+        if labels[y, x]:
+            continue
+        label += 1
+        labels[y, x] = label
+        queue = deque([(y, x)])
+        while queue:
+            cy, cx = queue.popleft()
+            for dy, dx in NEIGHBOURS:
+                ny, nx = cy + dy, cx + dx
+                if 0 <= ny < height and 0 <= nx < width and mask[ny, nx] and not labels[ny, nx]:
+                    labels[ny, nx] = label
+                    queue.append((ny, nx))
+    return labels, label
+
+
+def trace_outline(mask):
+    """Outer boundary pixels (row, col) of a connected mask, clockwise on the raster (Moore tracing)."""
+    height, width = mask.shape
+    ys, xs = np.nonzero(mask)
+    start = (int(ys[0]), int(xs[0]))  # Topmost, then leftmost: its west neighbour is empty
+
+    def filled(y, x):
+        return 0 <= y < height and 0 <= x < width and mask[y, x]
+
+    outline = [start]
+    current, backtrack = start, 0
+    first_step = None
+    for _ in range(4 * mask.size):
+        for step in range(1, 9):
+            direction = (backtrack + step) % 8
+            dy, dx = NEIGHBOURS[direction]
+            if filled(current[0] + dy, current[1] + dx):
+                break
+        else:
+            return outline  # A single pixel
+
+        # The neighbour checked just before the hit is empty; it is the next backtrack
+        py, px = NEIGHBOURS[(direction - 1) % 8]
+        previous = (current[0] + py, current[1] + px)
+        current = (current[0] + dy, current[1] + dx)
+        backtrack = NEIGHBOURS.index((previous[0] - current[0], previous[1] - current[1]))
+
+        # Done once the first step repeats (Jacob's stopping criterion)
+        if first_step is None:
+            first_step = (current, backtrack)
+        elif (current, backtrack) == first_step:
+            break
+        outline.append(current)
+
+    if len(outline) > 1 and outline[-1] == start:
+        outline.pop()
+    return outline
+
+
+def simplify_chain(points, tolerance):
+    """Indices of an open polyline kept by Douglas-Peucker."""
+    keep = np.zeros(len(points), bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = points[first], points[last]
+        segment = b - a
+        length = np.linalg.norm(segment)
+        between = points[first + 1:last] - a
+        if length:
+            distances = np.abs(segment[0] * between[:, 1] - segment[1] * between[:, 0]) / length
+        else:
+            distances = np.linalg.norm(between, axis=1)
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.extend(((first, split), (split, last)))
+    return np.flatnonzero(keep)
+
+
+def simplify_polygon(points, tolerance):
+    """Douglas-Peucker on a closed ring, split at the point farthest from the first."""
+    if len(points) <= 3:
+        return points
+    split = int(np.argmax(np.linalg.norm(points - points[0], axis=1)))
+    ring = np.concatenate([points, points[:1]])
+    first = simplify_chain(ring[:split + 1], tolerance)
+    second = simplify_chain(ring[split:], tolerance) + split
+    kept = np.concatenate([first, second[1:-1]])
+    return points[kept]
+
+
+def signed_area(polygon):
+    x, y = polygon[:, 0], polygon[:, 1]
+    return float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)) / 2
+
+
+def silhouette_polygon(triangles):
+    """Simplified counter-clockwise top-down (x, z) outline of the triangles, and its raster frame."""
+    top_down = triangles[..., [0, 2]]
+    origin, scale = silhouette_frame(top_down)
+    mask = rasterize_silhouette(top_down, origin, scale)
+    if not mask.any():
+        return np.zeros((0, 2)), scale
+
+    _, pieces = label_components(mask)
+    if pieces == 1:
+        pixels = np.array(trace_outline(mask), dtype=np.float64)
+    else:
+        # Detached wings and pods must stay inside the outline: wrap every piece
+        pixels = convex_hull_2d(np.argwhere(mask).astype(np.float64))
+    outline = origin + (pixels[:, ::-1] + 0.5) / scale
+
+    tolerance = POLYGON_TOLERANCE_PX / scale
+    polygon = simplify_polygon(outline, tolerance)
+    while len(polygon) > MAX_POLYGON_VERTICES:
+        tolerance *= 1.5
+        polygon = simplify_polygon(outline, tolerance)
+
+    if signed_area(polygon) < 0:
+        polygon = polygon[::-1]
+    return polygon, scale
+
+
+def rounded(values):
+    return np.round(np.asarray(values, dtype=np.float64), DECIMALS).tolist()
+
+
+def compute_volumes(path):
+    """Collision and culling volumes of one GLB, as the sidecar dict."""
+    with GLBFile(path) as glb:
+        triangles = world_triangles(glb)
+    if len(triangles) == 0:
+        raise ValueError(f"{path} has no triangles")
+
+    # Triangle soups repeat every corner; merge them before building the hull
+    points = np.unique(triangles.reshape(-1, 3), axis=0)
+
+    hull_indices, hull_faces = convex_hull(points)
+    remap = np.full(len(points), -1, np.int64)
+    remap[hull_indices] = np.arange(len(hull_indices))
+    hull_points = points[hull_indices]
+    check_hull(points, hull_points, remap[hull_faces])
+
+    sphere_center, sphere_radius = bounding_sphere(hull_points)
+    box_center, box_axes, box_half = oriented_box(hull_points)
+    polygon, scale = silhouette_polygon(triangles)
+    circle_center, circle_radius = bounding_sphere(hull_points[:, [0, 2]])
+
+    return {
+        'ship': os.path.splitext(os.path.basename(path))[0],
+        'version': SIDECAR_VERSION,
+        'bounds': {'min': rounded(hull_points.min(axis=0)), 'max': rounded(hull_points.max(axis=0))},
+        'sphere': {'center': rounded(sphere_center), 'radius': round(float(sphere_radius), DECIMALS)},
+        'obb': {'center': rounded(box_center), 'axes': rounded(box_axes), 'half_extents': rounded(box_half)},
+        'hull': {'vertices': rounded(hull_points), 'faces': remap[hull_faces].tolist()},
+        'silhouette': {
+            'polygon': rounded(polygon),
+            'circle': {'center': rounded(circle_center), 'radius': round(float(circle_radius), DECIMALS)},
+            'resolution': round(1 / scale, DECIMALS),  # Model units per raster pixel
+        },
+    }
+
+
+def write_sidecar(glb_path, output_path=None):
+    """Compute a GLB's volumes and write them as compact JSON; returns the sidecar dict."""
+    volumes = compute_volumes(glb_path)
+    output_path = output_path or sidecar_path(glb_path)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(volumes, f, separators=(',', ':'))
+    os.replace(tmp_path, output_path)
+    return volumes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write collision and culling volume sidecars for GLB files")
+    parser.add_argument('files', nargs='*', help="GLB files (default: every .glb in evo_assets/models)")
+    parser.add_argument('--print', action='store_true', help="Print the volumes instead of writing sidecars")
+    args = parser.parse_args()
+
+    files = args.files or sorted(os.path.join(MODELS_DIR, f) for f in os.listdir(MODELS_DIR) if f.endswith('.glb'))
+
+    failed = 0
+    for path in files:
+        start = time.perf_counter()
+        try:
+            volumes = compute_volumes(path) if args.print else write_sidecar(path)
+        except ValueError as e:
+            print(f"FAILED {path}: {e}")
+            failed += 1
+            continue
+        if args.print:
+            print(json.dumps(volumes, indent=2))
+            continue
+        print(f"{volumes['ship']:<28} hull {len(volumes['hull']['vertices']):>4} verts, "
+              f"outline {len(volumes['silhouette']['polygon']):>2} points, "
+              f"r={volumes['sphere']['radius']:.2f} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,37 +6,141 @@ This script:
 1. Opens each .blend file in the source directory
 2. Exports all visible meshes to GLB format
 3. Saves to the output directory with matching filename
+4. Purges the file's orphaned meshes, materials and images before the next
+5. Commits the GLB to the content-addressed asset store, which links it into
+   OUTPUT_DIR and the game's model directory (see asset_store.py)
+6. Appends per-file phase timings, RSS and bpy.data counts to PROFILE_PATH
+   (see batch_profile.py for reports)
+
+--optimize runs glb_optimize.py on each GLB after export (vertex welding,
+cache-order indices, KHR_mesh_quantization).
+
+--lods also writes decimated, silhouette-checked LOD GLBs plus a per-ship
+<Name>.lods.json manifest to OUTPUT_DIR\lods, committed to the asset store
+like the GLBs (see lod_chain.py).
+
+--collision also writes a <Name>.collision.json sidecar next to each GLB
+with its bounding sphere, oriented box, convex hull and top-down collision
+polygon (see collision_volumes.py).
+
+--check-budgets compares the converted GLBs with per-class triangle, vertex,
+draw-call, material and GPU memory budgets and exits with status 1 if any
+ship is over (see check_budgets.py).
+
+With a memory ceiling the batch runs in worker Blender processes; a worker
+that grows past the ceiling hands its remaining files to a fresh one:
+    blender --background --python convert_blend_to_glb.py -- --max-rss-mb 2048
 """
 
 import bpy
 import os
 import sys
+import json
+import argparse
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from canonical_materials import canonicalize_materials
+from batch_profile import ProfileLog, timed, memory_usage_mb
+from glb_optimize import optimize_file
+from lod_chain import generate_lod_chain, is_lod_file, lod_files
+from check_budgets import check_files, print_reports
+from collision_volumes import write_sidecar, sidecar_path
+import asset_store
 
 # Paths - using WSL network paths accessible from Windows Blender
 # Source: Blender models directory
 SOURCE_DIR = r"\\wsl.localhost\Ubuntu-22.04\home\daa\neji\evo_assets\evo_models\Blender"
 # Output: Models directory for game
 OUTPUT_DIR = r"\\wsl.localhost\Ubuntu-22.04\home\daa\neji\evo_assets\models"
+# Profile log: one JSON line per converted file
+PROFILE_PATH = r"\\wsl.localhost\Ubuntu-22.04\home\daa\neji\evo_assets\profiles\convert.jsonl"
+# LOD GLBs and manifests
+LOD_DIR = os.path.join(OUTPUT_DIR, 'lods')
+# Worker RSS (MB) after which the remaining files move to a fresh Blender; 0 = no ceiling
+MAX_RSS_MB = 0
+# Run glb_optimize.py (weld, reorder, quantize) on each exported GLB; set from --optimize
+OPTIMIZE_GLB = False
+# Write an LOD chain per ship; set from --lods
+GENERATE_LODS = False
+# Write collision/culling volume sidecars; set from --collision
+WRITE_COLLISION = False
+
+def parse_args():
+    """Parse script arguments (everything after '--' on the Blender command line)."""
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+
+    parser = argparse.ArgumentParser(
+        prog='convert_blend_to_glb.py',
+        description="Convert .blend files to .glb."
+    )
+    parser.add_argument('--max-rss-mb', type=float, default=MAX_RSS_MB,
+                        help="Restart the converting Blender when its RSS passes this many MB "
+                             "(default: %(default)s, convert everything in this process)")
+    parser.add_argument('--optimize', action='store_true',
+                        help="Weld, reorder and quantize each GLB after export (see glb_optimize.py)")
+    parser.add_argument('--lods', action='store_true',
+                        help="Also write decimated LOD GLBs and a manifest per ship to the lods directory")
+    parser.add_argument('--collision', action='store_true',
+                        help="Also write a collision and culling volume sidecar per ship (see collision_volumes.py)")
+    parser.add_argument('--check-budgets', nargs='?', const='', metavar='CONFIG',
+                        help="Check the converted GLBs against performance budgets, optionally "
+                             "with a JSON budget config (see check_budgets.py)")
+    parser.add_argument('--profile', default=PROFILE_PATH,
+                        help="JSON-lines file for per-file timings and memory (default: %(default)s)")
+    parser.add_argument('--files', nargs='+',
+                        help="Only convert these .blend files (names inside the source directory)")
+    # Internal: set by the supervisor when it launches a worker process
+    parser.add_argument('--worker-results', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
 
 def clear_scene():
-    """Remove all objects from the scene"""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete()
+    """Remove all objects and purge the datablocks they leave behind.
 
-def export_to_glb(blend_file, output_path):
+    Deleting objects alone leaves the appended meshes, materials and images in
+    bpy.data as orphans, so memory and export time would grow over a batch.
+    Canonical materials keep their fake user and are shared across files.
+    """
+    bpy.data.batch_remove(list(bpy.data.objects))
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+    # Appending leaves a Library entry per source file; nothing is linked from them
+    bpy.data.batch_remove(list(bpy.data.libraries))
+
+def export_scene_glb(output_path):
+    """Export the whole scene, with modifiers applied, as one GLB."""
+    # Blender 4.x compatible settings
+    bpy.ops.export_scene.gltf(
+        filepath=output_path,
+        export_format='GLB',
+        use_selection=False,  # Export entire scene
+        export_apply=True,    # Apply modifiers
+        export_materials='EXPORT',
+        export_texcoords=True,
+        export_normals=True,
+    )
+
+def export_to_glb(blend_file, output_path, timings=None):
     """Export the current scene to GLB format"""
+    timings = {} if timings is None else timings
     try:
         # Clear existing scene
-        clear_scene()
+        with timed(timings, 'cleanup'):
+            clear_scene()
 
-        # Append all objects from the blend file
-        with bpy.data.libraries.load(blend_file, link=False) as (data_from, data_to):
-            data_to.objects = data_from.objects
+        with timed(timings, 'load'):
+            # Append all objects from the blend file
+            with bpy.data.libraries.load(blend_file, link=False) as (data_from, data_to):
+                data_to.objects = data_from.objects
 
-        # Link objects to the current scene
-        for obj in data_to.objects:
-            if obj is not None:
-                bpy.context.collection.objects.link(obj)
+            # Link objects to the current scene
+            for obj in data_to.objects:
+                if obj is not None:
+                    bpy.context.collection.objects.link(obj)
+
+        # Share one material per distinct colour so the GLB has fewer materials
+        with timed(timings, 'materials'):
+            canonicalize_materials(data_to.objects)
 
         # Select all mesh objects
         bpy.ops.object.select_all(action='DESELECT')
@@ -49,24 +153,209 @@ def export_to_glb(blend_file, output_path):
         if selected:
             bpy.context.view_layer.objects.active = selected[0]
 
-        # Export to GLB - Blender 4.x compatible settings
-        bpy.ops.export_scene.gltf(
-            filepath=output_path,
-            export_format='GLB',
-            use_selection=False,  # Export entire scene
-            export_apply=True,    # Apply modifiers
-            export_materials='EXPORT',
-            export_texcoords=True,
-            export_normals=True,
-        )
+        with timed(timings, 'export'):
+            export_scene_glb(output_path)
+
+        if GENERATE_LODS:
+            ship_name = os.path.splitext(os.path.basename(output_path))[0]
+            with timed(timings, 'lods'):
+                generate_lod_chain(data_to.objects, ship_name, LOD_DIR, export_scene_glb, output_path)
 
         return True
     except Exception as e:
         print(f"Error exporting {blend_file}: {e}")
         return False
+    finally:
+        with timed(timings, 'purge'):
+            clear_scene()
+
+def convert_blend_file(blend_file, timings=None):
+    """Convert one .blend from SOURCE_DIR into a .glb in OUTPUT_DIR.
+
+    The GLB, its collision sidecar and its LOD chain are committed to the
+    asset store, which links them into every model directory; if the
+    conversion fails the previous version is linked back.
+    """
+    output_name = os.path.splitext(blend_file)[0] + '.glb'
+    output_path = os.path.join(OUTPUT_DIR, output_name)
+    ship_name = os.path.splitext(output_name)[0]
+    timings = {} if timings is None else timings
+
+    # The current GLB is a read-only link into the store; export a fresh file
+    asset_store.detach(output_path)
+    if not build_glb(blend_file, output_path, timings):
+        asset_store.materialize('models', [output_name])
+        if GENERATE_LODS:
+            asset_store.materialize('lods', stored_lod_names(ship_name))
+        return False
+
+    try:
+        with timed(timings, 'store'):
+            asset_store.commit('models', output_path)
+            if WRITE_COLLISION:
+                asset_store.commit('models', sidecar_path(output_path))
+            if GENERATE_LODS:
+                commit_lods(ship_name)
+    except Exception as e:
+        print(f"Error storing {output_path}: {e}")
+        return False
+    return True
+
+def stored_lod_names(ship_name):
+    """Names of a ship's LOD GLBs and manifest in the asset store."""
+    files = asset_store.load_manifest().get('lods', {})
+    return [name for name in files if is_lod_file(name, ship_name) or name == ship_name + '.lods.json']
+
+def commit_lods(ship_name):
+    """Commit a ship's new LOD chain to the asset store and forget levels it no longer has."""
+    paths = lod_files(LOD_DIR, ship_name) + [os.path.join(LOD_DIR, ship_name + '.lods.json')]
+    for path in paths:
+        asset_store.commit('lods', path)
+    current = {os.path.basename(path) for path in paths}
+    asset_store.forget('lods', [name for name in stored_lod_names(ship_name) if name not in current])
+
+def build_glb(blend_file, output_path, timings):
+    """Export, optimize and write the sidecar of one .blend; returns whether every step succeeded."""
+    input_path = os.path.join(SOURCE_DIR, blend_file)
+    output_name = os.path.basename(output_path)
+    if not export_to_glb(input_path, output_path, timings):
+        return False
+
+    if OPTIMIZE_GLB:
+        paths = [output_path]
+        if GENERATE_LODS:
+            paths += lod_files(LOD_DIR, os.path.splitext(output_name)[0])
+        try:
+            with timed(timings, 'optimize'):
+                reports = [optimize_file(path, path) for path in paths]
+        except Exception as e:
+            print(f"Error optimizing {output_path}: {e}")
+            return False
+        before = sum(r['bytes_before'] for r in reports)
+        after = sum(r['bytes_after'] for r in reports)
+        print(f"    Optimized {len(reports)} GLBs: {before / 1024:.1f}K -> {after / 1024:.1f}K")
+
+    if WRITE_COLLISION:
+        try:
+            with timed(timings, 'collision'):
+                write_sidecar(output_path)
+        except Exception as e:
+            print(f"Error computing collision volumes for {output_path}: {e}")
+            return False
+    return True
+
+def list_blend_files():
+    return sorted(f for f in os.listdir(SOURCE_DIR) if f.endswith('.blend'))
+
+def convert_files(blend_files, profile, max_rss_mb=0, on_progress=None):
+    """Convert files in this process, stopping early once RSS passes max_rss_mb.
+
+    At least one file is always converted. Returns a results dict with the
+    files left over in 'remaining'. on_progress(results) is called after
+    every file.
+    """
+    results = {'success': [], 'failed': [], 'remaining': list(blend_files), 'profile': profile.records}
+
+    while results['remaining']:
+        blend_file = results['remaining'].pop(0)
+        output_name = os.path.splitext(blend_file)[0] + '.glb'
+        done = len(results['success']) + len(results['failed'])
+        print(f"[{done + 1}/{len(blend_files)}] Converting: {blend_file}")
+
+        timings = {}
+        ok = convert_blend_file(blend_file, timings)
+        record = profile.record(blend_file, timings, ok)
+
+        if ok:
+            print(f"    SUCCESS: {output_name} ({record['total']:.2f}s, RSS {record['rss_mb']} MB)")
+            results['success'].append(blend_file)
+        else:
+            print(f"    FAILED: {blend_file}")
+            results['failed'].append(blend_file)
+
+        if on_progress:
+            on_progress(results)
+
+        rss_mb = memory_usage_mb()[0]
+        if max_rss_mb and rss_mb is not None and rss_mb > max_rss_mb and results['remaining']:
+            print(f"    RSS {rss_mb:.0f} MB is over the {max_rss_mb:.0f} MB ceiling, "
+                  f"handing {len(results['remaining'])} files to a fresh Blender")
+            break
+
+    return results
+
+def write_worker_results(path, results):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(results, f)
+    os.replace(tmp_path, path)
+
+def run_worker(blend_files, max_rss_mb, work_dir, worker_id):
+    """Convert files in a fresh Blender until it finishes or passes the ceiling."""
+    results_path = os.path.join(work_dir, f"worker-{worker_id}.json")
+    cmd = [
+        bpy.app.binary_path, '--background', '--factory-startup',
+        '--python-exit-code', '1', '--python', os.path.abspath(__file__),
+        '--', '--max-rss-mb', str(max_rss_mb), '--worker-results', results_path,
+        *(['--optimize'] if OPTIMIZE_GLB else []), *(['--lods'] if GENERATE_LODS else []),
+        *(['--collision'] if WRITE_COLLISION else []),
+        '--files', *blend_files,
+    ]
+    returncode = subprocess.call(cmd)
+
+    # Workers rewrite their results after every file, so a crash loses at most
+    # the file being converted; it counts as failed rather than being retried.
+    # A worker that got through no file at all fails its head file too, so the
+    # supervisor always moves forward.
+    results = {'success': [], 'failed': [], 'remaining': list(blend_files), 'profile': []}
+    if os.path.exists(results_path):
+        with open(results_path) as f:
+            results = json.load(f)
+    stalled = len(results['remaining']) == len(blend_files)
+    if (returncode != 0 or stalled) and results['remaining']:
+        reason = f"exited with code {returncode}" if returncode != 0 else "made no progress"
+        print(f"[worker {worker_id}] {reason} on {results['remaining'][0]}")
+        results['failed'].append(results['remaining'].pop(0))
+    return results
+
+def convert_supervised(blend_files, max_rss_mb):
+    """Supervisor: run workers one after another until every file is converted."""
+    work_dir = tempfile.mkdtemp(prefix='convert_workers_')
+    results = {'success': [], 'failed': [], 'remaining': list(blend_files), 'profile': []}
+    worker_id = 0
+
+    while results['remaining']:
+        print(f"[worker {worker_id}] {len(results['remaining'])} files, ceiling {max_rss_mb:.0f} MB")
+        worker_results = run_worker(results['remaining'], max_rss_mb, work_dir, worker_id)
+        for key in ('success', 'failed', 'profile'):
+            results[key].extend(worker_results[key])
+        results['remaining'] = worker_results['remaining']
+        worker_id += 1
+
+    print(f"Used {worker_id} Blender workers")
+    return results
 
 def main():
     """Main conversion function"""
+    global OPTIMIZE_GLB, GENERATE_LODS, WRITE_COLLISION
+
+    args = parse_args()
+    OPTIMIZE_GLB = args.optimize
+    GENERATE_LODS = args.lods
+    WRITE_COLLISION = args.collision
+
+    # Ensure output directory exists
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    blend_files = args.files or list_blend_files()
+
+    if args.worker_results:
+        # Worker mode: the supervisor owns the profile log
+        results = convert_files(blend_files, ProfileLog('convert'), args.max_rss_mb,
+                                on_progress=lambda r: write_worker_results(args.worker_results, r))
+        write_worker_results(args.worker_results, results)
+        return
+
     print("=" * 60)
     print("Blender to GLB Batch Converter")
     print("=" * 60)
@@ -74,42 +363,34 @@ def main():
     print(f"Output: {OUTPUT_DIR}")
     print("=" * 60)
 
-    # Ensure output directory exists
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-    # Get list of .blend files
-    blend_files = []
-    for f in os.listdir(SOURCE_DIR):
-        if f.endswith('.blend'):
-            blend_files.append(f)
-
     print(f"Found {len(blend_files)} .blend files to convert")
     print()
 
-    success_count = 0
-    fail_count = 0
-
-    for i, blend_file in enumerate(sorted(blend_files), 1):
-        # Create paths
-        input_path = os.path.join(SOURCE_DIR, blend_file)
-        output_name = os.path.splitext(blend_file)[0] + '.glb'
-        output_path = os.path.join(OUTPUT_DIR, output_name)
+    profile = ProfileLog('convert', args.profile)
 
-        print(f"[{i}/{len(blend_files)}] Converting: {blend_file}")
-
-        if export_to_glb(input_path, output_path):
-            print(f"    SUCCESS: {output_name}")
-            success_count += 1
-        else:
-            print(f"    FAILED: {blend_file}")
-            fail_count += 1
+    if args.max_rss_mb:
+        results = convert_supervised(blend_files, args.max_rss_mb)
+        profile.write_records(results['profile'])
+    else:
+        results = convert_files(blend_files, profile)
 
     print()
     print("=" * 60)
     print(f"Conversion Complete!")
-    print(f"  Success: {success_count}")
-    print(f"  Failed:  {fail_count}")
+    print(f"  Success: {len(results['success'])}")
+    print(f"  Failed:  {len(results['failed'])}")
+    print(f"  Profile: run {profile.run_id} appended to {args.profile}")
     print("=" * 60)
 
+    if args.check_budgets is not None and results['success']:
+        paths = [os.path.join(OUTPUT_DIR, os.path.splitext(f)[0] + '.glb') for f in results['success']]
+        reports, budgets = check_files(paths, args.check_budgets or None)
+        print()
+        print_reports(reports, budgets)
+        over = [r['name'] for r in reports if r['over']]
+        if over:
+            print(f"\n{len(over)} of {len(reports)} ships over budget: {', '.join(over)}")
+            sys.exit(1)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,106 @@
+"""
+Vectorized geometry statistics of a ship's mesh objects.
+
+Vertex positions and loop-triangle indices of every object's evaluated mesh
+are pulled out in bulk with foreach_get, transformed to world space and
+concatenated, so exact bounds, counts, surface area and centre of mass come
+from a handful of NumPy operations instead of per-vertex Python loops.
+
+The centre of mass treats the ship as a thin shell of uniform density (the
+area-weighted mean of triangle centroids): the EVO meshes are open triangle
+soups, so they have no well-defined enclosed volume.
+
+render_models.py frames its camera with these bounds and writes the stats
+as a per-ship manifest:
+    {"ship": "Krait", "objects": 3, "vertices": 5412, "triangles": 1804,
+     "bounds": {"min": [...], "max": [...]}, "size": [...],
+     "surface_area": 12.6, "center_of_mass": [...],
+     "triangle_density": 143.2, "vertex_density": 429.5}
+(densities are per square model unit of surface).
+
+Import from a Blender script (scripts/ must be on sys.path):
+    from geometry_stats import analyze_objects, write_manifest
+"""
+
+import bpy
+import os
+import json
+import numpy as np
+
+
+def world_geometry(objects):
+    """World-space vertices (n, 3) and triangle vertex indices (m, 3) of the objects, evaluated."""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    positions = []
+    triangles = []
+    offset = 0
+
+    for obj in objects:
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh = evaluated.to_mesh()
+        try:
+            mesh.calc_loop_triangles()
+            co = np.empty(len(mesh.vertices) * 3, np.float64)
+            mesh.vertices.foreach_get('co', co)
+            indices = np.empty(len(mesh.loop_triangles) * 3, np.int64)
+            mesh.loop_triangles.foreach_get('vertices', indices)
+        finally:
+            evaluated.to_mesh_clear()
+
+        matrix = np.array(obj.matrix_world, dtype=np.float64)
+        positions.append(co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3])
+        triangles.append(indices.reshape(-1, 3) + offset)
+        offset += len(co) // 3
+
+    if not positions:
+        return np.zeros((0, 3)), np.zeros((0, 3), np.int64)
+    return np.concatenate(positions), np.concatenate(triangles)
+
+
+def geometry_stats(positions, triangles):
+    """Bounds, counts, surface area and centre of mass of world-space geometry; None if empty."""
+    if len(positions) == 0:
+        return None
+
+    low = positions.min(axis=0)
+    high = positions.max(axis=0)
+
+    corners = positions[triangles]
+    areas = 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1)
+    surface_area = float(areas.sum())
+    if surface_area > 0:
+        center_of_mass = (corners.mean(axis=1) * areas[:, None]).sum(axis=0) / surface_area
+    else:
+        center_of_mass = positions.mean(axis=0)
+
+    return {
+        'vertices': len(positions),
+        'triangles': len(triangles),
+        'bounds': {'min': low.tolist(), 'max': high.tolist()},
+        'size': (high - low).tolist(),
+        'surface_area': round(surface_area, 6),
+        'center_of_mass': center_of_mass.tolist(),
+        'triangle_density': round(len(triangles) / surface_area, 3) if surface_area > 0 else None,
+        'vertex_density': round(len(positions) / surface_area, 3) if surface_area > 0 else None,
+    }
+
+
+def analyze_objects(objects):
+    """geometry_stats() of a set of mesh objects, plus their count; None if they have no vertices."""
+    stats = geometry_stats(*world_geometry(objects))
+    if stats is not None:
+        stats['objects'] = len(objects)
+    return stats
+
+
+def stats_bounds(stats):
+    """The stats' bounds as ((min x, y, z), (max x, y, z)), the form render_models.py uses."""
+    return tuple(stats['bounds']['min']), tuple(stats['bounds']['max'])
+
+
+def write_manifest(ship_name, stats, path):
+    """Write one ship's stats as JSON, atomically."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'ship': ship_name, **stats}, f, indent=2)
+    os.replace(tmp_path, path)
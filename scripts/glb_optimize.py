@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Post-export optimization stage for the GLBs written by convert_blend_to_glb.py.
+
+For every triangle primitive this:
+1. Quantizes positions (16-bit), normals (8-bit) and UVs (16-bit) with
+   KHR_mesh_quantization; positions are dequantized by a wrapper node whose
+   translation and uniform scale map the integer grid back onto the model
+2. Welds vertices that are identical after quantization and drops
+   degenerate triangles
+3. Reorders triangles for the post-transform vertex cache (Forsyth) and
+   vertices for fetch locality
+4. Optionally compresses the result with gltfpack (EXT_meshopt_compression)
+
+A before/after size, vertex, triangle and cache-miss report is printed per
+ship. Meshes with morph targets, skins or sparse accessors are copied as-is.
+Files that already use KHR_mesh_quantization are skipped. Requires NumPy.
+
+Usage:
+    python glb_optimize.py                      # optimize evo_assets/models in place
+    python glb_optimize.py --output ../space-armada/assets/models
+    python glb_optimize.py Krait.glb --meshopt --report report.json
+"""
+
+import os
+import sys
+import json
+import shutil
+import struct
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: numpy is required. Run: pip install numpy")
+    sys.exit(1)
+
+from glb_reader import (
+    GLBFile, GLB_MAGIC, CHUNK_JSON, CHUNK_BIN, TRIANGLES,
+    BYTE, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT,
+)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'evo_assets', 'models')
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+QUANTIZATION_EXTENSION = 'KHR_mesh_quantization'
+CACHE_SIZE = 16  # Post-transform cache size assumed by the reorder and the ACMR report
+
+# Forsyth's vertex scoring constants
+CACHE_DECAY_POWER = 1.5
+LAST_TRI_SCORE = 0.75
+VALENCE_BOOST_SCALE = 2.0
+VALENCE_BOOST_POWER = 0.5
+MAX_VALENCE = 32
+
+
+def write_glb(path, gltf, binary):
+    """Write a GLB atomically, padding the chunks to 4 bytes."""
+    json_chunk = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    binary += b'\0' * (-len(binary) % 4)
+
+    chunks = struct.pack('<II', len(json_chunk), CHUNK_JSON) + json_chunk
+    if binary:
+        chunks += struct.pack('<II', len(binary), CHUNK_BIN) + binary
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack('<4sII', GLB_MAGIC, 2, 12 + len(chunks)))
+        f.write(chunks)
+    os.replace(tmp_path, path)
+
+
+class BufferBuilder:
+    """Accumulates bufferViews into one new BIN chunk."""
+
+    def __init__(self):
+        self.parts = []
+        self.length = 0
+        self.views = []
+
+    def add(self, data, target=None, stride=None):
+        """Append bytes (4-byte aligned) as a new bufferView and return its index."""
+        padding = -self.length % 4
+        if padding:
+            self.parts.append(b'\0' * padding)
+            self.length += padding
+
+        view = {'buffer': 0, 'byteOffset': self.length, 'byteLength': len(data)}
+        if target:
+            view['target'] = target
+        if stride:
+            view['byteStride'] = stride
+        self.parts.append(bytes(data))
+        self.length += len(data)
+        self.views.append(view)
+        return len(self.views) - 1
+
+    def tobytes(self):
+        return b''.join(self.parts)
+
+
+def vertex_score(cache_position, valence):
+    """Forsyth's score for a vertex at a cache position (-1 = not cached) with `valence` triangles left."""
+    if valence == 0:
+        return -1.0
+
+    score = 0.0
+    if cache_position >= 0:
+        if cache_position < 3:
+            score = LAST_TRI_SCORE
+        else:
+            scale = 1.0 / (CACHE_SIZE - 3)
+            score = (1.0 - (cache_position - 3) * scale) ** CACHE_DECAY_POWER
+    return score + VALENCE_BOOST_SCALE * valence ** -VALENCE_BOOST_POWER
+
+
+# Scores indexed by [cache_position + 1][valence]
+SCORE_TABLE = [[vertex_score(p, v) for v in range(MAX_VALENCE + 1)] for p in range(-1, CACHE_SIZE)]
+
+
+def optimize_vertex_cache(indices, vertex_count):
+    """Reorder triangles (flat index array) for the post-transform cache, after Forsyth."""
+    triangles = indices.reshape(-1, 3).tolist()
+    vertex_triangles = [[] for _ in range(vertex_count)]
+    for t, triangle in enumerate(triangles):
+        for v in triangle:
+            vertex_triangles[v].append(t)
+
+    cache_position = [-1] * vertex_count
+    score = [SCORE_TABLE[0][min(len(tris), MAX_VALENCE)] for tris in vertex_triangles]
+    emitted = [False] * len(triangles)
+    order = []
+    cache = []
+    next_unemitted = 0
+
+    best = max(range(len(triangles)), key=lambda t: sum(score[v] for v in triangles[t]), default=-1)
+    while best >= 0:
+        triangle = triangles[best]
+        emitted[best] = True
+        order.append(best)
+        for v in triangle:
+            vertex_triangles[v].remove(best)
+
+        new_cache = triangle + [v for v in cache if v not in triangle]
+        for v in new_cache[CACHE_SIZE:]:
+            cache_position[v] = -1
+            score[v] = SCORE_TABLE[0][min(len(vertex_triangles[v]), MAX_VALENCE)]
+        cache = new_cache[:CACHE_SIZE]
+        for position, v in enumerate(cache):
+            cache_position[v] = position
+            score[v] = SCORE_TABLE[position + 1][min(len(vertex_triangles[v]), MAX_VALENCE)]
+
+        # Only triangles touching the cache can have changed score
+        best = -1
+        best_score = -1.0
+        for v in cache:
+            for t in vertex_triangles[v]:
+                a, b, c = triangles[t]
+                s = score[a] + score[b] + score[c]
+                if s > best_score:
+                    best, best_score = t, s
+
+        if best < 0:
+            while next_unemitted < len(triangles) and emitted[next_unemitted]:
+                next_unemitted += 1
+            best = next_unemitted if next_unemitted < len(triangles) else -1
+
+    return np.asarray([triangles[t] for t in order], dtype=np.uint32).reshape(-1)
+
+
+def acmr(indices, cache_size=CACHE_SIZE):
+    """Average cache misses per triangle for a FIFO post-transform cache."""
+    if len(indices) == 0:
+        return 0.0
+    cache = []
+    cached = set()
+    misses = 0
+    for v in indices.tolist():
+        if v not in cached:
+            misses += 1
+            cache.append(v)
+            cached.add(v)
+            if len(cache) > cache_size:
+                cached.discard(cache.pop(0))
+    return misses / (len(indices) // 3)
+
+
+def weld(attributes, indices):
+    """Merge vertices whose attribute bytes are identical. Returns (attributes, indices)."""
+    count = len(next(iter(attributes.values())))
+    rows = np.concatenate([np.ascontiguousarray(a).view(np.uint8).reshape(count, -1)
+                           for a in attributes.values()], axis=1)
+    keys = np.ascontiguousarray(rows).view(np.dtype((np.void, rows.shape[1]))).ravel()
+    _, first, remap = np.unique(keys, return_index=True, return_inverse=True)
+
+    welded = {name: a[first] for name, a in attributes.items()}
+    return welded, remap.reshape(-1)[indices]
+
+
+def drop_degenerate(indices):
+    triangles = indices.reshape(-1, 3)
+    keep = ((triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2])
+            & (triangles[:, 0] != triangles[:, 2]))
+    return triangles[keep].reshape(-1)
+
+
+def optimize_vertex_fetch(attributes, indices):
+    """Renumber vertices in order of first use, dropping unused ones."""
+    _, first_use = np.unique(indices, return_index=True)
+    order = indices[np.sort(first_use)]
+    remap = np.empty(len(next(iter(attributes.values()))), dtype=np.uint32)
+    remap[order] = np.arange(len(order), dtype=np.uint32)
+    return {name: a[order] for name, a in attributes.items()}, remap[indices]
+
+
+def quantize_unit(values, dtype):
+    """Quantize values to a normalized integer type."""
+    info = np.iinfo(dtype)
+    low = -1.0 if info.min < 0 else 0.0
+    return np.rint(np.clip(values, low, 1.0) * info.max).astype(dtype)
+
+
+def quantize_attributes(attributes, offset, step):
+    """Quantize a primitive's float attributes. Returns {name: (array, componentType, normalized)}.
+
+    Attributes that cannot be quantized losslessly enough (UVs outside [0, 1],
+    colours, joints, ...) stay as they are.
+    """
+    quantized = {}
+    for name, data in attributes.items():
+        if name == 'POSITION' and step is not None:
+            q = np.rint((data - offset) / step).astype(np.uint16)
+            quantized[name] = (q, UNSIGNED_SHORT, False)
+        elif name == 'NORMAL':
+            q = quantize_unit(data, np.int8)
+            quantized[name] = (q, BYTE, True)
+        elif name == 'TANGENT':
+            q = quantize_unit(data, np.int8)
+            quantized[name] = (q, BYTE, True)
+        elif name.startswith('TEXCOORD_') and data.size and data.min() >= 0.0 and data.max() <= 1.0:
+            q = quantize_unit(data, np.uint16)
+            quantized[name] = (q, UNSIGNED_SHORT, True)
+        else:
+            quantized[name] = (data, FLOAT, False)
+    return quantized
+
+
+def add_vertex_accessor(gltf, builder, data, component_type, normalized, attribute_type, bounds=False):
+    """Write one vertex attribute in its own bufferView, padding each vertex to 4 bytes.
+
+    bounds=True records min/max, which glTF requires for POSITION.
+    """
+    count, components = data.shape
+    element = data.dtype.itemsize * components
+    stride = element + (-element % 4)
+    if stride != element:
+        padded = np.zeros((count, stride), np.uint8)
+        padded[:, :element] = np.ascontiguousarray(data).view(np.uint8).reshape(count, element)
+        raw = padded.tobytes()
+    else:
+        raw = np.ascontiguousarray(data).tobytes()
+
+    accessor = {
+        'bufferView': builder.add(raw, ARRAY_BUFFER, stride if stride != element else None),
+        'componentType': component_type,
+        'count': count,
+        'type': attribute_type,
+    }
+    if normalized:
+        accessor['normalized'] = True
+    if bounds and count:
+        accessor['min'] = data.min(axis=0).tolist()
+        accessor['max'] = data.max(axis=0).tolist()
+    gltf['accessors'].append(accessor)
+    return len(gltf['accessors']) - 1
+
+
+def add_index_accessor(gltf, builder, indices, vertex_count):
+    if vertex_count <= 65535:
+        component_type, data = UNSIGNED_SHORT, indices.astype(np.uint16)
+    else:
+        component_type, data = UNSIGNED_INT, indices.astype(np.uint32)
+    gltf['accessors'].append({
+        'bufferView': builder.add(data.tobytes(), ELEMENT_ARRAY_BUFFER),
+        'componentType': component_type,
+        'count': len(data),
+        'type': 'SCALAR',
+    })
+    return len(gltf['accessors']) - 1
+
+
+def mesh_is_optimizable(gltf, mesh_index):
+    """Only plain triangle meshes without morph targets, skins or sparse data are rewritten."""
+    for node in gltf.get('nodes', []):
+        if node.get('mesh') == mesh_index and ('skin' in node or 'weights' in node):
+            return False
+    for primitive in gltf['meshes'][mesh_index]['primitives']:
+        if primitive.get('mode', TRIANGLES) != TRIANGLES or 'targets' in primitive:
+            return False
+        if 'POSITION' not in primitive['attributes']:
+            return False
+        accessors = list(primitive['attributes'].values())
+        if 'indices' in primitive:
+            accessors.append(primitive['indices'])
+        if any('sparse' in gltf['accessors'][a] for a in accessors):
+            return False
+    return True
+
+
+def wrap_mesh_nodes(gltf, mesh_index, offset, step):
+    """Move the mesh onto a child node that dequantizes its positions."""
+    for node in list(gltf['nodes']):
+        if node.get('mesh') != mesh_index:
+            continue
+        gltf['nodes'].append({
+            'name': node.get('name', 'mesh') + '_dequantize',
+            'mesh': node.pop('mesh'),
+            'translation': offset.tolist(),
+            'scale': [float(step)] * 3,
+        })
+        node.setdefault('children', []).append(len(gltf['nodes']) - 1)
+
+
+def optimize_mesh(glb, builder, mesh_index, quantize, stats):
+    """Rewrite every primitive of one mesh into new accessors in `builder`."""
+    gltf = glb.json
+    mesh = gltf['meshes'][mesh_index]
+    primitives = []
+    for primitive in mesh['primitives']:
+        attributes = {name: glb.accessor_floats(a) for name, a in primitive['attributes'].items()}
+        count = len(attributes['POSITION'])
+        if 'indices' in primitive:
+            indices = glb.accessor(primitive['indices']).reshape(-1).astype(np.uint32)
+        else:
+            indices = np.arange(count, dtype=np.uint32)
+        primitives.append((primitive, attributes, indices))
+
+    offset = step = None
+    if quantize:
+        positions = np.concatenate([attributes['POSITION'] for _, attributes, _ in primitives])
+        offset = positions.min(axis=0)
+        extent = float((positions.max(axis=0) - offset).max())
+        step = extent / 65535 if extent > 0 else 1.0
+
+    for primitive, attributes, indices in primitives:
+        stats['vertices_before'] += len(attributes['POSITION'])
+        stats['triangles_before'] += len(indices) // 3
+        stats['acmr_before'].append((acmr(indices), len(indices) // 3))
+
+        if quantize:
+            encoded = quantize_attributes(attributes, offset, step)
+        else:
+            encoded = {name: (data, FLOAT, False) for name, data in attributes.items()}
+
+        arrays = {name: data for name, (data, _, _) in encoded.items()}
+        arrays, indices = weld(arrays, indices)
+        indices = drop_degenerate(indices)
+        if len(indices):
+            indices = optimize_vertex_cache(indices, len(arrays['POSITION']))
+            arrays, indices = optimize_vertex_fetch(arrays, indices)
+        else:
+            arrays = {name: data[:0] for name, data in arrays.items()}
+
+        stats['vertices_after'] += len(arrays['POSITION'])
+        stats['triangles_after'] += len(indices) // 3
+        stats['acmr_after'].append((acmr(indices), len(indices) // 3))
+
+        for name, (_, component_type, normalized) in encoded.items():
+            attribute_type = gltf['accessors'][primitive['attributes'][name]]['type']
+            primitive['attributes'][name] = add_vertex_accessor(
+                gltf, builder, arrays[name], component_type, normalized, attribute_type,
+                bounds=(name == 'POSITION'))
+        primitive['indices'] = add_index_accessor(gltf, builder, indices, len(arrays['POSITION']))
+
+    if quantize:
+        wrap_mesh_nodes(gltf, mesh_index, offset, step)
+
+
+def accessor_references(gltf):
+    """Yield (container, key) pairs for every place an accessor index is stored."""
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh['primitives']:
+            for name in primitive['attributes']:
+                yield primitive['attributes'], name
+            if 'indices' in primitive:
+                yield primitive, 'indices'
+            for target in primitive.get('targets', []):
+                for name in target:
+                    yield target, name
+    for skin in gltf.get('skins', []):
+        if 'inverseBindMatrices' in skin:
+            yield skin, 'inverseBindMatrices'
+    for animation in gltf.get('animations', []):
+        for sampler in animation['samplers']:
+            yield sampler, 'input'
+            yield sampler, 'output'
+
+
+def rebuild_buffer(glb, builder, new_accessor_start):
+    """Copy still-referenced original data into `builder` and drop unreferenced accessors and views."""
+    gltf = glb.json
+    references = list(accessor_references(gltf))
+    live = sorted({container[key] for container, key in references})
+    accessor_remap = {old: new for new, old in enumerate(live)}
+    for container, key in references:
+        container[key] = accessor_remap[container[key]]
+
+    view_remap = {}
+
+    def copy_view(index):
+        if index not in view_remap:
+            view = gltf['bufferViews'][index]
+            new_index = builder.add(glb.buffer_view(index), view.get('target'), view.get('byteStride'))
+            view_remap[index] = new_index
+        return view_remap[index]
+
+    accessors = []
+    for old in live:
+        accessor = gltf['accessors'][old]
+        if old < new_accessor_start:
+            if 'bufferView' in accessor:
+                accessor['bufferView'] = copy_view(accessor['bufferView'])
+            for part in ('indices', 'values'):
+                if part in accessor.get('sparse', {}):
+                    sparse = accessor['sparse'][part]
+                    sparse['bufferView'] = copy_view(sparse['bufferView'])
+        accessors.append(accessor)
+
+    for image in gltf.get('images', []):
+        if 'bufferView' in image:
+            image['bufferView'] = copy_view(image['bufferView'])
+
+    gltf['accessors'] = accessors
+    gltf['bufferViews'] = builder.views
+    return builder.tobytes()
+
+
+def optimize_gltf(glb, quantize=True):
+    """Optimize all eligible meshes of an open GLBFile, editing glb.json in place.
+
+    Returns (new BIN chunk bytes, stats). The new chunk holds copies, so the
+    source file can be closed and overwritten afterwards.
+    """
+    gltf = glb.json
+    stats = {
+        'vertices_before': 0, 'vertices_after': 0,
+        'triangles_before': 0, 'triangles_after': 0,
+        'acmr_before': [], 'acmr_after': [],
+    }
+    buffers = gltf.get('buffers', [])
+    if len(buffers) > 1 or any('uri' in b for b in buffers):
+        raise ValueError("only single-buffer GLBs are supported")
+
+    gltf.setdefault('accessors', [])
+    new_accessor_start = len(gltf['accessors'])
+    builder = BufferBuilder()
+
+    # New accessors are appended after the originals, then the originals they replace are dropped
+    for mesh_index in range(len(gltf.get('meshes', []))):
+        if mesh_is_optimizable(gltf, mesh_index):
+            optimize_mesh(glb, builder, mesh_index, quantize, stats)
+
+    binary = rebuild_buffer(glb, builder, new_accessor_start)
+    if binary:
+        gltf['buffers'] = [{'byteLength': len(binary)}]
+    else:
+        gltf.pop('buffers', None)
+        gltf.pop('bufferViews', None)
+    if quantize:
+        for key in ('extensionsUsed', 'extensionsRequired'):
+            extensions = gltf.setdefault(key, [])
+            if QUANTIZATION_EXTENSION not in extensions:
+                extensions.append(QUANTIZATION_EXTENSION)
+
+    for key in ('acmr_before', 'acmr_after'):
+        weighted = stats[key]
+        triangles = sum(t for _, t in weighted)
+        stats[key] = round(sum(a * t for a, t in weighted) / triangles, 3) if triangles else 0.0
+    return binary, stats
+
+
+def meshopt_compress(path):
+    """Compress a GLB in place with gltfpack (EXT_meshopt_compression), keeping node names."""
+    gltfpack = shutil.which('gltfpack')
+    if gltfpack is None:
+        raise RuntimeError("gltfpack not found on PATH (npm install -g gltfpack)")
+    tmp_path = path + '.meshopt.glb'
+    subprocess.run([gltfpack, '-i', path, '-o', tmp_path, '-c', '-kn', '-km'],
+                   check=True, capture_output=True)
+    os.replace(tmp_path, path)
+
+
+def optimize_file(source_path, output_path, quantize=True, meshopt=False):
+    """Optimize one GLB. Returns its report dict."""
+    report = {'name': os.path.basename(source_path), 'bytes_before': os.path.getsize(source_path)}
+
+    # The mapping must be closed before output_path (maybe the same file) is replaced
+    with GLBFile(source_path) as glb:
+        gltf = glb.json
+        skipped = QUANTIZATION_EXTENSION in gltf.get('extensionsUsed', [])
+        if not skipped:
+            binary, stats = optimize_gltf(glb, quantize)
+
+    if skipped:
+        report['status'] = 'skipped'
+        if os.path.abspath(source_path) != os.path.abspath(output_path):
+            shutil.copy2(source_path, output_path)
+        return report
+
+    write_glb(output_path, gltf, binary)
+    if meshopt:
+        meshopt_compress(output_path)
+
+    report.update(stats)
+    report['status'] = 'optimized'
+    report['bytes_after'] = os.path.getsize(output_path)
+    return report
+
+
+def optimize_task(args):
+    source_path, output_path, quantize, meshopt = args
+    try:
+        return optimize_file(source_path, output_path, quantize, meshopt)
+    except Exception as e:
+        return {'name': os.path.basename(source_path), 'status': 'failed', 'error': str(e)}
+
+
+def print_report(reports):
+    """Print a per-ship size, vertex, triangle and cache-miss table."""
+    print(f"\n{'Ship':<28} {'Before':>9} {'After':>9} {'Saved':>7} {'Verts':>15} {'Tris':>15} {'ACMR':>11}")
+    print("-" * 100)
+
+    totals = [0, 0]
+    for r in reports:
+        if r['status'] != 'optimized':
+            print(f"{r['name']:<28} {r['status']} {r.get('error', '')}")
+            continue
+        totals[0] += r['bytes_before']
+        totals[1] += r['bytes_after']
+        saved = 1 - r['bytes_after'] / r['bytes_before']
+        print(f"{r['name']:<28} {r['bytes_before'] / 1024:8.1f}K {r['bytes_after'] / 1024:8.1f}K {saved:6.1%} "
+              f"{r['vertices_before']:>7}>{r['vertices_after']:<7} {r['triangles_before']:>7}>{r['triangles_after']:<7} "
+              f"{r['acmr_before']:>5.2f}>{r['acmr_after']:<5.2f}")
+
+    if totals[0]:
+        print("-" * 100)
+        print(f"{'TOTAL':<28} {totals[0] / 1024:8.1f}K {totals[1] / 1024:8.1f}K {1 - totals[1] / totals[0]:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Weld, reorder and quantize exported ship GLBs")
+    parser.add_argument('files', nargs='*', help="GLB files (default: every .glb in evo_assets/models)")
+    parser.add_argument('--output', help="Output directory (default: overwrite the inputs)")
+    parser.add_argument('--no-quantize', action='store_true', help="Keep float attributes")
+    parser.add_argument('--meshopt', action='store_true', help="Also compress with gltfpack (EXT_meshopt_compression)")
+    parser.add_argument('--report', help="Write the per-ship report as JSON to this file")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    files = args.files or sorted(os.path.join(MODELS_DIR, f) for f in os.listdir(MODELS_DIR) if f.endswith('.glb'))
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    tasks = []
+    for path in files:
+        output_path = os.path.join(args.output, os.path.basename(path)) if args.output else path
+        tasks.append((path, output_path, not args.no_quantize, args.meshopt))
+
+    print(f"Optimizing {len(tasks)} GLBs" + (f" into {args.output}" if args.output else " in place"))
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        reports = list(pool.map(optimize_task, tasks))
+
+    print_report(reports)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+    if any(r['status'] == 'failed' for r in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
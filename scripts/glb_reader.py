@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Zero-copy GLB reader for inspecting exported ships without Blender.
+
+A GLB is memory-mapped; the JSON chunk is parsed once and accessors are
+returned as read-only NumPy arrays that view the mapped BIN chunk directly
+(strided views for interleaved data), so nothing is copied until a caller
+asks for it. Node transforms, including the dequantization wrapper nodes
+written by glb_optimize.py, are applied when computing bounds.
+
+Arrays keep the mapping alive: GLBFile.close() leaves the mapping open if
+views of it still exist, and it is released once they are garbage collected.
+Requires NumPy.
+
+Library use (scripts/ on sys.path):
+    from glb_reader import GLBFile
+    with GLBFile('Krait.glb') as glb:
+        positions = glb.accessor(glb.json['meshes'][0]['primitives'][0]['attributes']['POSITION'])
+
+Command line (default: every .glb in evo_assets/models):
+    python glb_reader.py
+    python glb_reader.py ../evo_assets/models/Krait.glb --json
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    print("ERROR: numpy is required. Run: pip install numpy")
+    sys.exit(1)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'evo_assets', 'models')
+
+GLB_MAGIC = b'glTF'
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+BYTE, UNSIGNED_BYTE, SHORT, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5121, 5122, 5123, 5125, 5126
+COMPONENT_DTYPES = {
+    BYTE: np.int8, UNSIGNED_BYTE: np.uint8, SHORT: np.int16,
+    UNSIGNED_SHORT: np.uint16, UNSIGNED_INT: np.uint32, FLOAT: np.float32,
+}
+TYPE_SIZES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+TRIANGLES = 4
+
+
+class GLBFile:
+    """A memory-mapped GLB: parsed JSON in .json, the BIN chunk as a memoryview in .bin.
+
+    data, if given, is a buffer already holding the GLB (such as a slice of an
+    asset bundle); it is used in place of mapping path, which then only names it.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        self._mmap = None
+        if data is None:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            data = self._mmap
+        self._view = data = memoryview(data)
+
+        magic, version, length = struct.unpack_from('<4sII', data, 0)
+        if magic != GLB_MAGIC or version != 2:
+            self.close()
+            raise ValueError(f"{path} is not a glTF 2.0 binary")
+
+        self.json = None
+        self._bin_array = None
+        self.bin = data[0:0]
+        offset = 12
+        while offset + 8 <= length:
+            chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+            chunk = data[offset + 8:offset + 8 + chunk_length]
+            if chunk_type == CHUNK_JSON:
+                self.json = json.loads(bytes(chunk))
+            elif chunk_type == CHUNK_BIN:
+                self.bin = chunk
+            offset += 8 + chunk_length
+
+        if self.json is None:
+            self.close()
+            raise ValueError(f"{path} has no JSON chunk")
+
+        # Accessor arrays are views of this one; np.frombuffer holds a buffer
+        # export on the mapping, so it cannot be unmapped under them
+        self._bin_array = np.frombuffer(self.bin, np.uint8)
+
+    def close(self):
+        self.bin = None
+        self._bin_array = None
+        try:
+            self._view.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            pass  # Arrays still view the mapping; it is freed when they are
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def buffer_view(self, index):
+        """The bytes of a bufferView, as a memoryview of the mapping."""
+        view = self.json['bufferViews'][index]
+        start = view.get('byteOffset', 0)
+        return self.bin[start:start + view['byteLength']]
+
+    def accessor(self, index):
+        """Accessor data as a read-only (count, components) array in its stored type, without copying.
+
+        Accessors without a bufferView read as zeros; sparse substitution is
+        not applied.
+        """
+        accessor = self.json['accessors'][index]
+        dtype = np.dtype(COMPONENT_DTYPES[accessor['componentType']])
+        components = TYPE_SIZES[accessor['type']]
+        count = accessor['count']
+
+        if 'bufferView' not in accessor:
+            return np.zeros((count, components), dtype)
+
+        view = self.json['bufferViews'][accessor['bufferView']]
+        offset = view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+        stride = view.get('byteStride', components * dtype.itemsize)
+        return np.ndarray((count, components), dtype, self._bin_array, offset, (stride, dtype.itemsize))
+
+    def accessor_floats(self, index):
+        """Accessor data as a new float32 array, dequantizing normalized integers."""
+        return dequantize(self.accessor(index), self.json['accessors'][index].get('normalized', False))
+
+
+def dequantize(data, normalized):
+    """Integer accessor data as float32, mapping normalized integers onto [-1, 1] / [0, 1]."""
+    if not normalized or data.dtype.kind == 'f':
+        return data.astype(np.float32)
+    info = np.iinfo(data.dtype)
+    return np.maximum(data.astype(np.float32) / info.max, -1.0)
+
+
+def node_matrix(node):
+    """Local 4x4 transform of a glTF node (column vectors)."""
+    if 'matrix' in node:
+        return np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T
+
+    x, y, z, w = node.get('rotation', [0.0, 0.0, 0.0, 1.0])
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.array(node.get('scale', [1.0, 1.0, 1.0]))
+    matrix[:3, 3] = node.get('translation', [0.0, 0.0, 0.0])
+    return matrix
+
+
+def mesh_instances(gltf):
+    """Yield (mesh index, world matrix) for every mesh node in the default scene."""
+    nodes = gltf.get('nodes', [])
+    scenes = gltf.get('scenes', [])
+    if scenes:
+        roots = scenes[gltf.get('scene', 0)].get('nodes', [])
+    else:
+        children = {c for node in nodes for c in node.get('children', [])}
+        roots = [i for i in range(len(nodes)) if i not in children]
+
+    stack = [(i, np.eye(4)) for i in roots]
+    while stack:
+        index, parent = stack.pop()
+        node = nodes[index]
+        world = parent @ node_matrix(node)
+        if 'mesh' in node:
+            yield node['mesh'], world
+        stack.extend((child, world) for child in node.get('children', []))
+
+
+def position_bounds(gltf, accessor_index):
+    """Local (min, max) of a POSITION accessor from its required min/max, dequantized."""
+    accessor = gltf['accessors'][accessor_index]
+    dtype = COMPONENT_DTYPES[accessor['componentType']]
+    low = np.array(accessor['min'], dtype=np.float64)
+    high = np.array(accessor['max'], dtype=np.float64)
+    if accessor.get('normalized') and dtype is not np.float32:
+        info = np.iinfo(dtype)
+        low, high = np.maximum(low / info.max, -1.0), np.maximum(high / info.max, -1.0)
+    return low, high
+
+
+def scene_bounds(gltf):
+    """World-space (min, max) of the default scene, from accessor bounds and node transforms."""
+    corners = []
+    for mesh_index, world in mesh_instances(gltf):
+        for primitive in gltf['meshes'][mesh_index]['primitives']:
+            if 'POSITION' not in primitive['attributes']:
+                continue
+            low, high = position_bounds(gltf, primitive['attributes']['POSITION'])
+            box = np.array([[x, y, z, 1.0] for x in (low[0], high[0])
+                            for y in (low[1], high[1]) for z in (low[2], high[2])])
+            corners.append((box @ world.T)[:, :3])
+
+    if not corners:
+        return None
+    corners = np.concatenate(corners)
+    return corners.min(axis=0), corners.max(axis=0)
+
+
+def primitive_triangles(gltf, primitive):
+    """Number of triangles drawn by a primitive (0 for points and lines)."""
+    mode = primitive.get('mode', TRIANGLES)
+    if 'indices' in primitive:
+        count = gltf['accessors'][primitive['indices']]['count']
+    else:
+        count = gltf['accessors'][primitive['attributes']['POSITION']]['count']
+    if mode == TRIANGLES:
+        return count // 3
+    if mode in (5, 6):  # Triangle strip / fan
+        return max(count - 2, 0)
+    return 0
+
+
+def material_summary(gltf, index):
+    material = gltf['materials'][index]
+    pbr = material.get('pbrMetallicRoughness', {})
+    return {
+        'name': material.get('name', f"material_{index}"),
+        'base_color': [round(c, 4) for c in pbr.get('baseColorFactor', [1.0, 1.0, 1.0, 1.0])],
+        'textured': 'baseColorTexture' in pbr,
+    }
+
+
+def summarize(path):
+    """Triangle and vertex counts, bounds and materials of one GLB, as a dict.
+
+    Counts are per drawn instance, so meshes used by several nodes count once
+    per node.
+    """
+    with GLBFile(path) as glb:
+        gltf = glb.json
+        triangles = vertices = primitives = 0
+        instances = list(mesh_instances(gltf))
+        for mesh_index, _ in instances:
+            for primitive in gltf['meshes'][mesh_index]['primitives']:
+                primitives += 1
+                triangles += primitive_triangles(gltf, primitive)
+                vertices += gltf['accessors'][primitive['attributes']['POSITION']]['count']
+
+        bounds = scene_bounds(gltf)
+        return {
+            'name': os.path.basename(path),
+            'bytes': os.path.getsize(path),
+            'meshes': len(gltf.get('meshes', [])),
+            'mesh_nodes': len(instances),
+            'primitives': primitives,
+            'vertices': vertices,
+            'triangles': triangles,
+            'bounds_min': bounds[0].round(4).tolist() if bounds else None,
+            'bounds_max': bounds[1].round(4).tolist() if bounds else None,
+            'materials': [material_summary(gltf, i) for i in range(len(gltf.get('materials', [])))],
+            'extensions': gltf.get('extensionsUsed', []),
+        }
+
+
+def print_summaries(summaries):
+    print(f"{'Ship':<28} {'Size':>9} {'Nodes':>6} {'Verts':>8} {'Tris':>8} {'Mats':>5}  Dimensions (x, y, z)")
+    print("-" * 96)
+    for s in summaries:
+        if s['bounds_min'] is not None:
+            size = [hi - lo for lo, hi in zip(s['bounds_min'], s['bounds_max'])]
+            dims = " x ".join(f"{d:.2f}" for d in size)
+        else:
+            dims = "-"
+        print(f"{s['name']:<28} {s['bytes'] / 1024:8.1f}K {s['mesh_nodes']:>6} {s['vertices']:>8} "
+              f"{s['triangles']:>8} {len(s['materials']):>5}  {dims}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect GLB files without Blender")
+    parser.add_argument('files', nargs='*', help="GLB files (default: every .glb in evo_assets/models)")
+    parser.add_argument('--json', action='store_true', help="Print the summaries as JSON")
+    args = parser.parse_args()
+
+    files = args.files or sorted(os.path.join(MODELS_DIR, f) for f in os.listdir(MODELS_DIR) if f.endswith('.glb'))
+
+    start = time.perf_counter()
+    summaries = [summarize(path) for path in files]
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    else:
+        print_summaries(summaries)
+        print(f"\nInspected {len(summaries)} files in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+LOD chain generation for the glTF export script.
+
+The EVO meshes are triangle soups (every face has its own vertices), so each
+mesh first gets a Weld modifier, then a Decimate (collapse) modifier at the
+level's triangle ratio from LOD_RATIOS. Vertices on the top-down contour
+(edges between up- and down-facing faces, plus open edges) go in a vertex
+group that the modifier protects, so the outline the game camera sees survives.
+Every level is then checked by rasterizing the top-down silhouette and
+comparing it with the full-detail one; below LOD_MIN_IOU the ratio is backed
+off towards the previous level until it passes. A level that can only pass
+at the previous level's ratio ends the chain.
+
+Protecting the contour means the coarsest levels can keep more triangles
+than their ratio asks for; the manifest records the Decimate ratio and the
+triangle count actually reached. It also records, per level, the silhouette IoU and
+max_screen_px: the largest on-screen size (in pixels across the ship) at
+which the level's mean outline error stays under one pixel. switch_distance
+converts that to a camera distance for a perspective camera (see
+REFERENCE_CAMERA); the game's orthographic view can compare max_screen_px
+with the ship's projected size directly.
+
+Import from a Blender script (scripts/ must be on sys.path):
+    from lod_chain import generate_lod_chain
+"""
+
+import bpy
+import os
+import math
+import json
+import numpy as np
+
+from silhouette import SILHOUETTE_SIZE, silhouette_frame, rasterize_silhouette
+
+# Triangle ratios of LOD1, LOD2, ... relative to the full-detail mesh (LOD0)
+LOD_RATIOS = [0.5, 0.2, 0.05]
+
+# A level must keep at least this much of the full-detail silhouette
+LOD_MIN_IOU = 0.97
+# Each back-off multiplies the ratio by this, up to the previous level's ratio
+LOD_BACKOFF = 1.5
+
+WELD_DISTANCE = 1e-4  # Vertices closer than this are merged before decimating
+
+SILHOUETTE_GROUP = 'evo_silhouette'
+# Decimate vertex-group factor: how strongly contour vertices resist collapsing
+SILHOUETTE_WEIGHT_FACTOR = 10.0
+
+# Camera used for switch_distance: the shipyard preview's perspective camera,
+# with ships normalized to the game's 60-unit size, on a 1080px-tall viewport
+REFERENCE_CAMERA = {'fov_degrees': 45.0, 'viewport_px': 1080, 'ship_size': 60.0}
+
+def evaluated_triangles(objects):
+    """World-space triangles (n, 3, 3) of the objects with their modifiers applied."""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    triangles = []
+
+    for obj in objects:
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh = evaluated.to_mesh()
+        try:
+            mesh.calc_loop_triangles()
+            co = np.empty(len(mesh.vertices) * 3, np.float32)
+            mesh.vertices.foreach_get('co', co)
+            indices = np.empty(len(mesh.loop_triangles) * 3, np.int32)
+            mesh.loop_triangles.foreach_get('vertices', indices)
+        finally:
+            evaluated.to_mesh_clear()
+
+        matrix = np.array(obj.matrix_world, dtype=np.float32)
+        world = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+        triangles.append(world[indices.reshape(-1, 3)])
+
+    return np.concatenate(triangles) if triangles else np.zeros((0, 3, 3), np.float32)
+
+def silhouette_error(reference, mask):
+    """(IoU, mean outline displacement in raster pixels) of a mask against the reference."""
+    union = (reference | mask).sum()
+    iou = float((reference & mask).sum() / union) if union else 1.0
+
+    # Outline pixels: covered pixels with an uncovered 4-neighbour
+    padded = np.pad(reference, 1)
+    interior = padded[:-2, 1:-1] & padded[2:, 1:-1] & padded[1:-1, :-2] & padded[1:-1, 2:]
+    outline = (reference & ~interior).sum()
+    displacement = float((reference ^ mask).sum() / outline) if outline else 0.0
+    return iou, displacement
+
+def contour_vertices(obj):
+    """Indices of vertices on the top-down contour of a mesh object.
+
+    Works on the welded topology: vertices are identified by position, so
+    faces that only share corner positions still count as neighbours.
+    """
+    mesh = obj.data
+    co = np.empty(len(mesh.vertices) * 3, np.float32)
+    mesh.vertices.foreach_get('co', co)
+    _, position_id = np.unique(np.round(co.reshape(-1, 3) / WELD_DISTANCE), axis=0, return_inverse=True)
+    position_id = position_id.reshape(-1)
+
+    loop_vertices = np.empty(len(mesh.loops), np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+    loop_start = np.empty(len(mesh.polygons), np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_start)
+    loop_total = np.empty(len(mesh.polygons), np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_total)
+    normals = np.empty(len(mesh.polygons) * 3, np.float32)
+    mesh.polygons.foreach_get('normal', normals)
+
+    normal_matrix = np.array(obj.matrix_world.to_3x3().inverted_safe().transposed(), dtype=np.float32)
+    facing_up = (normals.reshape(-1, 3) @ normal_matrix.T)[:, 2] > 0
+
+    # Each loop's edge runs to the next loop of its polygon
+    next_loop = np.arange(len(mesh.loops)) + 1
+    polygon_end = loop_start + loop_total
+    next_loop[polygon_end - 1] = loop_start
+    a = position_id[loop_vertices]
+    b = position_id[loop_vertices[next_loop]]
+    edges, edge_index = np.unique(np.sort(np.stack([a, b], axis=1), axis=1), axis=0, return_inverse=True)
+    edge_index = edge_index.reshape(-1)
+
+    faces = np.bincount(edge_index, minlength=len(edges))
+    up = np.bincount(edge_index, weights=np.repeat(facing_up, loop_total), minlength=len(edges))
+    contour = (faces == 1) | (faces > 2) | ((up > 0) & (up < faces))
+
+    contour_positions = np.zeros(position_id.max() + 1, bool)
+    contour_positions[edges[contour].reshape(-1)] = True
+    return np.flatnonzero(contour_positions[position_id]).tolist()
+
+def add_decimate_modifiers(objects):
+    """Give every object a protected-contour vertex group, a Weld and a Decimate modifier.
+
+    Returns the (weld, decimate) modifier pairs.
+    """
+    modifiers = []
+    for obj in objects:
+        group = obj.vertex_groups.get(SILHOUETTE_GROUP) or obj.vertex_groups.new(name=SILHOUETTE_GROUP)
+        group.add(contour_vertices(obj), 1.0, 'REPLACE')
+
+        weld = obj.modifiers.new(name='EVO_LOD_Weld', type='WELD')
+        weld.merge_threshold = WELD_DISTANCE
+
+        modifier = obj.modifiers.new(name='EVO_LOD', type='DECIMATE')
+        modifier.decimate_type = 'COLLAPSE'
+        modifier.use_collapse_triangulate = True
+        modifier.vertex_group = SILHOUETTE_GROUP
+        # Decimate collapses low-weight vertices last, so invert: the contour gets weight 0
+        modifier.invert_vertex_group = True
+        modifier.vertex_group_factor = SILHOUETTE_WEIGHT_FACTOR
+        modifiers.append((weld, modifier))
+    return modifiers
+
+def is_lod_file(name, ship_name):
+    """True if name is one of a ship's LOD GLBs (<ship>.lod<N>.glb)."""
+    prefix = ship_name + '.lod'
+    return name.startswith(prefix) and name.endswith('.glb') and name[len(prefix):-4].isdigit()
+
+def lod_files(lod_dir, ship_name):
+    """Paths of the LOD GLBs (LOD1 and coarser) currently in lod_dir for a ship."""
+    if not os.path.isdir(lod_dir):
+        return []
+    return sorted(os.path.join(lod_dir, f) for f in os.listdir(lod_dir) if is_lod_file(f, ship_name))
+
+def switch_distance(max_screen_px):
+    """Distance at which a ship on REFERENCE_CAMERA shrinks to max_screen_px pixels across."""
+    camera = REFERENCE_CAMERA
+    half_fov = math.radians(camera['fov_degrees']) / 2
+    return camera['ship_size'] * camera['viewport_px'] / (2 * math.tan(half_fov) * max_screen_px)
+
+def generate_lod_chain(objects, ship_name, lod_dir, export_glb, base_file):
+    """Decimate the scene's mesh objects into LOD GLBs in lod_dir and write the ship's manifest.
+
+    export_glb(path) exports the current scene with modifiers applied;
+    base_file is the already-exported LOD0 GLB. Returns the manifest dict.
+    """
+    meshes = [obj for obj in objects if obj is not None and obj.type == 'MESH']
+    os.makedirs(lod_dir, exist_ok=True)
+    # A shorter chain than last time must not leave stale levels behind
+    for path in lod_files(lod_dir, ship_name):
+        os.remove(path)
+
+    full = evaluated_triangles(meshes)
+    origin, scale = silhouette_frame(full) if len(full) else (np.zeros(2), 1.0)
+    reference = rasterize_silhouette(full, origin, scale)
+
+    levels = [{
+        'level': 0,
+        'file': os.path.relpath(base_file, lod_dir),
+        'ratio': 1.0,
+        'triangles': len(full),
+        'triangle_ratio': 1.0,
+        'iou': 1.0,
+        'max_screen_px': None,
+        'switch_distance': 0.0,
+    }]
+
+    modifiers = add_decimate_modifiers(meshes)
+    try:
+        for target_ratio in LOD_RATIOS:
+            previous = levels[-1]
+            ratio = target_ratio
+            while True:
+                for _, decimate in modifiers:
+                    decimate.ratio = ratio
+                triangles = evaluated_triangles(meshes)
+                iou, displacement = silhouette_error(reference, rasterize_silhouette(triangles, origin, scale))
+                if iou >= LOD_MIN_IOU or ratio >= previous['ratio']:
+                    break
+                ratio = min(ratio * LOD_BACKOFF, previous['ratio'])
+
+            if iou < LOD_MIN_IOU or ratio >= previous['ratio'] or len(triangles) >= previous['triangles']:
+                print(f"    LOD{len(levels)}: no coarser level keeps IoU >= {LOD_MIN_IOU}, chain ends")
+                break
+
+            # Mean outline error stays under one screen pixel up to this size; a ship
+            # larger than the reference viewport never needs a finer bound
+            viewport_px = REFERENCE_CAMERA['viewport_px']
+            max_screen_px = min(SILHOUETTE_SIZE / displacement, viewport_px) if displacement else viewport_px
+            if previous['max_screen_px'] is not None:
+                max_screen_px = min(max_screen_px, previous['max_screen_px'])
+
+            level = len(levels)
+            path = os.path.join(lod_dir, f"{ship_name}.lod{level}.glb")
+            export_glb(path)
+            levels.append({
+                'level': level,
+                'file': os.path.basename(path),
+                'ratio': round(ratio, 4),
+                'triangles': len(triangles),
+                'triangle_ratio': round(len(triangles) / len(full), 4) if len(full) else 1.0,
+                'iou': round(iou, 4),
+                'max_screen_px': round(max_screen_px, 1),
+                'switch_distance': round(switch_distance(max_screen_px), 1),
+            })
+            print(f"    LOD{level}: {len(triangles)} triangles (ratio {ratio:.3f}, IoU {iou:.3f}, "
+                  f"below {max_screen_px:.0f}px)")
+    finally:
+        for obj, pair in zip(meshes, modifiers):
+            for modifier in pair:
+                obj.modifiers.remove(modifier)
+
+    manifest = {
+        'ship': ship_name,
+        'silhouette_size': SILHOUETTE_SIZE,
+        'min_iou': LOD_MIN_IOU,
+        'reference_camera': REFERENCE_CAMERA,
+        'levels': levels,
+    }
+    # Replaced rather than rewritten: the previous manifest may be a read-only asset store link
+    manifest_path = os.path.join(lod_dir, ship_name + '.lods.json')
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
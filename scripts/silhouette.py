@@ -0,0 +1,68 @@
+"""
+Top-down silhouette rasterizer shared by the LOD checks and the collision volumes.
+
+Triangles are projected onto their first two coordinates (XY in Blender,
+the top-down view render_models.py renders) and sampled at pixel centres on
+a SILHOUETTE_SIZE square raster. Needs only NumPy, so it runs both inside
+Blender and on exported GLBs.
+"""
+
+import numpy as np
+
+SILHOUETTE_SIZE = 256  # Raster size (pixels across the ship)
+
+
+def silhouette_frame(triangles):
+    """(origin, pixels per unit) mapping the triangles' XY bounds onto the raster, with a margin."""
+    xy = triangles[..., :2].reshape(-1, 2)
+    low, high = xy.min(axis=0), xy.max(axis=0)
+    extent = float((high - low).max()) or 1.0
+    scale = (SILHOUETTE_SIZE - 4) / extent
+    origin = (low + high) / 2 - (SILHOUETTE_SIZE / 2) / scale
+    return origin, scale
+
+
+def rasterize_silhouette(triangles, origin, scale):
+    """Top-down (XY) coverage mask of triangles, sampled at pixel centres.
+
+    Triangles are bucketed by the size of their pixel bounding box so each
+    bucket is tested against a k x k grid in one vectorized step.
+    """
+    size = SILHOUETTE_SIZE
+    mask = np.zeros((size, size), bool)
+    if len(triangles) == 0:
+        return mask
+
+    points = (triangles[..., :2] - origin) * scale
+    low = np.floor(points.min(axis=1)).astype(np.int64)
+    extent = (np.ceil(points.max(axis=1)).astype(np.int64) - low).max(axis=1)
+
+    previous = -1
+    k = 1
+    while previous < extent.max():
+        bucket = np.flatnonzero((extent > previous) & (extent <= k))
+        if len(bucket):
+            p = points[bucket]
+            offsets = np.arange(k + 1)
+            xs = low[bucket, 0, None, None] + offsets[None, None, :]
+            ys = low[bucket, 1, None, None] + offsets[None, :, None]
+            cx = xs + 0.5
+            cy = ys + 0.5
+
+            def edge(a, b):
+                ax, ay = p[:, a, 0, None, None], p[:, a, 1, None, None]
+                bx, by = p[:, b, 0, None, None], p[:, b, 1, None, None]
+                return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+            w0, w1, w2 = edge(0, 1), edge(1, 2), edge(2, 0)
+            inside = ((w0 >= 0) & (w1 >= 0) & (w2 >= 0)) | ((w0 <= 0) & (w1 <= 0) & (w2 <= 0))
+            inside &= (w0 != 0) | (w1 != 0) | (w2 != 0)
+
+            xs = np.broadcast_to(xs, inside.shape)[inside]
+            ys = np.broadcast_to(ys, inside.shape)[inside]
+            valid = (xs >= 0) & (xs < size) & (ys >= 0) & (ys < size)
+            mask[ys[valid], xs[valid]] = True
+        previous = k
+        k *= 2
+
+    return mask
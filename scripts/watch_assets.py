@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Watch evo_assets/evo_models/Blender and rebuild only the .blend that changed.
+
+Keeps one warm background Blender running asset_daemon.py, so a saved .blend
+is re-converted to .glb (which the asset store links into
+space-armada/assets/models) and re-rendered within a couple of seconds,
+without paying Blender's startup cost per change. Uses inotify when the
+optional inotify_simple package is installed, and falls back to polling
+file mtimes otherwise.
+
+Usage:
+    python watch_assets.py
+    python watch_assets.py --blender /path/to/blender --ops convert
+    python watch_assets.py --poll --verbose
+    python watch_assets.py --optimize --lods --collision
+"""
+
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+import subprocess
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+BLEND_DIR = os.path.join(REPO_DIR, 'evo_assets', 'evo_models', 'Blender')
+
+DAEMON_SCRIPT = os.path.join(SCRIPTS_DIR, 'asset_daemon.py')
+RESPONSE_MARKER = "@@ASSET_DAEMON@@"
+
+DEBOUNCE_SECONDS = 0.3  # Quiet time after the last event before a file is rebuilt
+POLL_INTERVAL = 0.5
+STARTUP_TIMEOUT = 120
+COMMAND_TIMEOUT = 600
+
+
+class BlenderWorker:
+    """One background Blender process running asset_daemon.py, restarted if it dies."""
+
+    def __init__(self, blender, backend, verbose=False, max_rss_mb=0, convert_args=()):
+        self.blender = blender
+        self.backend = backend
+        self.convert_args = list(convert_args)
+        self.verbose = verbose
+        self.max_rss_mb = max_rss_mb
+        self.process = None
+        self.responses = None
+        self.next_id = 1
+
+    def start(self):
+        """Launch Blender and wait until the daemon reports it is ready."""
+        cmd = [
+            self.blender, '--background', '--factory-startup',
+            '--python', DAEMON_SCRIPT, '--', '--backend', self.backend,
+            '--max-rss-mb', str(self.max_rss_mb), *self.convert_args,
+        ]
+        print(f"Starting warm Blender: {' '.join(cmd)}")
+        start = time.perf_counter()
+
+        self.process = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1,
+        )
+        self.responses = queue.Queue()
+        threading.Thread(target=self._read_output, args=(self.process, self.responses), daemon=True).start()
+
+        ready = self._wait_response(STARTUP_TIMEOUT)
+        if not ready or not ready.get('ready'):
+            raise RuntimeError("Blender asset daemon failed to start (run with --verbose for its output)")
+        print(f"Blender ready in {time.perf_counter() - start:.1f}s (backend: {ready['backend']})")
+
+    def _read_output(self, process, responses):
+        """Forward daemon replies to the response queue; echo everything else if verbose."""
+        for line in process.stdout:
+            if line.startswith(RESPONSE_MARKER):
+                responses.put(json.loads(line[len(RESPONSE_MARKER):]))
+            elif self.verbose:
+                print(f"  [blender] {line.rstrip()}")
+        responses.put(None)  # Process exited
+
+    def _wait_response(self, timeout):
+        try:
+            return self.responses.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def call(self, op, blend_file):
+        """Run one command in the warm process. Returns the daemon's reply dict."""
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+
+        command = {'id': self.next_id, 'op': op, 'file': blend_file}
+        self.next_id += 1
+        self.process.stdin.write(json.dumps(command) + "\n")
+        self.process.stdin.flush()
+
+        response = self._wait_response(COMMAND_TIMEOUT)
+        if response is None:
+            # Crashed or hung: kill it so the next call starts a fresh Blender
+            self.process.kill()
+            return {'ok': False, 'error': 'Blender exited or timed out'}
+        if response.get('restart'):
+            # The daemon exits once over its memory ceiling; the next call starts a fresh one
+            print(f"  Blender RSS {response['rss_mb']:.0f} MB is over {self.max_rss_mb:.0f} MB, restarting")
+            self.process.wait(timeout=30)
+        return response
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.stdin.write(json.dumps({'op': 'quit'}) + "\n")
+            self.process.stdin.flush()
+            self.process.wait(timeout=30)
+
+
+def snapshot(blend_dir):
+    """Map each .blend in the directory to its (mtime, size)."""
+    result = {}
+    for f in os.listdir(blend_dir):
+        if f.endswith('.blend'):
+            stat = os.stat(os.path.join(blend_dir, f))
+            result[f] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+def poll_changes(blend_dir):
+    """Yield sets of changed .blend names, found by polling; a file must be stable for one poll."""
+    previous = snapshot(blend_dir)
+    pending = set()
+
+    while True:
+        time.sleep(POLL_INTERVAL)
+        current = snapshot(blend_dir)
+        changed = {name for name, sig in current.items() if previous.get(name) != sig}
+
+        ready = pending - changed
+        pending = (pending | changed) - ready
+        previous = current
+
+        ready &= set(current)  # Ignore files deleted while pending
+        if ready:
+            yield ready
+
+
+def inotify_changes(blend_dir):
+    """Yield sets of changed .blend names from inotify, debounced by DEBOUNCE_SECONDS."""
+    inotify = INotify()
+    # Blender saves to a temporary file and renames it over the .blend
+    inotify.add_watch(blend_dir, flags.CLOSE_WRITE | flags.MOVED_TO)
+    pending = {}
+
+    while True:
+        timeout = int(DEBOUNCE_SECONDS * 1000) if pending else None
+        for event in inotify.read(timeout=timeout):
+            if event.name.endswith('.blend'):
+                pending[event.name] = time.monotonic()
+
+        now = time.monotonic()
+        ready = {name for name, seen in pending.items() if now - seen >= DEBOUNCE_SECONDS}
+        for name in ready:
+            del pending[name]
+        if ready:
+            yield ready
+
+
+def rebuild(worker, blend_file, ops):
+    """Run the requested ops for one changed file and report the time taken."""
+    start = time.perf_counter()
+    print(f"\nChanged: {blend_file}")
+
+    for op in ops:
+        response = worker.call(op, blend_file)
+        if not response['ok']:
+            print(f"  {op}: FAILED {response.get('error') or ''}")
+            return
+        print(f"  {op}: {response['elapsed']:.2f}s")
+
+    print(f"  done in {time.perf_counter() - start:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild changed .blend files with a warm Blender")
+    parser.add_argument('--blender', default='blender', help="Blender executable (default: blender)")
+    parser.add_argument('--backend', default='auto', help="Render backend passed to render_models.py")
+    parser.add_argument('--ops', nargs='+', choices=['convert', 'render'], default=['convert', 'render'],
+                        help="What to rebuild for a changed file (default: convert render)")
+    parser.add_argument('--poll', action='store_true', help="Poll file mtimes even if inotify is available")
+    parser.add_argument('--verbose', action='store_true', help="Echo Blender's own output")
+    parser.add_argument('--max-rss-mb', type=float, default=0,
+                        help="Restart the warm Blender when its RSS passes this many MB (default: never)")
+    parser.add_argument('--optimize', action='store_true',
+                        help="Optimize converted GLBs, as in convert_blend_to_glb.py")
+    parser.add_argument('--lods', action='store_true',
+                        help="Regenerate LOD chains, as in convert_blend_to_glb.py")
+    parser.add_argument('--collision', action='store_true',
+                        help="Rewrite collision sidecars, as in convert_blend_to_glb.py")
+    args = parser.parse_args()
+
+    convert_args = [f"--{flag}" for flag in ('optimize', 'lods', 'collision') if getattr(args, flag)]
+    worker = BlenderWorker(args.blender, args.backend, args.verbose, args.max_rss_mb, convert_args)
+    worker.start()
+
+    if INotify is not None and not args.poll:
+        print(f"Watching {BLEND_DIR} (inotify)")
+        changes = inotify_changes(BLEND_DIR)
+    else:
+        print(f"Watching {BLEND_DIR} (polling every {POLL_INTERVAL}s)")
+        changes = poll_changes(BLEND_DIR)
+
+    try:
+        for changed in changes:
+            for blend_file in sorted(changed):
+                rebuild(worker, blend_file, args.ops)
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
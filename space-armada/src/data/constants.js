@@ -5,6 +5,9 @@
 // Path to GLB models - Vite publicDir serves ../assets at root, so models/ is correct
 export const MODEL_PATH = 'models/';
 
+// Packed bundle of every ship GLB (scripts/asset_bundle.py); models load from it when present
+export const MODEL_BUNDLE_PATH = MODEL_PATH + 'ships.bundle';
+
 // Mapping from game ship types to GLB model files
 export const SHIP_MODELS = {
     // Player ship
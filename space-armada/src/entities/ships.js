@@ -11,6 +11,7 @@
  * DEPENDENCIES (must be injected or imported):
  * - THREE: Three.js library
  * - modelCache: Map containing loaded GLB models
+ * - collisionVolumes: Map-like cache of collision sidecars (optional; see game/physics.js)
  * - SHIP_MODELS: Ship model filename mappings (from data/constants.js)
  * - FACTION_SHIP_MAPPING: Faction to model type mapping (from data/constants.js)
  * - Texture creation functions (from rendering module)
@@ -18,6 +19,8 @@
  * @module entities/ships
  */
 
+import { createCollisionShape } from '../game/physics.js';
+
 // Ship scale constant - matches game rendering
 export const SHIP_SCALE = 0.4;
 
@@ -60,6 +63,34 @@ export function cloneModel(modelName, modelCache, THREE) {
     return clone;
 }
 
+/**
+ * Attach a GLB ship's precomputed collision and culling data to its group
+ * Sets userData.collisionShape (ground-plane outline for hit tests) and
+ * userData.collisionVolumes / userData.collisionModel (the sidecar and the
+ * object whose matrixWorld maps its model space to the world, for culling).
+ * Call after the group's scale is final; ships without a sidecar keep
+ * radius-based collision.
+ *
+ * @param {THREE.Group} group - Ship group
+ * @param {THREE.Object3D} glbModel - The cloned GLB scene inside the group
+ * @param {string} modelName - GLB filename
+ * @param {Object} collisionVolumes - Map-like cache of sidecars (may be undefined)
+ * @param {Object} THREE - Three.js library reference
+ */
+export function attachCollisionVolumes(group, glbModel, modelName, collisionVolumes, THREE) {
+    const volumes = collisionVolumes && collisionVolumes.get(modelName);
+    if (!volumes) return;
+
+    glbModel.updateMatrix();
+    const modelMatrix = new THREE.Matrix4()
+        .makeScale(group.scale.x, group.scale.y, group.scale.z)
+        .multiply(glbModel.matrix);
+
+    group.userData.collisionShape = createCollisionShape(volumes, modelMatrix.elements);
+    group.userData.collisionVolumes = volumes;
+    group.userData.collisionModel = glbModel;
+}
+
 /**
  * Get model name for a faction and ship type combination
  *
@@ -146,12 +177,13 @@ export function getFactionStyle(faction, textureCreators) {
  * @param {Object} deps - Dependencies object
  * @param {Object} deps.THREE - Three.js library
  * @param {Map} deps.modelCache - Cache of loaded GLB models
+ * @param {Map} [deps.collisionVolumes] - Cache of collision sidecars
  * @param {Object} deps.SHIP_MODELS - Ship model filenames
  * @param {Object} deps.textureCreators - Texture creation functions
  * @returns {THREE.Group} Player ship group
  */
 export function createPlayerShip(deps) {
-    const { THREE, modelCache, SHIP_MODELS, textureCreators } = deps;
+    const { THREE, modelCache, collisionVolumes, SHIP_MODELS, textureCreators } = deps;
     const group = new THREE.Group();
 
     // Try to use GLB model first
@@ -204,6 +236,7 @@ export function createPlayerShip(deps) {
 
         // Scale for game
         group.scale.set(SHIP_SCALE, SHIP_SCALE, SHIP_SCALE);
+        attachCollisionVolumes(group, glbModel, modelName, collisionVolumes, THREE);
 
         // Set high render order so player renders above stations
         group.renderOrder = 100;
@@ -481,13 +514,14 @@ export function createProceduralPlayerShip(deps) {
  * @param {Object} deps - Dependencies object
  * @param {Object} deps.THREE - Three.js library
  * @param {Map} deps.modelCache - Cache of loaded GLB models
+ * @param {Map} [deps.collisionVolumes] - Cache of collision sidecars
  * @param {Object} deps.SHIP_MODELS - Ship model filenames
  * @param {Object} deps.FACTION_SHIP_MAPPING - Faction mappings
  * @param {Object} deps.textureCreators - Texture creation functions
  * @returns {THREE.Group} Enemy ship group
  */
 export function createEnemyShip(type = 'fighter', faction = 'pirates', deps) {
-    const { THREE, modelCache, SHIP_MODELS, FACTION_SHIP_MAPPING, textureCreators } = deps;
+    const { THREE, modelCache, collisionVolumes, SHIP_MODELS, FACTION_SHIP_MAPPING, textureCreators } = deps;
     const group = new THREE.Group();
     const style = getFactionStyle(faction, textureCreators);
 
@@ -530,6 +564,7 @@ export function createEnemyShip(type = 'fighter', faction = 'pirates', deps) {
         if (type === 'heavy') scale *= 1.5;
         if (type === 'boss') scale *= 2.5;
         group.scale.set(scale, scale, scale);
+        attachCollisionVolumes(group, glbModel, modelName, collisionVolumes, THREE);
 
         return group;
     }
@@ -2,7 +2,8 @@
 // Extracted from index.html for modularization
 // Contains Newtonian physics calculations, collision detection, and damage systems
 
-import { magnitude, normalize, angleDifference, distance } from '../utils/math.js';
+import { magnitude, normalize, angleDifference, distance, rotateVector } from '../utils/math.js';
+import { MODEL_PATH } from '../data/constants.js';
 
 // ============================================================
 // PHYSICS CONSTANTS
@@ -303,6 +304,174 @@ export function checkBeamCollision(origin, target, beamLength, beamWidth) {
     return perpDist < beamWidth;
 }
 
+// ============================================================
+// PRECOMPUTED COLLISION VOLUMES
+// ============================================================
+
+/** Collision sidecars by model name; null when a model has none */
+const collisionVolumeCache = new Map();
+
+/**
+ * Load the collision sidecar written by scripts/collision_volumes.py for a model
+ * The sidecar (<Name>.collision.json next to the GLB) holds a bounding sphere,
+ * oriented box, convex hull and top-down outline polygon in model units, so
+ * no vertex data has to be read at runtime. When the ship bundle is loaded the
+ * sidecar is read out of it instead of being fetched on its own
+ * @param {string} modelName - GLB filename (e.g., 'UE Fighter.glb')
+ * @param {object|null} bundle - Loaded model bundle ({ buffer, files }), if any
+ * @returns {Promise<object|null>} The sidecar, or null if the model has none
+ */
+export async function loadCollisionVolumes(modelName, bundle = null) {
+    if (collisionVolumeCache.has(modelName)) {
+        return collisionVolumeCache.get(modelName);
+    }
+
+    const sidecarName = modelName.replace(/\.glb$/, '.collision.json');
+    const bundled = bundle && bundle.files['models/' + sidecarName];
+    let volumes = null;
+    try {
+        if (bundled) {
+            const bytes = new Uint8Array(bundle.buffer, bundled.offset, bundled.length);
+            volumes = JSON.parse(new TextDecoder().decode(bytes));
+        } else {
+            const response = await fetch(MODEL_PATH + sidecarName);
+            if (response.ok) {
+                volumes = await response.json();
+            }
+        }
+    } catch (error) {
+        console.warn(`No collision volumes for ${modelName}:`, error);
+    }
+    collisionVolumeCache.set(modelName, volumes);
+    return volumes;
+}
+
+/**
+ * Get the cached collision sidecar of a model (see loadCollisionVolumes)
+ * @param {string} modelName - GLB filename
+ * @returns {object|null} The sidecar, or null if not loaded or missing
+ */
+export function getCollisionVolumes(modelName) {
+    return collisionVolumeCache.get(modelName) || null;
+}
+
+/**
+ * Convex hull of 2D points (monotone chain)
+ * @param {Array<{x: number, y: number}>} points - Points
+ * @returns {Array<{x: number, y: number}>} Hull vertices, counter-clockwise
+ */
+export function convexHull2D(points) {
+    const sorted = [...points].sort((a, b) => a.x - b.x || a.y - b.y);
+    const turn = (o, a, b) => (a.x - o.x) * (b.y - o.y) - (a.y - o.y) * (b.x - o.x);
+    const hull = [];
+    for (const sweep of [sorted, [...sorted].reverse()]) {
+        const chain = [];
+        for (const point of sweep) {
+            while (chain.length >= 2 && turn(chain[chain.length - 2], chain[chain.length - 1], point) <= 0) {
+                chain.pop();
+            }
+            chain.push(point);
+        }
+        hull.push(...chain.slice(0, -1));
+    }
+    return hull;
+}
+
+/**
+ * Build a 2D collision shape in the ship's local ground plane from a collision sidecar
+ * The sidecar is in model space; modelMatrix is the transform the ship applies to
+ * its GLB (normalization, orientation and ship scale, but not the ship's own
+ * position and heading). Model points land on the shape's (x, y) as the ship's
+ * local (x, z). When the model's up axis stays up, the precomputed top-down
+ * outline is used as is; otherwise the convex hull is projected onto the plane.
+ * @param {object} volumes - Sidecar from loadCollisionVolumes
+ * @param {number[]} modelMatrix - Column-major 4x4 matrix (THREE.Matrix4.elements) from model space to ship space
+ * @returns {{radius: number, polygon: Array<{x: number, y: number}>}} Collision shape
+ */
+export function createCollisionShape(volumes, modelMatrix) {
+    const e = modelMatrix;
+    const project = ([x, y, z]) => ({
+        x: e[0] * x + e[4] * y + e[8] * z + e[12],
+        y: e[2] * x + e[6] * y + e[10] * z + e[14]
+    });
+
+    const upLength = Math.sqrt(e[4] * e[4] + e[5] * e[5] + e[6] * e[6]);
+    const polygon = Math.abs(e[5]) > 0.999 * upLength
+        ? volumes.silhouette.polygon.map(([x, z]) => project([x, 0, z]))
+        : convexHull2D(volumes.hull.vertices.map(project));
+
+    // Broad phase: the circle around the ship's origin that holds the whole outline
+    const radius = Math.max(...polygon.map(point => magnitude(point.x, point.y)));
+    return { radius, polygon };
+}
+
+/**
+ * Check if a point is inside a polygon (even-odd rule, works for concave outlines)
+ * @param {number} px - Point X
+ * @param {number} py - Point Y
+ * @param {Array<{x: number, y: number}>} polygon - Polygon vertices
+ * @returns {boolean} True if the point is inside
+ */
+export function pointInPolygon(px, py, polygon) {
+    let inside = false;
+    for (let i = 0, j = polygon.length - 1; i < polygon.length; j = i++) {
+        const a = polygon[i];
+        const b = polygon[j];
+        if ((a.y > py) !== (b.y > py) && px < (b.x - a.x) * (py - a.y) / (b.y - a.y) + a.x) {
+            inside = !inside;
+        }
+    }
+    return inside;
+}
+
+/**
+ * Check if a point hits a ship's precomputed outline
+ * Broad phase against the shape's circle, then narrow phase against the polygon
+ * in the ship's rotated frame
+ * @param {number} px - Point X
+ * @param {number} py - Point Y
+ * @param {object} entity - Entity with x, y, rotation properties (rotation counter-clockwise in the x/y plane)
+ * @param {object} shape - Shape from createCollisionShape
+ * @param {number} padding - Extra radius around the point (e.g., projectile size)
+ * @returns {boolean} True if the point is within the ship's outline
+ */
+export function checkShapePointCollision(px, py, entity, shape, padding = 0) {
+    const dx = px - entity.x;
+    const dy = py - entity.y;
+    const reach = shape.radius + padding;
+    if (dx * dx + dy * dy > reach * reach) return false;
+
+    const local = rotateVector(dx, dy, -(entity.rotation || 0));
+    if (pointInPolygon(local.x, local.y, shape.polygon)) return true;
+    if (padding <= 0) return false;
+
+    // Padded points also hit when within padding of an outline edge
+    const polygon = shape.polygon;
+    for (let i = 0, j = polygon.length - 1; i < polygon.length; j = i++) {
+        const ex = polygon[i].x - polygon[j].x;
+        const ey = polygon[i].y - polygon[j].y;
+        const lengthSq = ex * ex + ey * ey;
+        const t = lengthSq ? Math.max(0, Math.min(1, ((local.x - polygon[j].x) * ex + (local.y - polygon[j].y) * ey) / lengthSq)) : 0;
+        const cx = polygon[j].x + ex * t - local.x;
+        const cy = polygon[j].y + ey * t - local.y;
+        if (cx * cx + cy * cy < padding * padding) return true;
+    }
+    return false;
+}
+
+/**
+ * Check if a ship's bounding sphere is inside a camera frustum (view culling)
+ * @param {object} volumes - Sidecar from loadCollisionVolumes
+ * @param {object} object3D - The ship's cloned GLB scene, mapping model space to world (matrixWorld must be current)
+ * @param {object} frustum - THREE.Frustum built from the camera
+ * @param {object} THREE - Three.js module
+ * @returns {boolean} True if the ship may be visible
+ */
+export function isShipInFrustum(volumes, object3D, frustum, THREE) {
+    const sphere = new THREE.Sphere(new THREE.Vector3().fromArray(volumes.sphere.center), volumes.sphere.radius);
+    return frustum.intersectsSphere(sphere.applyMatrix4(object3D.matrixWorld));
+}
+
 // ============================================================
 // EV-STYLE DAMAGE SYSTEM
 // ============================================================
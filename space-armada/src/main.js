@@ -72,6 +72,10 @@ import {
     applyNewtonian,
     updateRotation,
     checkCircleCollision,
+    checkPointCollision,
+    checkShapePointCollision,
+    getCollisionVolumes,
+    isShipInFrustum,
     checkRectCollision,
     resolveCollision,
     getCollisionNormal,
@@ -511,6 +515,7 @@ async function startGame() {
     playerShip = await createPlayerShip({
         THREE,
         modelCache: { get: getLoadedModel },
+        collisionVolumes: { get: getCollisionVolumes },
         SHIP_MODELS,
         textureCreators: shipTextureCreators
     });
@@ -733,10 +738,7 @@ function gameUpdate(dt) {
                 const enemy = enemies[j];
                 if (!enemy || !enemy.mesh) continue;
 
-                if (checkCircleCollision(
-                    proj.position.x, proj.position.z, proj.radius || 5,
-                    enemy.mesh.position.x, enemy.mesh.position.z, enemy.collisionRadius || 20
-                )) {
+                if (projectileHitsShip(proj, enemy)) {
                     // Hit enemy
                     handleProjectileHit(proj, enemy, j);
                     projectiles.splice(i, 1);
@@ -874,6 +876,33 @@ function enemyFire(enemy) {
     }
 }
 
+/**
+ * Check a projectile against a ship's outline
+ * Uses the precomputed collision shape when the ship has one (see
+ * attachCollisionVolumes), else a circle of enemy.collisionRadius
+ * @param {object} projectile - Projectile with position and radius
+ * @param {object} ship - Ship entity with mesh (and optional collisionRadius)
+ * @returns {boolean} True if the projectile hits
+ */
+function projectileHitsShip(projectile, ship) {
+    const mesh = ship.mesh;
+    const padding = projectile.radius || 5;
+    const shape = mesh.userData.collisionShape;
+    if (shape) {
+        // Ground plane is x/z; rotation.y turns the ship clockwise seen from above
+        return checkShapePointCollision(
+            projectile.position.x, projectile.position.z,
+            { x: mesh.position.x, y: mesh.position.z, rotation: -mesh.rotation.y },
+            shape, padding
+        );
+    }
+    return checkPointCollision(
+        projectile.position.x, projectile.position.z,
+        { x: mesh.position.x, y: mesh.position.z },
+        (ship.collisionRadius || 20) + padding
+    );
+}
+
 /**
  * Handle projectile hitting an enemy
  */
@@ -941,9 +970,30 @@ function destroyEnemy(enemy, index) {
 function gameRender() {
     if (!renderer || !scene || !camera) return;
 
+    cullShips();
     renderer.render(scene, camera);
 }
 
+const viewFrustum = new THREE.Frustum();
+const viewProjection = new THREE.Matrix4();
+
+/**
+ * Hide ships whose precomputed bounding sphere is outside the camera's view,
+ * so the renderer skips their whole mesh hierarchy
+ */
+function cullShips() {
+    scene.updateMatrixWorld();
+    camera.updateMatrixWorld();
+    viewProjection.multiplyMatrices(camera.projectionMatrix, camera.matrixWorldInverse);
+    viewFrustum.setFromProjectionMatrix(viewProjection);
+
+    for (const enemy of enemies) {
+        const mesh = enemy && enemy.mesh;
+        if (!mesh || !mesh.userData.collisionVolumes) continue;
+        mesh.visible = isShipInFrustum(mesh.userData.collisionVolumes, mesh.userData.collisionModel, viewFrustum, THREE);
+    }
+}
+
 // ============================================================
 // WINDOW EXPORTS
 // ============================================================
@@ -3,12 +3,15 @@
 
 import * as THREE from 'three';
 import { GLTFLoader } from 'three/addons/loaders/GLTFLoader.js';
+import { MeshoptDecoder } from 'three/addons/libs/meshopt_decoder.module.js';
 import {
     MODEL_PATH,
+    MODEL_BUNDLE_PATH,
     SHIP_MODELS,
     SHIP_FACTION_COLORS,
     FACTION_SHIP_MAPPING
 } from '../data/constants.js';
+import { loadCollisionVolumes } from '../game/physics.js';
 
 // ============================================================
 // MODEL LOADING STATE
@@ -26,17 +29,31 @@ let modelLoadProgress = 0;
 /** GLTF loader instance (initialized lazily) */
 let gltfLoader = null;
 
+/** Ship bundle as { buffer, files }, null if unavailable, undefined until loadModelBundle runs */
+let modelBundle;
+
 // ============================================================
 // LOADER INITIALIZATION
 // ============================================================
 
+/**
+ * Create a GLTF loader that can read GLBs compressed by scripts/glb_optimize.py --meshopt
+ * (KHR_mesh_quantization needs no decoder)
+ * @returns {GLTFLoader} The loader instance
+ */
+function createGLTFLoader() {
+    const loader = new GLTFLoader();
+    loader.setMeshoptDecoder(MeshoptDecoder);
+    return loader;
+}
+
 /**
  * Get or create the GLTF loader instance
  * @returns {GLTFLoader} The loader instance
  */
 export function getGLTFLoader() {
     if (!gltfLoader) {
-        gltfLoader = new GLTFLoader();
+        gltfLoader = createGLTFLoader();
     }
     return gltfLoader;
 }
@@ -46,7 +63,7 @@ export function getGLTFLoader() {
  * Call this before using any model loading functions
  */
 export function initModelLoader() {
-    gltfLoader = new GLTFLoader();
+    gltfLoader = createGLTFLoader();
     console.log('GLTFLoader initialized');
 }
 
@@ -70,54 +87,70 @@ export async function loadGLBModel(modelName) {
 
     return new Promise((resolve, reject) => {
         const url = MODEL_PATH + modelName;
-        console.log(`Loading model from: ${url}`);
-
-        loader.load(
-            url,
-            (gltf) => {
-                const model = gltf.scene;
-
-                // Log model structure for debugging
-                console.log(`Model ${modelName} structure:`, model);
-
-                // Center the model and normalize scale
-                const box = new THREE.Box3().setFromObject(model);
-                const center = box.getCenter(new THREE.Vector3());
-                const size = box.getSize(new THREE.Vector3());
-                const maxDim = Math.max(size.x, size.y, size.z);
-
-                console.log(`Model ${modelName} dimensions:`, size, 'max:', maxDim);
-
-                // Normalize to ~60 units (reasonable ship size)
-                const targetSize = 60;
-                const scale = targetSize / maxDim;
-                model.scale.set(scale, scale, scale);
-
-                // Center the model
-                model.position.sub(center.multiplyScalar(scale));
-
-                // Ensure materials are properly visible
-                model.traverse((child) => {
-                    if (child.isMesh) {
-                        // Make sure materials render both sides and are visible
-                        if (child.material) {
-                            child.material.side = THREE.DoubleSide;
-                            child.material.needsUpdate = true;
-                            // Ensure emissive properties don't wash out colors
-                            if (child.material.emissive) {
-                                child.material.emissiveIntensity = 0.1;
-                            }
+        const bundled = modelBundle && modelBundle.files['models/' + modelName];
+
+        const onLoad = (gltf) => {
+            const model = gltf.scene;
+
+            // Log model structure for debugging
+            console.log(`Model ${modelName} structure:`, model);
+
+            // Center the model and normalize scale
+            const box = new THREE.Box3().setFromObject(model);
+            const center = box.getCenter(new THREE.Vector3());
+            const size = box.getSize(new THREE.Vector3());
+            const maxDim = Math.max(size.x, size.y, size.z);
+
+            console.log(`Model ${modelName} dimensions:`, size, 'max:', maxDim);
+
+            // Normalize to ~60 units (reasonable ship size)
+            const targetSize = 60;
+            const scale = targetSize / maxDim;
+            model.scale.set(scale, scale, scale);
+
+            // Center the model
+            model.position.sub(center.multiplyScalar(scale));
+
+            // Ensure materials are properly visible
+            model.traverse((child) => {
+                if (child.isMesh) {
+                    // Make sure materials render both sides and are visible
+                    if (child.material) {
+                        child.material.side = THREE.DoubleSide;
+                        child.material.needsUpdate = true;
+                        // Ensure emissive properties don't wash out colors
+                        if (child.material.emissive) {
+                            child.material.emissiveIntensity = 0.1;
                         }
-                        child.castShadow = true;
-                        child.receiveShadow = true;
                     }
-                });
+                    child.castShadow = true;
+                    child.receiveShadow = true;
+                }
+            });
+
+            // Store in cache
+            modelCache.set(modelName, model);
+            console.log(`Successfully loaded model: ${modelName}`);
+            resolve(model);
+        };
+
+        const onError = (error) => {
+            console.error(`Failed to load model ${modelName}:`, error);
+            console.error(`URL attempted: ${bundled ? MODEL_BUNDLE_PATH : url}`);
+            resolve(null); // Return null on error, fallback to procedural
+        };
+
+        if (bundled) {
+            // Slice the GLB out of the already-fetched bundle; no request needed
+            const glb = modelBundle.buffer.slice(bundled.offset, bundled.offset + bundled.length);
+            loader.parse(glb, MODEL_PATH, onLoad, onError);
+            return;
+        }
 
-                // Store in cache
-                modelCache.set(modelName, model);
-                console.log(`Successfully loaded model: ${modelName}`);
-                resolve(model);
-            },
+        console.log(`Loading model from: ${url}`);
+        loader.load(
+            url,
+            onLoad,
             (progress) => {
                 // Progress callback
                 if (progress.total > 0) {
@@ -125,15 +158,49 @@ export async function loadGLBModel(modelName) {
                     console.log(`Loading ${modelName}: ${percent}%`);
                 }
             },
-            (error) => {
-                console.error(`Failed to load model ${modelName}:`, error);
-                console.error(`URL attempted: ${url}`);
-                resolve(null); // Return null on error, fallback to procedural
-            }
+            onError
         );
     });
 }
 
+/**
+ * Fetch the packed ship bundle written by scripts/asset_bundle.py
+ * Layout: 'EVOB', uint32 version, uint32 index length, uint32 data offset,
+ * then a JSON index { files: { name: { offset, length, sha256 } } }.
+ * Once loaded, loadGLBModel slices models out of it instead of fetching each GLB,
+ * and the preloads read collision sidecars from it the same way.
+ * @param {string} url - Bundle URL
+ * @returns {Promise<object|null>} The bundle ({ buffer, files }) or null if unavailable
+ */
+export async function loadModelBundle(url = MODEL_BUNDLE_PATH) {
+    if (modelBundle !== undefined) {
+        return modelBundle;
+    }
+
+    modelBundle = null;
+    try {
+        const response = await fetch(url);
+        if (!response.ok) {
+            console.log(`No model bundle at ${url}, loading GLBs individually`);
+            return null;
+        }
+        const buffer = await response.arrayBuffer();
+        const header = new DataView(buffer, 0, 16);
+        const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+        if (magic !== 'EVOB' || header.getUint32(4, true) !== 1) {
+            console.warn(`${url} is not a version 1 model bundle`);
+            return null;
+        }
+        const indexLength = header.getUint32(8, true);
+        const index = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 16, indexLength)));
+        modelBundle = { buffer, files: index.files };
+        console.log(`Loaded model bundle: ${Object.keys(index.files).length} files`);
+    } catch (error) {
+        console.warn(`Failed to load model bundle ${url}:`, error);
+    }
+    return modelBundle;
+}
+
 // ============================================================
 // MODEL CLONING & MATERIALS
 // ============================================================
@@ -230,10 +297,12 @@ const MODELS_TO_PRELOAD = [
  */
 export async function preloadModels() {
     console.log('Preloading GLB ship models...');
+    await loadModelBundle();
 
     let loaded = 0;
     for (const model of MODELS_TO_PRELOAD) {
-        await loadGLBModel(model);
+        // Collision sidecar too (read from the bundle when loaded), for hit tests and culling
+        await Promise.all([loadGLBModel(model), loadCollisionVolumes(model, modelBundle)]);
         loaded++;
         modelLoadProgress = (loaded / MODELS_TO_PRELOAD.length) * 100;
     }
@@ -266,11 +335,13 @@ export async function preloadModelsWithProgress(modelsOrProgress, onProgress) {
         progressCallback = null;
     }
 
+    await loadModelBundle();
+
     let loaded = 0;
     const total = models.length;
     for (const model of models) {
         try {
-            await loadGLBModel(model);
+            await Promise.all([loadGLBModel(model), loadCollisionVolumes(model, modelBundle)]);
         } catch (e) {
             console.warn(`Failed to load model ${model}:`, e);
         }
@@ -335,6 +406,7 @@ export function getCachedModel(modelName) {
  */
 export function clearModelCache() {
     modelCache.clear();
+    modelBundle = undefined;
     modelsLoaded = false;
     modelLoadProgress = 0;
     console.log('Model cache cleared');